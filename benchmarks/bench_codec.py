@@ -0,0 +1,100 @@
+"""Micro-benchmark of the WebSocket message codec over recorded lobby traffic.
+
+Usage: python -m benchmarks.bench_codec [traffic_file] [-n repeats]
+"""
+
+import argparse
+import json
+import os
+import timeit
+
+from src import codec
+
+TRAFFIC_PATH = os.path.join(os.path.dirname(__file__), "data", "lobby_traffic.txt")
+
+# The commands which HanabiClient has a handler for.
+HANDLED_COMMANDS = {
+    "welcome",
+    "warning",
+    "error",
+    "chat",
+    "table",
+    "tableList",
+    "tableGone",
+    "tableStart",
+    "init",
+    "gameAction",
+    "gameActionList",
+    "databaseID",
+}
+
+# Outgoing frames which the bot typically sends.
+OUTGOING = [
+    ("action", {"tableID": 1001, "type": 0, "target": 3}),
+    ("action", {"tableID": 1001, "type": 2, "target": 1, "value": 4}),
+    ("getGameInfo2", {"tableID": 1001}),
+    ("chatPM", {"msg": "That is not a valid command.", "recipient": "Alice"}),
+]
+
+
+def load_traffic(path=TRAFFIC_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def decode_stdlib(messages):
+    """The original path: split and parse every message."""
+    for message in messages:
+        command, payload = message.split(" ", 1)
+        json.loads(payload)
+
+
+def decode_codec(messages):
+    """The codec path: skip unhandled commands, parse and project the others."""
+    for message in messages:
+        command, payload = codec.split_message(message)
+        if command in HANDLED_COMMANDS:
+            codec.decode_payload(command, payload)
+
+
+def encode_stdlib(frames):
+    for command, data in frames:
+        _ = command + " " + json.dumps(data)
+
+
+def encode_codec(frames):
+    for command, data in frames:
+        codec.encode_message(command, data)
+
+
+def measure(fn, arg, repeats):
+    """Return the best time (in microseconds) of one call over the given repeats."""
+    timer = timeit.Timer(lambda: fn(arg))
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeats, number=number)) / number
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("traffic", nargs="?", default=TRAFFIC_PATH)
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = load_traffic(args.traffic)
+    frames = OUTGOING * 25
+    print(f"JSON backend: {codec.BACKEND}")
+    print(f"{len(messages)} incoming messages, {len(frames)} outgoing frames")
+
+    results = [
+        ("decode (stdlib)", measure(decode_stdlib, messages, args.repeats)),
+        ("decode (codec)", measure(decode_codec, messages, args.repeats)),
+        ("encode (stdlib)", measure(encode_stdlib, frames, args.repeats)),
+        ("encode (codec)", measure(encode_codec, frames, args.repeats)),
+    ]
+    for name, usec in results:
+        print(f"{name:<16} {usec:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Micro-benchmarks of the engine hot paths, on fixed fixtures.
+
+The fixtures are the opening of a recorded game (the replay of tests/test_snapshot.py)
+and a middle game reached by seeded self-play, so every run measures the same work.
+Results are written as JSON; "--compare" flags regressions against a saved baseline.
+
+Usage: python -m benchmarks.bench_engine [-n repeats] [--output results.json]
+                                         [--compare baseline.json] [--threshold 0.2]
+                                         [--filter name]
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+from src.action import Action
+from src.card import Card
+from src.clue import Clue
+from src.constants import ACTION
+from src.conventions import check_convention, evaluate
+from src.game import Game
+from src.simulator import SelfPlayGame, fallback_action
+from src.snapshot import Snapshot
+
+REPLAY_PATH = os.path.join(os.path.dirname(__file__), "data", "replay_1124590.json")
+# The middle game: this seed, after this many turns of the fallback policy.
+MIDGAME_SEED = 1
+MIDGAME_TURNS = 24
+# A benchmark is run until it took at least this long (seconds) per repeat.
+MIN_REPEAT_TIME = 0.05
+# Flag a benchmark when its best time got slower by more than this fraction.
+DEFAULT_THRESHOLD = 0.2
+
+
+# --------
+# Fixtures
+# --------
+
+
+def load_opening(path=REPLAY_PATH) -> Snapshot:
+    """The opening snapshot of a recorded game, as seen by our player."""
+    with open(path, encoding="utf-8") as f:
+        replay = json.load(f)
+    snapshot = Snapshot()
+    snapshot.initialize(
+        num_players=replay["num_players"],
+        start_player_index=0,
+        hands=[
+            [Card(order=o, rank=r, suit_index=s) for o, r, s in hand]
+            for hand in replay["hands"]
+        ],
+    )
+    return snapshot
+
+
+def load_midgame() -> Game:
+    """The game of one seat in the middle of a seeded self-play game."""
+    game = SelfPlayGame(num_players=2, seed=MIDGAME_SEED, decide=fallback_action)
+    for _ in range(MIDGAME_TURNS):
+        game.step()
+    return game.seats[game.referee.current_player_index]
+
+
+def red_1_clue(giver, receiver, touched_orders) -> Action:
+    return Action(
+        action_type=ACTION.RANK_CLUE.value,
+        player_index=giver,
+        clue=Clue(
+            hint_type=ACTION.RANK_CLUE.value,
+            hint_value=1,
+            giver_index=giver,
+            receiver_index=receiver,
+            touched_orders=touched_orders,
+        ),
+    )
+
+
+# ----------
+# Benchmarks
+# ----------
+
+
+def get_benchmarks() -> dict:
+    """Map each benchmark name to (setup, run): run(*setup()) is the timed call."""
+    opening = load_opening()
+    midgame = load_midgame()
+    midgame_snapshot = midgame.decision_snapshot()
+    player = midgame.our_player_index
+    other = (player + 1) % len(midgame.player_names)
+
+    # Player 0 tells player 2 about their red 1s (orders 8 and 9).
+    clue_1s = red_1_clue(0, 2, [8, 9])
+    color_clue = Action(
+        action_type=ACTION.COLOR_CLUE.value,
+        player_index=player,
+        clue=Clue(
+            hint_type=ACTION.COLOR_CLUE.value,
+            hint_value=midgame.player_hands[other][0].suit_index,
+            giver_index=player,
+            receiver_index=other,
+            touched_orders=[
+                c.order
+                for c in midgame.player_hands[other]
+                if c.suit_index == midgame.player_hands[other][0].suit_index
+            ],
+        ),
+    )
+    valid_actions = opening.get_valid_actions(viewer_index=0, player_index=0)
+    visible_cards = [card for hand in midgame.player_hands for card in hand]
+
+    def fresh_snapshot(snapshot):
+        return lambda: (snapshot.copy(),)
+
+    def fresh_game():
+        # Only what handle_clue changes; copying the snapshot history would dominate.
+        game = copy.copy(midgame)
+        game.player_hands = copy.deepcopy(midgame.player_hands)
+        game.action_history = list(midgame.action_history)
+        return (game,)
+
+    def run_check_convention(snapshot):
+        for action in valid_actions:
+            check_convention(snapshot, action, 0)
+
+    def run_handle_clue(game):
+        game.handle_clue(copy.copy(color_clue))
+
+    def run_is_trash(game):
+        for card in visible_cards:
+            game.is_trash(card)
+
+    benchmarks = {
+        "snapshot.next_snapshot": (
+            lambda: (opening,),
+            lambda s: s.next_snapshot(clue_1s, 0),
+        ),
+        "snapshot.next_snapshot[midgame]": (
+            lambda: (midgame.snapshot_history[-1],),
+            lambda s: s.next_snapshot(color_clue, player),
+        ),
+        "snapshot.get_valid_actions": (
+            lambda: (opening,),
+            lambda s: s.get_valid_actions(viewer_index=0, player_index=1),
+        ),
+        "conventions.check_convention": (
+            fresh_snapshot(opening),
+            run_check_convention,
+        ),
+        "game.handle_clue": (fresh_game, run_handle_clue),
+        "game.is_trash": (lambda: (midgame,), run_is_trash),
+    }
+    for depth in (1, 2, 3):
+        benchmarks[f"conventions.evaluate[depth={depth}]"] = (
+            fresh_snapshot(midgame_snapshot),
+            lambda s, depth=depth: evaluate(s, player, player, depth),
+        )
+    return benchmarks
+
+
+def measure(setup, run, repeats) -> dict:
+    """Time run(*setup()) in microseconds per call; the setup is not timed."""
+    # Find how many calls make one repeat long enough to time reliably.
+    number = 1
+    while True:
+        args = [setup() for _ in range(number)]
+        started = time.perf_counter()
+        for a in args:
+            run(*a)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_REPEAT_TIME or number >= 1 << 16:
+            break
+        number *= 2
+
+    times = [elapsed / number]
+    for _ in range(repeats - 1):
+        args = [setup() for _ in range(number)]
+        started = time.perf_counter()
+        for a in args:
+            run(*a)
+        times.append((time.perf_counter() - started) / number)
+    times.sort()
+    return {
+        "number": number,
+        "repeats": len(times),
+        "min_us": times[0] * 1e6,
+        "median_us": times[len(times) // 2] * 1e6,
+        "mean_us": sum(times) / len(times) * 1e6,
+    }
+
+
+def run_benchmarks(repeats=5, name_filter=None) -> dict:
+    results = {}
+    for name, (setup, run) in get_benchmarks().items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(setup, run, repeats)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "midgame": {"seed": MIDGAME_SEED, "turns": MIDGAME_TURNS},
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold=DEFAULT_THRESHOLD) -> list:
+    """Compare the best times with a baseline; returns the names of the regressions.
+
+    The best of the repeats is the least noisy estimate of the cost of the code itself.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<36} {result['min_us']:12.1f} us  (new)")
+            continue
+        ratio = result["min_us"] / base["min_us"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  improved"
+        print(
+            f"{name:<36} {result['min_us']:12.1f} us  "
+            f"{base['min_us']:12.1f} us  {ratio:6.2f}x{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="a saved results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--filter", help="only run benchmarks containing this text")
+    args = parser.parse_args()
+
+    # The engine warns about its own views on some fixtures.
+    logging.basicConfig(level=logging.ERROR)
+    results = run_benchmarks(args.repeats, args.filter)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}.")
+            sys.exit(1)
+        return
+
+    if not args.output:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results["results"].items():
+        print(f"{name:<36} {result['min_us']:12.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare the binary encoding of src/serialization.py with jsonpickle.
+
+It encodes and decodes the game of a seat in the middle of a seeded self-play game,
+and its latest snapshot, and reports the best times and the sizes of both.
+
+Usage: python -m benchmarks.bench_serialization [-n repeats] [--turns T]
+"""
+
+import argparse
+import logging
+import warnings
+
+import jsonpickle
+
+from benchmarks.bench_engine import measure
+from src.serialization import decode_game, decode_snapshot, encode_game, encode_snapshot
+from src.simulator import SelfPlayGame, fallback_action
+
+
+def load_game(seed=2, num_players=3, turns=60):
+    game = SelfPlayGame(num_players=num_players, seed=seed, decide=fallback_action)
+    for _ in range(turns):
+        game.step()
+    return game.seats[0]
+
+
+def run(repeats=5, turns=60) -> dict:
+    game = load_game(turns=turns)
+    results = {}
+    for name, obj, encode, decode in (
+        ("game", game, encode_game, decode_game),
+        ("snapshot", game.snapshot_history[-1], encode_snapshot, decode_snapshot),
+    ):
+        binary = encode(obj)
+        pickled = jsonpickle.encode(obj)
+        results[name] = {
+            "binary_bytes": len(binary),
+            "jsonpickle_bytes": len(pickled),
+            "binary_encode_us": measure(tuple, lambda: encode(obj), repeats)["min_us"],
+            "jsonpickle_encode_us": measure(
+                tuple, lambda: jsonpickle.encode(obj), repeats
+            )["min_us"],
+            "binary_decode_us": measure(tuple, lambda: decode(binary), repeats)["min_us"],
+            "jsonpickle_decode_us": measure(
+                tuple, lambda: jsonpickle.decode(pickled), repeats
+            )["min_us"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeats", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=60)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    for name, r in run(args.repeats, args.turns).items():
+        print(
+            f"{name:<9} size {r['binary_bytes']:>8} B vs {r['jsonpickle_bytes']:>8} B "
+            f"({r['jsonpickle_bytes'] / r['binary_bytes']:.1f}x)"
+        )
+        for op in ("encode", "decode"):
+            binary = r[f"binary_{op}_us"]
+            pickled = r[f"jsonpickle_{op}_us"]
+            print(
+                f"{'':<9} {op} {binary:>10.1f} us vs {pickled:>10.1f} us "
+                f"({pickled / binary:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Load test: N bots playing on M tables at once against the in-process fake server.
+
+It measures the latency from each incoming "gameAction" which gives a bot its
+turn to the matching outgoing "action" frame, the games finished per minute,
+and the CPU time and peak RSS of the process.
+
+Usage: python -m benchmarks.load_test [--bots N] [--tables M] [--duration S] [--json]
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+from src.decision_pool import DecisionPool
+from src.fake_server import FakeHanabiServer
+from src.hanabi_client import HanabiClient
+from src.referee import END_CONDITION_NORMAL, END_CONDITION_STRIKEOUT
+from src.utils import percentile
+
+# A game without any action for this long (seconds) is terminated as stalled.
+DEFAULT_STALL_TIMEOUT = 5
+
+
+class TimedServer(FakeHanabiServer):
+    """The fake server, timing how long each bot takes to act on its turn."""
+
+    def __init__(self, seed=0):
+        super().__init__(seed)
+        self.latencies = []
+        self.warnings = 0
+        # When each table handed the turn to a bot, and when it last moved.
+        self.turn_started = {}
+        self.last_activity = {}
+        # The scores of the games which ended by the rules (not terminated).
+        self.scores = []
+
+    def handle(self, connection, command, data):
+        if command == "action":
+            # Stamp before waiting for the server lock, like a network peer would.
+            now = time.perf_counter()
+            started = self.turn_started.pop(data.get("tableID"), None)
+            if started is not None:
+                self.latencies.append(now - started)
+        super().handle(connection, command, data)
+
+    def _send_actions(self, table, actions):
+        super()._send_actions(table, actions)
+        now = time.perf_counter()
+        self.last_activity[table.id] = now
+        if actions and actions[-1]["type"] == "turn":
+            self.turn_started[table.id] = now
+
+    def _finish(self, table):
+        # Counted here: the bots leave at once, and the table is gone soon after.
+        if table.referee.end_condition in (
+            END_CONDITION_NORMAL,
+            END_CONDITION_STRIKEOUT,
+        ):
+            self.scores.append(table.referee.score)
+        super()._finish(table)
+
+    def _deliver(self, username, command, data):
+        if command == "warning":
+            self.warnings += 1
+        super()._deliver(username, command, data)
+
+
+def start_bots(server, names, decision_pool) -> dict:
+    """Connect one HanabiClient per name, each on its own thread."""
+    clients = {}
+
+    def ws_factory(url, **kwargs):
+        # The message handler is bound to the client being constructed.
+        client = kwargs["on_message"].__self__
+        clients[client.username] = client
+        return server.websocket_app(url, **kwargs)
+
+    for name in names:
+        threading.Thread(
+            target=HanabiClient,
+            args=("ws://fake", server.login(name)),
+            kwargs={
+                "username": name,
+                "decision_pool": decision_pool,
+                "ws_factory": ws_factory,
+                "action_delay": 0,
+            },
+            name=name,
+            daemon=True,
+        ).start()
+    while not set(names) <= set(server.connections):
+        time.sleep(0.01)
+    return clients
+
+
+def cpu_and_rss():
+    """The CPU time (seconds) used so far and the peak RSS (MiB) of this process."""
+    if resource is None:
+        return time.process_time(), None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # "ru_maxrss" is in KiB on Linux.
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def run_load_test(
+    num_bots=4,
+    num_tables=4,
+    duration=30.0,
+    *,
+    players_per_table=2,
+    seed=0,
+    stall_timeout=DEFAULT_STALL_TIMEOUT,
+    max_workers=None,
+) -> dict:
+    """Keep M tables busy with N bots for a while; returns the report."""
+    if not 2 <= players_per_table <= num_bots:
+        raise ValueError("Each table needs 2 or more bots, and at most all of them.")
+
+    server = TimedServer(seed)
+    pool = DecisionPool(max_workers=max_workers or num_bots)
+    names = [f"robot{i + 1}" for i in range(num_bots)]
+    clients = start_bots(server, names, pool)
+
+    def new_table(slot):
+        # Spread the seats round-robin so that every bot plays on several tables.
+        players = [names[(slot + k) % num_bots] for k in range(players_per_table)]
+        table_id = server.create_table(players[0], f"load test {slot}")
+        for player in players[1:]:
+            server.join_table(table_id, player)
+        server.start_table(table_id)
+        server.last_activity[table_id] = time.perf_counter()
+        return table_id
+
+    cpu_start, _ = cpu_and_rss()
+    started = time.perf_counter()
+    slots = [new_table(slot) for slot in range(num_tables)]
+    stalled = 0
+    while time.perf_counter() - started < duration:
+        time.sleep(0.01)
+        now = time.perf_counter()
+        for slot, table_id in enumerate(slots):
+            table = server.tables.get(table_id)
+            if table is not None and table.database_id is None:
+                if now - server.last_activity[table_id] < stall_timeout:
+                    continue
+                stalled += 1
+                server.terminate_table(table_id)
+            slots[slot] = new_table(slot)
+    elapsed = time.perf_counter() - started
+    scores = list(server.scores)
+    finished = len(scores)
+    cpu_end, peak_rss = cpu_and_rss()
+
+    # End the games first, so that no decision is left to send on a closed connection.
+    for table_id in slots:
+        if table_id in server.tables:
+            server.terminate_table(table_id)
+    pool.join(timeout=stall_timeout)
+    for client in clients.values():
+        client.close()
+    pool.shutdown()
+    pool_stats = pool.stats()
+
+    latencies = sorted(server.latencies)
+    return {
+        "bots": num_bots,
+        "tables": num_tables,
+        "duration": elapsed,
+        "decisions": len(latencies),
+        # The bots sent a fallback action instead (see HanabiClient._request_decision).
+        "failed_decisions": pool_stats["failed"] + pool_stats["rejected"],
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": latencies[-1] if latencies else None,
+        "games_finished": finished,
+        "games_stalled": stalled,
+        "games_per_minute": finished / elapsed * 60,
+        "average_score": sum(scores) / len(scores) if scores else None,
+        "invalid_actions": server.warnings,
+        "cpu_percent": (cpu_end - cpu_start) / elapsed * 100,
+        "peak_rss_mib": peak_rss,
+    }
+
+
+def print_report(report):
+    def ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+    print(
+        f"{report['bots']} bots on {report['tables']} tables "
+        f"for {report['duration']:.1f} s: {report['decisions']} decisions "
+        f"({report['failed_decisions']} failed)"
+    )
+    print(
+        f"latency      p50 {ms(report['latency_p50'])}, p95 {ms(report['latency_p95'])}, "
+        f"p99 {ms(report['latency_p99'])}, max {ms(report['latency_max'])}"
+    )
+    print(
+        f"games        {report['games_finished']} finished, "
+        f"{report['games_stalled']} stalled, "
+        f"{report['games_per_minute']:.1f} per minute"
+    )
+    print(f"invalid      {report['invalid_actions']} actions")
+    rss = report["peak_rss_mib"]
+    print(
+        f"process      CPU {report['cpu_percent']:.0f}%, "
+        f"peak RSS {'-' if rss is None else f'{rss:.1f} MiB'}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bots", type=int, default=4)
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--players", type=int, default=2, help="players per table")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="decision workers")
+    parser.add_argument(
+        "--stall-timeout", type=float, default=DEFAULT_STALL_TIMEOUT, help="seconds"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    # The bots' own warnings would drown the report.
+    logging.basicConfig(level=logging.ERROR)
+    report = run_load_test(
+        num_bots=args.bots,
+        num_tables=args.tables,
+        duration=args.duration,
+        players_per_table=args.players,
+        seed=args.seed,
+        stall_timeout=args.stall_timeout,
+        max_workers=args.workers,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,41 @@
 """The main module for the Hanabi bot."""
 
 # Imports (standard library)
+import logging
 import os
 import sys
 import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
 # Imports (3rd-party)
 # The "dotenv" module does not work in Python 2
 import dotenv
 import requests
 
 # Imports (local application)
+from src.checkpoint import GameStore
+from src.cookie_cache import CookieCache
+from src.decision_pool import DecisionPool
 from src.hanabi_client import HanabiClient
-from src.utils import printf
+from src.log import parse_module_levels, setup_logging
+from src.metrics import start_metrics_server
 
 LOGIN_PATH = "/login"
 WS_PATH = "/ws"
 PUBLIC_WEBSITE = "hanab.live"
+COOKIE_CACHE_FILE = ".cookies.json"
+CHECKPOINT_DIR = ".checkpoints"
+# The maximum amount of logins at the same time.
+MAX_CONCURRENT_LOGINS = 8
+
+logger = logging.getLogger("main")
 
 
-def _get_cookies_by_password(url, username, password):
-    printf('Authenticating to "' + url + '" with a username of "' + username + '".')
-    resp = requests.post(
+def _get_cookies_by_password(url, username, password, session=None):
+    logger.info('Authenticating to "%s" with a username of "%s".', url, username)
+    resp = (session if session is not None else requests).post(
         url,
         {
             "username": username,
@@ -37,8 +50,7 @@ def _get_cookies_by_password(url, username, password):
 
     # Handle failed authentication and other errors.
     if resp.status_code != 200:
-        printf("Authentication failed:")
-        printf(resp.text)
+        logger.error("Authentication failed: %s", resp.text)
         sys.exit(1)
 
     # Scrape the cookie from the response.
@@ -48,21 +60,93 @@ def _get_cookies_by_password(url, username, password):
             cookie = header[1]
             break
     if cookie == "":
-        printf("Failed to parse the cookie from the authentication response headers:")
-        printf(resp.headers)
+        logger.error(
+            "Failed to parse the cookie from the authentication response headers: %s",
+            resp.headers,
+        )
         sys.exit(1)
 
     return cookie
 
 
+def _get_all_cookies(url, accounts, cookie_cache=None):
+    """Log in all (username, password) accounts concurrently over one pooled session.
+
+    Valid cookies from the cache are reused and new ones are saved into it.
+    Returns the cookies in the same order as the accounts. If a login fails, the
+    cookies of the others are still cached before its error is raised.
+    """
+    cookies = [None] * len(accounts)
+    if cookie_cache is not None:
+        for i, (username, _) in enumerate(accounts):
+            cookies[i] = cookie_cache.get(url, username)
+            if cookies[i] is not None:
+                logger.info('Reusing the cached cookie of "%s".', username)
+
+    pending = [i for i, cookie in enumerate(cookies) if cookie is None]
+    if len(pending) == 0:
+        return cookies
+
+    num_workers = min(MAX_CONCURRENT_LOGINS, len(pending))
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=num_workers
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                i: executor.submit(
+                    _get_cookies_by_password, url, *accounts[i], session=session
+                )
+                for i in pending
+            }
+            errors = []
+            for i, future in futures.items():
+                try:
+                    cookies[i] = future.result()
+                # A failed authentication exits (see _get_cookies_by_password).
+                except (Exception, SystemExit) as e:
+                    logger.error('Could not log in as "%s": %r', accounts[i][0], e)
+                    errors.append(e)
+                    continue
+                if cookie_cache is not None:
+                    cookie_cache.put(url, accounts[i][0], cookies[i])
+    if errors:
+        raise errors[0]
+    return cookies
+
+
+def _run_client(url, ws_url, account, cookie, cookie_cache=None, **kwargs):
+    """Run a HanabiClient until it stops.
+
+    If the first connection fails (e.g. the server refuses a cached cookie which it
+    already expired), forget the cookie, log in again and retry once.
+    """
+    client = HanabiClient(ws_url, cookie, **kwargs)
+    if client.ever_connected or client.stopping:
+        return
+
+    username, password = account
+    logger.warning('Could not connect as "%s"; logging in again.', username)
+    if cookie_cache is not None:
+        cookie_cache.invalidate(url, username)
+    cookie = _get_cookies_by_password(url, username, password)
+    if cookie_cache is not None:
+        cookie_cache.put(url, username, cookie)
+    HanabiClient(ws_url, cookie, **kwargs)
+
+
 def main():
     """Authenticate, login to the WebSocket server, and run forever."""
 
+    setup_logging()
+
     # Check to see if the ".env" file exists.
     env_path = os.path.join(os.path.realpath(os.path.dirname(__file__)), ".env")
     if not os.path.exists(env_path):
-        printf(
-            'error: the ".env" file does not exist;'
+        logger.error(
+            'the ".env" file does not exist;'
             'copy the ".env_template" file to ".env" and '
             "edit the values accordingly"
         )
@@ -70,11 +154,20 @@ def main():
 
     # Load environment variables from the ".env" file.
     dotenv.load_dotenv()
+    setup_logging(
+        level=os.getenv("LOG_LEVEL") or "INFO",
+        module_levels=parse_module_levels(os.getenv("LOG_MODULE_LEVELS")),
+        debug_sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE_RATE") or 1),
+    )
+
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
 
     username = os.getenv("HANABI_USERNAME")
     password = os.getenv("HANABI_PASSWORD")
     if username == "" or password == "":
-        printf('error: username and/or password is missing the ".env" file')
+        logger.error('username and/or password is missing the ".env" file')
         sys.exit(1)
 
     local_url = os.getenv("LOCAL_URL")
@@ -97,8 +190,8 @@ def main():
         ws_protocol = "ws"
         host = local_url + ":" + local_port
     elif use_localhost not in ["false", ""]:
-        printf(
-            'error: "USE_LOCALHOST" should be set to either "true" or "false" '
+        logger.error(
+            '"USE_LOCALHOST" should be set to either "true" or "false" '
             'or leave as empty in the ".env" file'
         )
         sys.exit(1)
@@ -106,32 +199,68 @@ def main():
     url = protocol + "://" + host + LOGIN_PATH
     ws_url = ws_protocol + "://" + host + WS_PATH
 
+    cookie_cache = None
+    if os.getenv("COOKIE_CACHE") != "false":
+        cookie_cache = CookieCache(
+            os.path.join(os.path.realpath(os.path.dirname(__file__)), COOKIE_CACHE_FILE)
+        )
+
+    def game_store(account):
+        # The games in progress survive a restart, unless turned off.
+        if os.getenv("CHECKPOINTS") == "false":
+            return None
+        return GameStore(
+            os.path.join(
+                os.path.realpath(os.path.dirname(__file__)), CHECKPOINT_DIR, account
+            )
+        )
+
+    def review_dir(account):
+        # The finished games are saved for a post-game review, if asked.
+        directory = os.getenv("REVIEW_DIR")
+        if not directory:
+            return None
+        return os.path.join(directory, account)
+
     if host == PUBLIC_WEBSITE or len(sys.argv) == 1:
-        cookie = _get_cookies_by_password(url, username, password)
+        [cookie] = _get_all_cookies(url, [(username, password)], cookie_cache)
 
         # Start!
-        HanabiClient(ws_url, cookie)
+        _run_client(
+            url,
+            ws_url,
+            (username, password),
+            cookie,
+            cookie_cache,
+            game_store=game_store(username),
+            review_dir=review_dir(username),
+        )
         return
 
     # Otherwise, multi-threads.
+    accounts = []
     for arg in sys.argv:
         if arg.endswith("main.py"):
-            threading.Thread(
-                daemon=True,
-                target=HanabiClient,
-                args=(
-                    ws_url,
-                    _get_cookies_by_password(url, username, password),
-                    username,
-                ),
-            ).start()
+            accounts.append((username, password))
         else:
             # Assume using the same string for a robot's password and username.
-            threading.Thread(
-                daemon=True,
-                target=HanabiClient,
-                args=(ws_url, _get_cookies_by_password(url, arg, arg), arg),
-            ).start()
+            accounts.append((arg, arg))
+    cookies = _get_all_cookies(url, accounts, cookie_cache)
+
+    # All robots share one pool of decision workers.
+    decision_pool = DecisionPool()
+    for account, cookie in zip(accounts, cookies):
+        threading.Thread(
+            daemon=True,
+            target=_run_client,
+            args=(url, ws_url, account, cookie, cookie_cache),
+            kwargs={
+                "username": account[0],
+                "decision_pool": decision_pool,
+                "game_store": game_store(account[0]),
+                "review_dir": review_dir(account[0]),
+            },
+        ).start()
     while True:
         # Wait for keyboardIntereption
         time.sleep(5)
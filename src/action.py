@@ -1,9 +1,16 @@
 """The metadata for one action."""
 
+import copy
+
 from dataclasses import dataclass
+from typing import Optional
 
 from src.card import Card
 from src.clue import Clue
+from src.constants import ACTION
+
+# The action types from the server which change the game.
+SERVER_ACTION_TYPES = ("clue", "play", "draw", "discard")
 
 
 @dataclass
@@ -23,3 +30,80 @@ class Action:
 
     """The evaluation of this action."""
     score: int = 0
+    # The SearchStats of the decision which chose this action, if any.
+    stats: object = None
+
+    def __deepcopy__(self, memo):
+        return Action(
+            action_type=self.action_type,
+            player_index=self.player_index,
+            card=copy.deepcopy(self.card, memo),
+            clue=copy.deepcopy(self.clue, memo),
+            boom=self.boom,
+            score=self.score,
+            # The stats describe a past search; copies share them.
+            stats=self.stats,
+        )
+
+
+def parse_server_action(data) -> Optional[Action]:
+    """Convert an action from the server (e.g. in "gameAction") into an Action.
+
+    Returns None for the action types which do not change the game, e.g. "status".
+    """
+    if data["type"] == "clue":
+        clue_hint_type = ACTION.COLOR_CLUE.value
+        if data["clue"]["type"] % ACTION.COLOR_CLUE.value != 0:
+            clue_hint_type = ACTION.RANK_CLUE.value
+
+        return Action(
+            action_type=clue_hint_type,
+            player_index=data["giver"],
+            clue=Clue(
+                hint_type=clue_hint_type,
+                hint_value=data["clue"]["value"],
+                giver_index=data["giver"],
+                receiver_index=data["target"],
+                turn=data["turn"],
+                touched_orders=data["list"],
+            ),
+        )
+
+    action_type = None
+    boom = False
+    if data["type"] == "play":
+        action_type = ACTION.PLAY.value
+    elif data["type"] == "draw":
+        action_type = ACTION.DRAW.value
+    elif data["type"] == "discard":
+        if not data["failed"]:
+            action_type = ACTION.DISCARD.value
+        else:
+            boom = True
+            action_type = ACTION.PLAY.value
+    else:
+        return None
+
+    return Action(
+        action_type=action_type,
+        boom=boom,
+        player_index=data["playerIndex"],
+        # A temporary Card object to pass information.
+        # The actual card object will be retrieved from the game snapshot's player_hands.
+        card=Card(order=data["order"], suit_index=data["suitIndex"], rank=data["rank"]),
+    )
+
+
+def client_action_payload(action: Action) -> dict:
+    """Convert an Action of ours into the fields of the "action" command to the server."""
+    if action.action_type in (ACTION.PLAY.value, ACTION.DISCARD.value):
+        return {"type": action.action_type, "target": action.card.order}
+
+    clue_type = ACTION.RANK_CLUE.value
+    if action.clue.hint_type == ACTION.COLOR_CLUE.value:
+        clue_type = ACTION.COLOR_CLUE.value
+    return {
+        "type": clue_type,
+        "target": action.clue.receiver_index,
+        "value": action.clue.hint_value,
+    }
@@ -0,0 +1,248 @@
+"""Crash-safe storage of the games in progress: checkpoints plus an action journal.
+
+Every table has two files in the store directory:
+- "<table>.ckpt": the latest checkpoint, i.e. the sequence number of the last action
+  it includes and the Game in the binary encoding of src/serialization.py. It is
+  written to a temporary file and renamed over the old one, so it is never torn.
+- "<table>.journal": the server actions since the checkpoint, one JSON line each with
+  its sequence number, appended as they come. A torn last line is ignored.
+
+Loading a table decodes its checkpoint and replays the newer journal entries, so the
+private inferences of the game (card statuses, clue classifications) survive a restart.
+
+Only the encoding happens on the calling (WebSocket) thread: the files are written by
+one background thread, in the order of the calls, so a slow disk does not hold up the
+games.
+"""
+
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+
+from src.action import parse_server_action
+from src.game import Game
+from src.serialization import decode_game, encode_game
+
+logger = logging.getLogger(__name__)
+
+# Write a new checkpoint (and start a new journal) after this many journaled actions.
+DEFAULT_CHECKPOINT_INTERVAL = 20
+
+CHECKPOINT_SUFFIX = ".ckpt"
+JOURNAL_SUFFIX = ".journal"
+_CHECKPOINT_MAGIC = b"HCKP"
+_CHECKPOINT_VERSION = 1
+_CHECKPOINT_HEADER = struct.Struct("<4sBQ")
+
+
+class GameStore:
+    """The checkpoints and journals of the games of one bot account."""
+
+    def __init__(
+        self, directory, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, fsync=True
+    ):
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        # Whether to flush the checkpoints to the disk (not only to the OS) before use.
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # Per table: the sequence number of the last action, and of the checkpoint.
+        self._sequence = {}
+        self._checkpointed = {}
+        # The writes for the background thread, which alone owns the open journals.
+        self._writes = queue.Queue()
+        self._writer = None
+        self._journals = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table_id, suffix) -> str:
+        return os.path.join(self.directory, f"{table_id}{suffix}")
+
+    def checkpoint(self, table_id, game: Game):
+        """Save the whole game atomically and start a new, empty journal."""
+        data = encode_game(game)
+        with self._lock:
+            sequence = self._sequence.get(table_id, 0)
+            self._sequence[table_id] = sequence
+            self._checkpointed[table_id] = sequence
+        self._submit(self._write_checkpoint, table_id, sequence, data)
+
+    def record_action(self, table_id, game: Game, data: dict):
+        """Journal a server action which was just applied to the game.
+
+        Every "checkpoint_interval" actions, the game is checkpointed instead.
+        """
+        with self._lock:
+            sequence = self._sequence.get(table_id, 0) + 1
+            self._sequence[table_id] = sequence
+            since = sequence - self._checkpointed.get(table_id, 0)
+        if since < self.checkpoint_interval:
+            line = json.dumps({"seq": sequence, "action": data}) + "\n"
+            self._submit(self._append_journal, table_id, line)
+            return
+        self.checkpoint(table_id, game)
+
+    # Writes (on the background thread).
+
+    def _submit(self, write, *args):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._run, name="checkpoint-writer", daemon=True
+                )
+                self._writer.start()
+        self._writes.put((write, args))
+
+    def _run(self):
+        while True:
+            write, args = self._writes.get()
+            try:
+                write(*args)
+            except Exception as e:
+                logger.error("could not write the checkpoint store: %s", e)
+            finally:
+                self._writes.task_done()
+
+    def _write_checkpoint(self, table_id, sequence, data):
+        path = self._path(table_id, CHECKPOINT_SUFFIX)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _CHECKPOINT_HEADER.pack(_CHECKPOINT_MAGIC, _CHECKPOINT_VERSION, sequence)
+            )
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # The journal entries are all in the checkpoint now. (If we crash before
+        # truncating, loading skips them by their sequence numbers.)
+        self._close_journal(table_id)
+        self._journals[table_id] = open(
+            self._path(table_id, JOURNAL_SUFFIX), "w", encoding="utf-8"
+        )
+
+    def _append_journal(self, table_id, line):
+        journal = self._journals.get(table_id)
+        if journal is None:
+            journal = self._journals[table_id] = open(
+                self._path(table_id, JOURNAL_SUFFIX), "a", encoding="utf-8"
+            )
+        journal.write(line)
+        journal.flush()
+
+    def _close_journal(self, table_id):
+        journal = self._journals.pop(table_id, None)
+        if journal is not None:
+            journal.close()
+
+    def _remove_files(self, table_id):
+        self._close_journal(table_id)
+        for suffix in (CHECKPOINT_SUFFIX, JOURNAL_SUFFIX):
+            try:
+                os.remove(self._path(table_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _close_journals(self):
+        for table_id in list(self._journals):
+            self._close_journal(table_id)
+
+    def flush(self):
+        """Wait until all the writes so far are on disk (or failed)."""
+        self._writes.join()
+
+    def load(self, table_id) -> Game:
+        """The game of a table as last saved; None if there is none or it is corrupt."""
+        self.flush()
+        try:
+            with open(self._path(table_id, CHECKPOINT_SUFFIX), "rb") as f:
+                data = f.read()
+            magic, version, sequence = _CHECKPOINT_HEADER.unpack_from(data)
+            if magic != _CHECKPOINT_MAGIC or version != _CHECKPOINT_VERSION:
+                raise ValueError(f"unknown checkpoint format {magic!r} {version}")
+            game = decode_game(data[_CHECKPOINT_HEADER.size :])
+        except FileNotFoundError:
+            return None
+        except (
+            OSError,
+            ValueError,
+            struct.error,
+            StopIteration,
+            IndexError,
+            KeyError,
+        ) as e:
+            logger.warning(
+                "ignoring the corrupt checkpoint of table %s: %s", table_id, e
+            )
+            return None
+
+        checkpointed = sequence
+        try:
+            for entry in self._read_journal(table_id):
+                if entry["seq"] <= sequence:
+                    continue
+                action = parse_server_action(entry["action"])
+                if action is not None:
+                    game.handle_action(action)
+                sequence = entry["seq"]
+        except Exception as e:
+            # The game would be out of step with the server; better none at all.
+            logger.warning("ignoring the corrupt journal of table %s: %s", table_id, e)
+            return None
+        with self._lock:
+            self._sequence[table_id] = sequence
+            self._checkpointed[table_id] = checkpointed
+        return game
+
+    def _read_journal(self, table_id):
+        try:
+            with open(self._path(table_id, JOURNAL_SUFFIX), encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        # Torn by a crash in the middle of a write.
+                        break
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            return
+
+    def load_all(self) -> dict:
+        """The games of all saved tables, keyed by table ID.
+
+        The tables which cannot be restored are removed from the store.
+        """
+        games = {}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(CHECKPOINT_SUFFIX):
+                continue
+            stem = name[: -len(CHECKPOINT_SUFFIX)]
+            table_id = int(stem) if stem.isdigit() else stem
+            try:
+                game = self.load(table_id)
+            except Exception as e:
+                logger.warning("cannot restore the game of table %s: %s", table_id, e)
+                game = None
+            if game is None:
+                self.remove(table_id)
+                continue
+            games[table_id] = game
+        return games
+
+    def remove(self, table_id):
+        """Forget a table, e.g. when its game is over."""
+        with self._lock:
+            self._sequence.pop(table_id, None)
+            self._checkpointed.pop(table_id, None)
+        self._submit(self._remove_files, table_id)
+
+    def close(self):
+        """Finish the pending writes and close the journals."""
+        self._submit(self._close_journals)
+        self.flush()
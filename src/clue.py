@@ -25,3 +25,14 @@ class Clue:
 
     # touched cards orders (i.e., No.)
     touched_orders: list = field(default_factory=list)
+
+    def __deepcopy__(self, memo):
+        return Clue(
+            hint_type=self.hint_type,
+            hint_value=self.hint_value,
+            giver_index=self.giver_index,
+            receiver_index=self.receiver_index,
+            turn=self.turn,
+            classification=self.classification,
+            touched_orders=list(self.touched_orders),
+        )
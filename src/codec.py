@@ -0,0 +1,84 @@
+"""Encoding and decoding of WebSocket messages.
+
+WebSocket messages come in the format of:
+commandName {"fieldName":"value"}
+
+A faster JSON library (orjson) is used when it is installed; otherwise, it falls
+back to the standard library.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# The name of the JSON backend in use.
+BACKEND = "orjson" if orjson is not None else "json"
+
+# For high-volume commands, only keep the fields that the handlers need.
+# Everything else is dropped right after parsing, so it is never stored or copied.
+TABLE_FIELDS = ("id", "name", "running", "players", "numPlayers", "sharedReplay")
+GAME_ACTION_FIELDS = ("tableID", "action")
+
+
+def loads(text):
+    """Parse a JSON text (str or bytes)."""
+    if orjson is not None:
+        return orjson.loads(text)  # pylint: disable=no-member
+    return json.loads(text)
+
+
+def dumps(obj) -> str:
+    """Serialize an object to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")  # pylint: disable=no-member
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _project(data, fields):
+    if not isinstance(data, dict):
+        return data
+    return {key: data[key] for key in fields if key in data}
+
+
+def _project_table_list(data):
+    if not isinstance(data, list):
+        return data
+    return [_project(table, TABLE_FIELDS) for table in data]
+
+
+# The projections per command.
+PROJECTIONS = {
+    "table": lambda data: _project(data, TABLE_FIELDS),
+    "tableList": _project_table_list,
+    "gameAction": lambda data: _project(data, GAME_ACTION_FIELDS),
+}
+
+
+def split_message(message):
+    """Split a WebSocket message into its command and the (still encoded) payload."""
+    result = message.split(" ", 1)
+    if len(result) == 1:
+        return result[0], ""
+    return result[0], result[1]
+
+
+def decode_payload(command, payload):
+    """Decode the payload of a command, keeping only the fields its handler needs.
+
+    Raises ValueError when the payload is not valid JSON.
+    """
+    if payload == "":
+        return {}
+    data = loads(payload)
+    projection = PROJECTIONS.get(command)
+    if projection is not None:
+        data = projection(data)
+    return data
+
+
+def encode_message(command, data) -> str:
+    """Encode a command and its data into a WebSocket message."""
+    return command + " " + dumps(data)
@@ -3,6 +3,8 @@
 import json
 import jsonpickle
 import random
+import time
+from dataclasses import dataclass, field
 from typing import List, Optional
 import re
 
@@ -12,6 +14,50 @@ from src.constants import ACTION, Status
 from src.utils import dump
 
 
+@dataclass
+class SearchStats:
+    """What the search of one decision did; filled in by evaluate() if given.
+
+    Phase times are in seconds and exclusive of each other (a phase does not
+    contain another one), so they add up to at most the elapsed time.
+    """
+
+    # The search level the decision started with.
+    search_level: int = 0
+    # Snapshots expanded (next_snapshot calls) and the deepest level reached.
+    nodes: int = 0
+    max_depth: int = 0
+    # Valid actions generated, and those rejected by check_convention.
+    actions_generated: int = 0
+    actions_filtered: int = 0
+    # Branches scored early: a wrong annotation, or no action left to take.
+    cutoffs: int = 0
+    phase_times: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add_time(self, phase: str, started: float) -> float:
+        """Add the time since "started" to a phase; returns now."""
+        now = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + now - started
+        return now
+
+    def summary(self) -> str:
+        phases = ", ".join(
+            f"{phase} {seconds * 1000:.1f} ms"
+            for phase, seconds in sorted(self.phase_times.items())
+        )
+        return (
+            f"{self.nodes} nodes to depth {self.max_depth}/{self.search_level} "
+            f"in {self.elapsed * 1000:.1f} ms ({self.nodes_per_second:.0f}/s), "
+            f"{self.actions_filtered}/{self.actions_generated} actions filtered, "
+            f"{self.cutoffs} cutoffs; {phases}"
+        )
+
+
 def check_convention(snapshot: Snapshot, action: Action, viewer_index: int) -> bool:
     player_index = action.player_index
     if viewer_index is None:
@@ -68,23 +114,40 @@ def check_convention(snapshot: Snapshot, action: Action, viewer_index: int) -> b
 
 
 def evaluate(
-    snapshot: Snapshot, viewer_index, player_index, remaining_search_level: int = 1
+    snapshot: Snapshot,
+    viewer_index,
+    player_index,
+    remaining_search_level: int = 1,
+    stats: Optional[SearchStats] = None,
 ) -> List[Action]:
-    """Given a snapshot, return a sorted list of actions."""
+    """Given a snapshot, return a sorted list of actions.
+
+    With "stats", the work of the search is counted into it.
+    """
+    if stats is not None:
+        started = time.perf_counter()
     game_valid_actions: List[Action] = snapshot.get_valid_actions(
         viewer_index=viewer_index, player_index=player_index
     )
+    if stats is not None:
+        started = stats.add_time("valid_actions", started)
     normal_applicable_actions: List[Action] = [
         action
         for action in game_valid_actions
         if check_convention(snapshot, action, viewer_index)
     ]
+    if stats is not None:
+        stats.add_time("check_convention", started)
+        stats.actions_generated += len(game_valid_actions)
+        stats.actions_filtered += len(game_valid_actions) - len(
+            normal_applicable_actions
+        )
     if len(normal_applicable_actions) < 1:
         return normal_applicable_actions
 
     for action in normal_applicable_actions:
         action.score = evaluate_action(
-            snapshot, action, viewer_index, remaining_search_level
+            snapshot, action, viewer_index, remaining_search_level, stats
         )
 
     return sorted(
@@ -97,6 +160,7 @@ def evaluate_action(
     action: Action,
     viewer_index: int,
     remaining_search_level: int = 1,
+    stats: Optional[SearchStats] = None,
 ):
     """This function will do a limited layer of search to determine the score of one action, based
     on a viewer's perspective at a specific snapshot.
@@ -114,16 +178,30 @@ def evaluate_action(
         return 0
 
     remaining_search_level -= 1
+    if stats is not None:
+        started = time.perf_counter()
     next_snapshot = snapshot.next_snapshot(action, viewer_index)
+    if stats is not None:
+        started = stats.add_time("next_snapshot", started)
+        stats.nodes += 1
+        stats.max_depth = max(
+            stats.max_depth, stats.search_level - remaining_search_level
+        )
 
     # Check annotation validation. Basically, will we give a wrong information in the next snapshot?
 
-    for player in range(next_snapshot.num_players):
-        for card in next_snapshot.hands[player]:
-            status = card.status
-            if status == Status.USEFUL and not snapshot.is_useful(card):
-                # Wrong annotation and then the score should be negative.
-                return -1
+    wrong_annotation = any(
+        card.status == Status.USEFUL and not snapshot.is_useful(card)
+        for player in range(next_snapshot.num_players)
+        for card in next_snapshot.hands[player]
+    )
+    if stats is not None:
+        stats.add_time("annotation_check", started)
+    if wrong_annotation:
+        # Wrong annotation and then the score should be negative.
+        if stats is not None:
+            stats.cutoffs += 1
+        return -1
 
     next_player_index = (action.player_index + 1) % snapshot.num_players
     sorted_actions = evaluate(
@@ -131,9 +209,12 @@ def evaluate_action(
         viewer_index=viewer_index,
         player_index=next_player_index,
         remaining_search_level=remaining_search_level,
+        stats=stats,
     )
     if len(sorted_actions) < 1:
         # Nothing can be done. Then the score is negative.
+        if stats is not None:
+            stats.cutoffs += 1
         return -1
     # Use the cumulative score as the parent score.
     return sum(action.score for action in sorted_actions)
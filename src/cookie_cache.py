@@ -0,0 +1,91 @@
+"""An on-disk cache of session cookies, so that a restart skips re-authentication."""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+from http.cookies import CookieError, SimpleCookie
+
+logger = logging.getLogger(__name__)
+
+# When the server does not tell, assume a session cookie is valid for this long (seconds).
+DEFAULT_COOKIE_TTL = 60 * 60
+# Cookies which expire within this margin (seconds) are not reused.
+EXPIRY_MARGIN = 60
+
+
+def cookie_expiry(set_cookie: str, now=None) -> float:
+    """The expiry time (epoch seconds) of a "Set-Cookie" header value."""
+    if now is None:
+        now = time.time()
+    try:
+        cookie = SimpleCookie()
+        cookie.load(set_cookie)
+    except CookieError:
+        return now + DEFAULT_COOKIE_TTL
+    for morsel in cookie.values():
+        if morsel["max-age"]:
+            try:
+                return now + int(morsel["max-age"])
+            except ValueError:
+                pass
+        if morsel["expires"]:
+            try:
+                return parsedate_to_datetime(morsel["expires"]).timestamp()
+            except (TypeError, ValueError):
+                pass
+    return now + DEFAULT_COOKIE_TTL
+
+
+class CookieCache:
+    """Session cookies per login URL and username, stored in a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning('ignoring the unreadable cookie cache "%s": %s', path, e)
+
+    @staticmethod
+    def _key(url, username):
+        return url + " " + username
+
+    def get(self, url, username):
+        """The cached cookie, or None if there is none or it (almost) expired."""
+        with self._lock:
+            entry = self._entries.get(self._key(url, username))
+        if entry is None or entry["expires"] - EXPIRY_MARGIN < time.time():
+            return None
+        return entry["cookie"]
+
+    def put(self, url, username, cookie):
+        """Cache a cookie from a "Set-Cookie" header and save the cache to disk."""
+        with self._lock:
+            self._entries[self._key(url, username)] = {
+                "cookie": cookie,
+                "expires": cookie_expiry(cookie),
+            }
+            self._save()
+
+    def invalidate(self, url, username):
+        """Forget a cookie, e.g. when the server refused it."""
+        with self._lock:
+            if self._entries.pop(self._key(url, username), None) is not None:
+                self._save()
+
+    def _save(self):
+        # Write atomically, and only readable by the owner: these are credentials.
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.path)
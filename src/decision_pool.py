@@ -0,0 +1,134 @@
+"""A bounded worker pool to make decisions off the WebSocket thread."""
+
+import logging
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# The default amount of decisions computed at the same time.
+DEFAULT_MAX_WORKERS = 4
+# The default amount of decisions waiting for a worker before rejecting new ones.
+DEFAULT_MAX_QUEUED = 64
+# The amount of recent wait and run times kept for statistics.
+TIMING_WINDOW = 100
+
+
+class DecisionPool:
+    """Run decisions on a bounded pool of workers, at most one per table at a time.
+
+    Submitting a decision for a table which already has one in flight joins it
+    instead of starting another (single-flight), so a duplicate "/please" is free.
+    """
+
+    def __init__(
+        self, max_workers=DEFAULT_MAX_WORKERS, max_queued=DEFAULT_MAX_QUEUED
+    ):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="decision"
+        )
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._queued = 0
+        self._running = 0
+
+        # Statistics.
+        self.submitted = 0
+        self.joined = 0
+        self.rejected = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=TIMING_WINDOW)
+        self.run_times = deque(maxlen=TIMING_WINDOW)
+
+    def submit(self, key, fn, *args, on_done=None) -> Future:
+        """Submit a decision for a key (e.g. a table ID).
+
+        Returns the future of the in-flight decision for the same key if there is one.
+        When the queue is full, the returned future fails with a RuntimeError.
+        "on_done(future)" is called once the decision is over, only for a new one (not
+        when joining), so that it runs once per decision.
+        """
+        with self._lock:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.joined += 1
+                return inflight
+
+            if self._queued >= self.max_queued:
+                self.rejected += 1
+                future = Future()
+                future.set_exception(
+                    RuntimeError(f"Decision queue is full ({self._queued} queued).")
+                )
+            else:
+                self.submitted += 1
+                self._queued += 1
+                future = self._executor.submit(
+                    self._run, key, time.monotonic(), fn, args
+                )
+                self._inflight[key] = future
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        return future
+
+    def _run(self, key, submitted_at, fn, args):
+        started_at = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self.wait_times.append(started_at - submitted_at)
+        try:
+            return fn(*args)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.exception("decision for %s failed: %s", key, e)
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.run_times.append(time.monotonic() - started_at)
+                del self._inflight[key]
+
+    def is_inflight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
+
+    def queue_depth(self) -> int:
+        """The amount of decisions waiting for a worker."""
+        return self._queued
+
+    def join(self, timeout=None):
+        """Wait for all in-flight decisions to finish."""
+        with self._lock:
+            futures = list(self._inflight.values())
+        for future in futures:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        """A snapshot of the pool statistics. Times are in seconds."""
+        with self._lock:
+            wait_times = list(self.wait_times)
+            run_times = list(self.run_times)
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "submitted": self.submitted,
+                "joined": self.joined,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "avg_wait": sum(wait_times) / len(wait_times) if wait_times else 0,
+                "max_wait": max(wait_times, default=0),
+                "avg_run": sum(run_times) / len(run_times) if run_times else 0,
+                "max_run": max(run_times, default=0),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
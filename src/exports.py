@@ -0,0 +1,280 @@
+"""Streaming ingestion of hanab.live game exports, e.g. to learn from human games.
+
+An export (as from https://hanab.live/export/<database ID>) is a JSON object with the
+player names, the whole deck and the compact action list:
+
+    {"id": 1124590, "players": ["Alice", "Bob"], "options": {"variant": "No Variant"},
+     "deck": [{"suitIndex": 0, "rank": 1}, ...],
+     "actions": [{"type": 0, "target": 5, "value": 0}, ...]}
+
+A file holds one export, a JSON array of them, or one per line (".jsonl"), optionally
+gzipped. The games are read one at a time and their actions are produced one turn at a
+time by a Referee, so the memory does not grow with the size of the file. The files
+are independent, so they are ingested in parallel across processes.
+
+Usage: python -m src.exports FILE [FILE ...] [--seat N] [--processes K] [--json]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import time
+
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator, Optional
+
+from src import codec
+from src.action import Action, parse_server_action
+from src.game import Game
+from src.referee import Referee, seat_view
+from src.simulator import new_seat
+
+logger = logging.getLogger(__name__)
+
+# The variants whose rules the Referee knows, with their amount of suits.
+VARIANT_SUITS = {
+    "No Variant": 5,
+    "Black (6 Suits)": 6,
+    "4 Suits": 4,
+    "3 Suits": 3,
+}
+# The action types of an export; the others are those of ACTION.
+EXPORT_GAME_OVER = 4
+# How much of a file is read at once (characters).
+READ_CHUNK_SIZE = 1 << 16
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _iter_json_values(f, chunk_size=READ_CHUNK_SIZE) -> Iterator:
+    """The JSON values of a text stream: one value, the items of a top-level array,
+    or values one after another. Only one value is held at a time.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    in_array = False
+    started = False
+    while True:
+        # Skip the separators; refill when the buffer runs out.
+        while pos < len(buffer) and (
+            buffer[pos].isspace() or (in_array and buffer[pos] == ",")
+        ):
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+            continue
+        if not started:
+            started = True
+            if buffer[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+        if in_array and buffer[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Invalid JSON: {e}") from e
+            # The value goes on in the next chunk.
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield value
+        pos = end
+
+
+def iter_exports(path, chunk_size=READ_CHUNK_SIZE) -> Iterator[dict]:
+    """The game exports of a file, one at a time."""
+    with _open(path) as f:
+        if path.endswith((".jsonl", ".jsonl.gz")):
+            for line in f:
+                if line.strip():
+                    yield codec.loads(line)
+            return
+        yield from _iter_json_values(f, chunk_size)
+
+
+def iter_server_actions(export: dict) -> Iterator[dict]:
+    """The actions of an exported game in the server format, with nothing hidden.
+
+    Raises ValueError if the game cannot be replayed (e.g. an unknown variant).
+    """
+    options = export.get("options") or {}
+    variant = options.get("variant", "No Variant")
+    if variant not in VARIANT_SUITS:
+        raise ValueError(f"Unsupported variant {variant!r}.")
+    for option in ("oneExtraCard", "oneLessCard", "allOrNothing"):
+        if options.get(option):
+            raise ValueError(f"Unsupported option {option!r}.")
+    if options.get("startingPlayer", 0) != 0:
+        raise ValueError("Unsupported starting player.")
+
+    referee = Referee(
+        num_players=len(export["players"]),
+        deck=[(card["suitIndex"], card["rank"]) for card in export["deck"]],
+        num_suits=VARIANT_SUITS[variant],
+    )
+    # The Referee would keep them all; hand them out and forget them as it goes.
+    yield from referee.actions
+    referee.actions.clear()
+    for data in export["actions"]:
+        if data["type"] == EXPORT_GAME_OVER or referee.is_over():
+            return
+        yield from referee.perform(
+            referee.current_player_index,
+            data["type"],
+            data["target"],
+            data.get("value"),
+        )
+        referee.actions.clear()
+
+
+def iter_actions(export: dict, player_index=0) -> Iterator[Action]:
+    """The actions of an exported game as one player saw them (own draws hidden)."""
+    for data in iter_server_actions(export):
+        action = parse_server_action(seat_view(data, player_index))
+        if action is not None:
+            yield action
+
+
+def load_export(export: dict, player_index=0) -> Game:
+    """The Game of one seat after the whole exported game, replayed in bulk."""
+    variant = (export.get("options") or {}).get("variant", "No Variant")
+    game = new_seat(len(export["players"]), player_index, VARIANT_SUITS.get(variant, 5))
+    game.player_names = list(export["players"])
+    game.replay(iter_actions(export, player_index))
+    return game
+
+
+@dataclass
+class IngestResult:
+    """The outcome of ingesting one file. Times are in seconds."""
+
+    path: str
+    games: int = 0
+    actions: int = 0
+    # The exports which could not be replayed; the rest of an unreadable file is one.
+    skipped: int = 0
+    # Why the file could not be read to its end, if it could not (e.g. invalid JSON).
+    error: Optional[str] = None
+    elapsed: float = 0
+    # What the handler returned for each game, unless None.
+    results: list = field(default_factory=list)
+
+
+def ingest_file(
+    path,
+    player_index=0,
+    handler: Callable[[dict, Game], object] = None,
+) -> IngestResult:
+    """Replay every game of a file from one seat; pass each to handler(export, game).
+
+    Keep the handler's results small (or None): they are collected per file.
+    """
+    result = IngestResult(path=path)
+    started = time.perf_counter()
+    for export in _read_exports(path, result):
+        if not 0 <= player_index < len(export.get("players", ())):
+            result.skipped += 1
+            continue
+        try:
+            game = load_export(export, player_index)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("skipping game %s of %s: %s", export.get("id"), path, e)
+            result.skipped += 1
+            continue
+        result.games += 1
+        result.actions += len(game.action_history)
+        if handler is not None:
+            value = handler(export, game)
+            if value is not None:
+                result.results.append(value)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _read_exports(path, result: IngestResult) -> Iterator[dict]:
+    """The exports of a file, up to where it cannot be read any more."""
+    try:
+        yield from iter_exports(path)
+    except (OSError, ValueError) as e:
+        logger.warning("skipping the rest of %s: %s", path, e)
+        result.skipped += 1
+        result.error = str(e)
+
+
+def _init_worker(log_level):
+    logging.basicConfig(level=log_level)
+    logging.getLogger().setLevel(log_level)
+
+
+def _ingest_job(job) -> IngestResult:
+    return ingest_file(*job)
+
+
+def ingest_files(
+    paths, player_index=0, handler=None, processes=None, log_level=logging.ERROR
+) -> Iterator[IngestResult]:
+    """Ingest files on a process pool; yields the results in the order of the paths.
+
+    The handler must be picklable (e.g. a function of a module).
+    """
+    jobs = [(path, player_index, handler) for path in paths]
+    if processes == 1:
+        _init_worker(log_level)
+        yield from map(_ingest_job, jobs)
+        return
+
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(log_level,)
+    ) as pool:
+        yield from pool.imap(_ingest_job, jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--seat", type=int, default=0, help="the view to replay")
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--json", action="store_true", help="one JSON line per file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    games = actions = 0
+    for result in ingest_files(args.files, args.seat, processes=args.processes):
+        games += result.games
+        actions += result.actions
+        if args.json:
+            print(json.dumps(asdict(result)))
+        else:
+            print(
+                f"{result.path}: {result.games} games, {result.actions} actions, "
+                f"{result.skipped} skipped in {result.elapsed:.2f} s"
+                + (f" ({result.error})" if result.error else "")
+            )
+    elapsed = time.perf_counter() - started
+    if not args.json:
+        print(
+            f"{games} games, {actions} actions in {elapsed:.1f} s "
+            f"({games / elapsed if elapsed else 0:.1f} games per second)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""A lightweight in-process stand-in for the hanab.live server.
+
+It speaks the same WebSocket command protocol as the real server, but its
+connections are in-process queues, so that many bots can play many games on one
+machine without any network. Pass `FakeHanabiServer.websocket_app` as the
+"ws_factory" of HanabiClient, and `FakeHanabiServer.login` gives the cookies.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+
+from src.codec import dumps, loads, split_message
+from src.referee import Referee, deal_deck
+
+logger = logging.getLogger(__name__)
+
+# Tell the connection loop to stop.
+_CLOSE = object()
+
+
+class FakeWebSocketApp:
+    """A client connection with the same interface as websocket.WebSocketApp."""
+
+    def __init__(
+        self,
+        server,
+        url,
+        *,
+        on_message=None,
+        on_error=None,
+        on_open=None,
+        on_close=None,
+        cookie=None,
+    ):
+        self.server = server
+        self.url = url
+        self.on_message = on_message
+        self.on_error = on_error
+        self.on_open = on_open
+        self.on_close = on_close
+        self.cookie = cookie
+        self.username = None
+        self.inbox = queue.SimpleQueue()
+        self.closed = False
+
+    def run_forever(self):
+        """Deliver the server messages on this thread until the connection closes."""
+        self.username = self.server.connect(self)
+        if self.username is None:
+            if self.on_close is not None:
+                self.on_close(self, 1008, "unauthorized")
+            return
+        if self.on_open is not None:
+            self.on_open(self)
+        while True:
+            message = self.inbox.get()
+            # Like a socket, nothing still queued is handled once it is closed.
+            if message is _CLOSE or self.closed:
+                break
+            try:
+                self.on_message(self, message)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(self, e)
+        self.server.disconnect(self)
+        if self.on_close is not None:
+            self.on_close(self, 1000, "")
+
+    def send(self, message):
+        if self.closed:
+            raise ConnectionError("The connection is closed.")
+        command, payload = split_message(message)
+        self.server.handle(self, command, loads(payload) if payload else {})
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.inbox.put(_CLOSE)
+
+    def deliver(self, command, data):
+        """Queue a message from the server to this client."""
+        if not self.closed:
+            self.inbox.put(command + " " + dumps(data))
+
+
+class FakeTable:
+    """A table in the lobby, with its game once started."""
+
+    def __init__(self, table_id, name, owner):
+        self.id = table_id
+        self.name = name
+        self.owner = owner
+        self.players = [owner]
+        self.referee = None
+        self.database_id = None
+
+    @property
+    def running(self):
+        return self.referee is not None
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "running": self.running,
+            "players": list(self.players),
+            "numPlayers": len(self.players),
+            "sharedReplay": False,
+        }
+
+
+class FakeHanabiServer:
+    """The lobby and the games of an in-process stand-in server."""
+
+    def __init__(self, seed=0):
+        # The deck of the n-th game is dealt from "seed + n".
+        self.seed = seed
+        self.lock = threading.RLock()
+        self.connections = {}
+        self.tables = {}
+        self._table_ids = itertools.count(1)
+        self._database_ids = itertools.count(1)
+        self._num_games = 0
+
+    # -----
+    # Login
+    # -----
+
+    def login(self, username, _password=None) -> str:
+        """Log in any user (passwords are not checked) and return the session cookie."""
+        return "hanabi.sid=" + username
+
+    def websocket_app(self, url, **kwargs) -> FakeWebSocketApp:
+        """A factory with the same signature as websocket.WebSocketApp."""
+        return FakeWebSocketApp(self, url, **kwargs)
+
+    def connect(self, connection: FakeWebSocketApp):
+        cookie = connection.cookie or ""
+        if not cookie.startswith("hanabi.sid="):
+            return None
+        username = cookie[len("hanabi.sid=") :].split(";", 1)[0]
+        with self.lock:
+            old = self.connections.get(username)
+            if old is not None:
+                old.close()
+            self.connections[username] = connection
+            connection.deliver("welcome", {"username": username})
+            connection.deliver(
+                "tableList", [table.to_json() for table in self.tables.values()]
+            )
+            # Put them back into their ongoing game, like the real server does.
+            for table in self.tables.values():
+                if table.running and username in table.players:
+                    connection.deliver("tableStart", {"tableID": table.id})
+        return username
+
+    def disconnect(self, connection: FakeWebSocketApp):
+        with self.lock:
+            if self.connections.get(connection.username) is connection:
+                del self.connections[connection.username]
+
+    def shutdown(self):
+        with self.lock:
+            for connection in list(self.connections.values()):
+                connection.close()
+
+    # ------------------
+    # Server-side helpers
+    # ------------------
+
+    def create_table(self, owner, name="test game") -> int:
+        with self.lock:
+            table = FakeTable(next(self._table_ids), name, owner)
+            self.tables[table.id] = table
+            self._broadcast("table", table.to_json())
+            return table.id
+
+    def join_table(self, table_id, username):
+        with self.lock:
+            table = self.tables[table_id]
+            if table.running:
+                raise ValueError("The game has already started.")
+            if username not in table.players:
+                table.players.append(username)
+            self._broadcast("table", table.to_json())
+
+    def start_table(self, table_id, seed=None):
+        with self.lock:
+            table = self.tables[table_id]
+            if table.running:
+                raise ValueError("The game has already started.")
+            if seed is None:
+                seed = self.seed + self._num_games
+            self._num_games += 1
+            table.referee = Referee(
+                num_players=len(table.players), deck=deal_deck(seed=seed)
+            )
+            self._broadcast("table", table.to_json())
+            self._send_to_players(table, "tableStart", {"tableID": table.id})
+
+    def terminate_table(self, table_id, username=None):
+        """End an ongoing game early, e.g. on behalf of its first player."""
+        with self.lock:
+            table = self.tables[table_id]
+            if not table.running or table.referee.is_over():
+                return
+            if username is None:
+                username = table.players[0]
+            player_index = table.players.index(username)
+            self._send_actions(table, table.referee.terminate(player_index))
+            self._finish(table)
+
+    # ---------------
+    # Command handlers
+    # ---------------
+
+    def handle(self, connection: FakeWebSocketApp, command, data):
+        handler = getattr(self, "_command_" + command, None)
+        if handler is None:
+            logger.debug('fake server ignores command "%s"', command)
+            return
+        with self.lock:
+            try:
+                handler(connection.username, data)
+            except (KeyError, ValueError) as e:
+                connection.deliver("warning", {"warning": str(e)})
+
+    def _command_tableCreate(self, username, data):  # pylint: disable=invalid-name
+        self.create_table(username, data.get("name", "test game"))
+
+    def _command_tableJoin(self, username, data):  # pylint: disable=invalid-name
+        self.join_table(data["tableID"], username)
+
+    def _command_tableStart(self, username, data):  # pylint: disable=invalid-name
+        if self.tables[data["tableID"]].owner != username:
+            raise ValueError("Only the owner can start the game.")
+        self.start_table(data["tableID"])
+
+    def _command_tableTerminate(self, username, data):  # pylint: disable=invalid-name
+        self.terminate_table(data["tableID"], username)
+
+    def _command_tableUnattend(self, username, data):  # pylint: disable=invalid-name
+        table = self.tables.get(data["tableID"])
+        if table is None:
+            return
+        # Players of an ongoing game stay seated, so that they can come back.
+        if table.running and not table.referee.is_over():
+            return
+        if username in table.players:
+            table.players.remove(username)
+        if len(table.players) == 0:
+            del self.tables[table.id]
+            self._broadcast("tableGone", {"tableID": table.id})
+
+    def _command_getGameInfo1(self, username, data):  # pylint: disable=invalid-name
+        table = self.tables[data["tableID"]]
+        self._deliver(
+            username,
+            "init",
+            {
+                "tableID": table.id,
+                "playerNames": list(table.players),
+                "ourPlayerIndex": table.players.index(username),
+                "options": {
+                    "numPlayers": len(table.players),
+                    "variantName": "No Variant",
+                },
+            },
+        )
+
+    def _command_getGameInfo2(self, username, data):  # pylint: disable=invalid-name
+        table = self.tables[data["tableID"]]
+        player_index = table.players.index(username)
+        referee = table.referee
+        self._deliver(
+            username,
+            "gameActionList",
+            {
+                "tableID": table.id,
+                "list": [referee.view(a, player_index) for a in referee.actions],
+            },
+        )
+
+    def _command_loaded(self, _username, _data):  # pylint: disable=invalid-name
+        pass
+
+    def _command_action(self, username, data):
+        table = self.tables[data["tableID"]]
+        referee = table.referee
+        if referee is None:
+            raise ValueError("The game has not started yet.")
+        actions = referee.perform(
+            table.players.index(username),
+            data["type"],
+            data["target"],
+            data.get("value"),
+        )
+        self._send_actions(table, actions)
+        if referee.is_over():
+            self._finish(table)
+
+    def _command_chatPM(self, username, data):  # pylint: disable=invalid-name
+        self._deliver(
+            data["recipient"],
+            "chat",
+            {
+                "msg": data["msg"],
+                "who": username,
+                "recipient": data["recipient"],
+                "room": data.get("room", "lobby"),
+            },
+        )
+
+    # ---------
+    # Internals
+    # ---------
+
+    def _send_actions(self, table: FakeTable, actions):
+        for player_index, player in enumerate(table.players):
+            for action in actions:
+                self._deliver(
+                    player,
+                    "gameAction",
+                    {
+                        "tableID": table.id,
+                        "action": table.referee.view(action, player_index),
+                    },
+                )
+
+    def _finish(self, table: FakeTable):
+        table.database_id = next(self._database_ids)
+        self._send_to_players(
+            table, "databaseID", {"tableID": table.id, "databaseID": table.database_id}
+        )
+
+    def _deliver(self, username, command, data):
+        connection = self.connections.get(username)
+        if connection is not None:
+            connection.deliver(command, data)
+
+    def _send_to_players(self, table: FakeTable, command, data):
+        for player in table.players:
+            self._deliver(player, command, data)
+
+    def _broadcast(self, command, data):
+        for connection in self.connections.values():
+            connection.deliver(command, data)
@@ -1,5 +1,7 @@
 """The basic structure of a finesse."""
 
+import copy
+
 from dataclasses import dataclass, field
 
 
@@ -21,3 +23,18 @@ class Finesse:
     # per player
     giver: int = -1
     receivers: list = field(default_factory=list)
+
+    def __deepcopy__(self, memo):
+        return Finesse(
+            rank=self.rank,
+            suit=self.suit,
+            urgent=self.urgent,
+            clues=copy.deepcopy(self.clues, memo) if self.clues else [],
+            actionable_paths=(
+                copy.deepcopy(self.actionable_paths, memo)
+                if self.actionable_paths
+                else []
+            ),
+            giver=self.giver,
+            receivers=list(self.receivers),
+        )
@@ -1,7 +1,10 @@
 """The table of a game with our player index."""
 
+import bisect
 import copy
+import logging
 import random
+import time
 
 from dataclasses import dataclass, field
 
@@ -16,9 +19,14 @@ from src.constants import (
     MAX_CLUE_NUM,
     MAX_RANK,
 )
-from src.conventions import evaluate
+from src.conventions import SearchStats, evaluate
 from src.snapshot import Snapshot
-from src.utils import printf, dump
+from src.utils import dump
+
+logger = logging.getLogger(__name__)
+
+# How many levels (plies) the search of a decision looks ahead.
+DECISION_SEARCH_LEVEL = 1
 
 
 # This is just a reference. For a fully-fledged bot, the game state would need
@@ -57,22 +65,145 @@ class Game:
     # The index of the player who is us.
     our_player_index: int = -1
 
-    # An array of game snapshot history from our view (i.e., 1D array of Snapshot objects).
+    # The snapshots from our view, i.e. an event-sourced history (see snapshot_at()):
+    # a checkpoint every "checkpoint_interval" turns, then the latest snapshot. The turn
+    # of a snapshot is len(snapshot.action_history); a snapshot includes the draw which
+    # completes its turn.
     snapshot_history: list = field(default_factory=list)
+    checkpoint_interval: int = 10
 
     # An array of original action (i.e., 1D array of Action objects).
     # It also contains drawing actions.
     action_history: list = field(default_factory=list)
 
+    # The actions folded into the snapshots since the initial one, in order, draws
+    # included. It is only appended to; the drawn cards are copies taken at the time.
+    event_log: list = field(default_factory=list)
+    # The index in event_log of the action of each turn (i.e. of each non-draw action).
+    _turn_events: list = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self._turn_events = [
+            i
+            for i, action in enumerate(self.event_log)
+            if action.action_type != ACTION.DRAW.value
+        ]
+
     def take_initial_snapshot(self):
         s = Snapshot()
-        s.initialize(len(self.player_names), 0, self.player_hands)
+        # The snapshots have their own copy of the hands, which they change by themselves.
+        s.initialize(len(self.player_names), 0, copy.deepcopy(self.player_hands))
         self.snapshot_history.append(s)
 
     def handle_action(self, action: Action):
         # Pre-action intention check.
 
         # Record the action.
+        has_initial_snapshot = len(self.snapshot_history) > 0
+        self._record_action(action)
+
+        if has_initial_snapshot:
+            self._advance_snapshot(action)
+
+    def replay(self, actions: list):
+        """Fold past actions (e.g. from "gameActionList", or a generator) into the game.
+
+        It is equivalent to calling handle_action() for each of them, but the latest
+        snapshot is updated in place instead of copied for every action.
+        """
+        for action in actions:
+            has_initial_snapshot = len(self.snapshot_history) > 0
+            self._record_action(action)
+            if not has_initial_snapshot:
+                continue
+
+            if action.action_type != ACTION.DRAW.value and self._is_checkpoint(
+                self.snapshot_history[-1]
+            ):
+                # Keep the checkpoint; the next turns go into a copy of it.
+                self.snapshot_history.append(self.snapshot_history[-1].copy())
+            self._fold_into_snapshot(self.snapshot_history[-1], action)
+
+    def _advance_snapshot(self, action: Action):
+        """Update the snapshot history from our view after an action."""
+        if action.action_type == ACTION.DRAW.value:
+            # A draw completes the current turn, so it goes into the latest snapshot.
+            self._fold_into_snapshot(self.snapshot_history[-1], action)
+            return
+        latest = self.snapshot_history[-1]
+        try:
+            # On a copy, so that a failed action leaves the latest snapshot as it was.
+            next_snapshot = latest.next_snapshot(action)
+        except Exception as e:
+            logger.warning("unable to take the next snapshot: %s", e)
+            return
+        self._log_event(action)
+        if self._is_checkpoint(latest):
+            self.snapshot_history.append(next_snapshot)
+        else:
+            self.snapshot_history[-1] = next_snapshot
+
+    def _is_checkpoint(self, snapshot: Snapshot) -> bool:
+        """Whether a snapshot is kept in the history once its turn is over."""
+        return len(snapshot.action_history) % self.checkpoint_interval == 0
+
+    def _fold_into_snapshot(self, snapshot: Snapshot, action: Action) -> bool:
+        """Apply an action to a snapshot in place and log it. Returns whether it
+        succeeded.
+        """
+        if action.action_type == ACTION.DRAW.value:
+            # The snapshot keeps its own copy of the drawn card.
+            action = copy.deepcopy(action)
+        try:
+            snapshot.apply(action)
+        except Exception as e:
+            logger.warning("unable to apply the action to the snapshot: %s", e)
+            return False
+        self._log_event(action)
+        return True
+
+    def _log_event(self, action: Action):
+        if action.action_type != ACTION.DRAW.value:
+            self._turn_events.append(len(self.event_log))
+        self.event_log.append(action)
+
+    @property
+    def current_turn(self) -> int:
+        """The turn of the latest snapshot, or -1 if there is none yet."""
+        if not self.snapshot_history:
+            return -1
+        return len(self.snapshot_history[-1].action_history)
+
+    def snapshot_at(self, turn: int) -> Snapshot:
+        """A copy of the snapshot after the given turn (0 is the initial snapshot).
+
+        It copies the nearest checkpoint before it and replays the events since, i.e.
+        at most "checkpoint_interval" turns, whatever the length of the game.
+        """
+        current_turn = self.current_turn
+        if not 0 <= turn <= current_turn:
+            raise IndexError(f"No snapshot of turn {turn} (current: {current_turn}).")
+        # The checkpoints are in order of turn; the latest snapshot is last.
+        index = bisect.bisect_right(
+            self.snapshot_history, turn, key=lambda s: len(s.action_history)
+        )
+        snapshot = self.snapshot_history[index - 1].copy()
+        start = len(snapshot.action_history)
+        if start < turn:
+            first = self._turn_events[start]
+            last = (
+                self._turn_events[turn] if turn < current_turn else len(self.event_log)
+            )
+            for action in self.event_log[first:last]:
+                if action.action_type == ACTION.DRAW.value:
+                    # The drawn cards of the log stay as they were drawn.
+                    action = copy.deepcopy(action)
+                snapshot.apply(action)
+        return snapshot
+
+    def _record_action(self, action: Action):
         if action.action_type == ACTION.DRAW.value:
             # Draw action in the beginning is not recorded.
             self.handle_draw(action)
@@ -86,11 +217,6 @@ class Game:
         elif action.action_type in (ACTION.COLOR_CLUE.value, ACTION.RANK_CLUE.value):
             self.handle_clue(action)
 
-        if len(self.snapshot_history) > 0 and action.action_type != ACTION.DRAW.value:
-            self.snapshot_history.append(
-                self.snapshot_history[-1].next_snapshot(action)
-            )
-
     def pre_action_intention_check(
         self, viewer_index: int = None, player_index: int = None
     ) -> list:
@@ -497,7 +623,8 @@ class Game:
         self.action_history.append(action)
         return
 
-    def decide_action(self):
+    def decision_snapshot(self) -> Snapshot:
+        """The snapshot which our decisions search from (sharing our cards)."""
         s = Snapshot()
         s.play_pile = self.play_pile
         s.discard_pile = self.discard_pile
@@ -506,9 +633,26 @@ class Game:
         s.boom_tokens = self.boom_tokens
         s.num_suits = self.num_suits
         s.num_players = len(self.player_names)
+        return s
+
+    def decide_action(self):
+        s = self.decision_snapshot()
 
         # Switch to new approach.
-        return evaluate(s, self.our_player_index, self.our_player_index)[0]
+        stats = SearchStats(search_level=DECISION_SEARCH_LEVEL)
+        started = time.perf_counter()
+        actions = evaluate(
+            s,
+            self.our_player_index,
+            self.our_player_index,
+            DECISION_SEARCH_LEVEL,
+            stats=stats,
+        )
+        stats.elapsed = time.perf_counter() - started
+        logger.debug("search: %s", stats.summary())
+        action = actions[0]
+        action.stats = stats
+        return action
         # return self.pre_action_intention_check(
         #    self.our_player_index, self.our_player_index
         # )[0]
@@ -723,9 +867,10 @@ class Game:
                 break
 
         if card_index == -1:
-            printf(
-                "error: unable to find card with order " + str(order) + " in"
-                "the hand of player " + str(player_index)
+            logger.error(
+                "unable to find card with order %s in the hand of player %s",
+                order,
+                player_index,
             )
             return None
 
@@ -798,3 +943,25 @@ class Game:
             return False
 
         return True
+
+
+def fallback_action(game: Game) -> Action:
+    """A legal action when the bot cannot decide: discard, or else clue a rank."""
+    player_index = game.our_player_index
+    if game.clue_tokens < MAX_CLUE_NUM:
+        return Action(
+            action_type=ACTION.DISCARD.value,
+            player_index=player_index,
+            card=game.player_hands[player_index][0],
+        )
+    receiver = (player_index + 1) % len(game.player_names)
+    return Action(
+        action_type=ACTION.RANK_CLUE.value,
+        player_index=player_index,
+        clue=Clue(
+            hint_type=ACTION.RANK_CLUE.value,
+            hint_value=game.player_hands[receiver][0].rank,
+            giver_index=player_index,
+            receiver_index=receiver,
+        ),
+    )
@@ -0,0 +1,470 @@
+"""A local SQLite database of finished games, for replays and analytics.
+
+It keeps, per game, its action log (in the server format, one row per action), the
+snapshot of every turn from the view of the player to act (the position their
+decision searches from, in the binary encoding of src/serialization.py, compressed),
+and the metadata of the decisions when known (e.g. from self-play). The games are
+indexed by player count and score, the actions by type and turn, so that questions
+like "all games with a strike before turn 10" or "every position where a 5 was
+clued" are index lookups, and the positions come back as ready-to-use Snapshots.
+
+Usage: python -m src.game_db DB [--selfplay N] [--players P] [--seed S]
+                                [--exports FILE ...] [--policy bot|fallback]
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from src.action import SERVER_ACTION_TYPES, Action, parse_server_action
+from src.constants import ACTION, MAX_RANK
+from src.exports import VARIANT_SUITS, iter_exports, iter_server_actions
+from src.referee import CLUE_TYPE_COLOR, END_CONDITION_STRIKEOUT, seat_view
+from src.review import describe_action
+from src.serialization import decode_snapshot, encode_snapshot
+from src.simulator import SelfPlayGame, new_seat
+from src.snapshot import Snapshot
+from src.tournament import POLICIES
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+# The action types of the "actions" table: those of ACTION, and a misplay.
+ACTION_MISPLAY = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    source_id TEXT,
+    num_players INTEGER NOT NULL,
+    num_suits INTEGER NOT NULL,
+    players TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER NOT NULL,
+    strikes INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    end_condition INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_by_players ON games (num_players, score);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score);
+
+CREATE TABLE IF NOT EXISTS actions (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    player_index INTEGER NOT NULL,
+    action_type INTEGER NOT NULL,
+    target INTEGER,
+    value INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (game_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS actions_by_type ON actions (action_type, value, turn);
+CREATE INDEX IF NOT EXISTS actions_by_turn ON actions (turn, action_type);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    turn INTEGER NOT NULL,
+    player_index INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (game_id, turn)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS decisions (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    turn INTEGER NOT NULL,
+    player_index INTEGER NOT NULL,
+    chosen TEXT,
+    score INTEGER,
+    search_level INTEGER,
+    nodes INTEGER,
+    elapsed REAL,
+    PRIMARY KEY (game_id, turn)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class GameRow:
+    """The summary of one stored game."""
+
+    id: int
+    source: str
+    source_id: Optional[str]
+    num_players: int
+    num_suits: int
+    players: list
+    score: int
+    max_score: int
+    strikes: int
+    turns: int
+    end_condition: Optional[int]
+
+
+@dataclass
+class Position:
+    """A stored turn: the snapshot before the action, from the view of its player."""
+
+    game_id: int
+    turn: int
+    player_index: int
+    snapshot: Snapshot
+    # The action actually taken at this turn.
+    action: Action
+
+
+def _action_row(data: dict):
+    """(player index, action type, target, value) of a turn action of the log."""
+    if data["type"] == "clue":
+        action_type = ACTION.RANK_CLUE.value
+        if data["clue"]["type"] == CLUE_TYPE_COLOR:
+            action_type = ACTION.COLOR_CLUE.value
+        return data["giver"], action_type, data["target"], data["clue"]["value"]
+    if data["type"] == "play":
+        action_type = ACTION.PLAY.value
+    elif data["type"] == "draw":
+        action_type = ACTION.DRAW.value
+    else:
+        action_type = ACTION_MISPLAY if data["failed"] else ACTION.DISCARD.value
+    return data["playerIndex"], action_type, data["order"], data["rank"]
+
+
+def _is_turn(data: dict) -> bool:
+    return data["type"] in ("clue", "play", "discard")
+
+
+class GameDatabase:
+    """The games of one SQLite file. It can be shared by threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise ValueError(f"Unknown schema version {version} of {path}.")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # Storing.
+
+    def add_game(
+        self,
+        record: dict,
+        source="unknown",
+        source_id=None,
+        decisions=None,
+        snapshots=True,
+    ) -> int:
+        """Store a finished game; returns its ID.
+
+        "record" has the player names, the amount of suits and the action log in the
+        server format (see src.review.export_game). "decisions" are the decided
+        actions per turn, if known (see SelfPlayGame.decisions).
+        """
+        names = list(record["players"])
+        num_suits = record.get("numSuits", 5)
+        # Only the actions which change the game are kept.
+        actions = [
+            data for data in record["actions"] if data["type"] in SERVER_ACTION_TYPES
+        ]
+        end_condition = None
+        for data in record["actions"]:
+            if data["type"] == "gameOver":
+                end_condition = data["endCondition"]
+
+        action_rows = []
+        turn = 0
+        score = strikes = 0
+        for position, data in enumerate(actions):
+            player_index, action_type, target, value = _action_row(data)
+            score += action_type == ACTION.PLAY.value
+            strikes += action_type == ACTION_MISPLAY
+            action_rows.append(
+                [position, turn, player_index, action_type, target, value, data]
+            )
+            turn += _is_turn(data)
+        if end_condition == END_CONDITION_STRIKEOUT:
+            score = 0
+
+        snapshot_rows = []
+        if snapshots:
+            snapshot_rows = list(self._snapshots(names, num_suits, actions))
+        decision_rows = []
+        for decision_turn, action in enumerate(decisions or ()):
+            if action is None:
+                continue
+            stats = action.stats
+            decision_rows.append(
+                (
+                    decision_turn,
+                    action.player_index,
+                    describe_action(action, names),
+                    action.score,
+                    None if stats is None else stats.search_level,
+                    None if stats is None else stats.nodes,
+                    None if stats is None else stats.elapsed,
+                )
+            )
+
+        with self._lock, self._db:
+            game_id = self._db.execute(
+                "INSERT INTO games (source, source_id, num_players, num_suits, players,"
+                " score, max_score, strikes, turns, end_condition)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source,
+                    None if source_id is None else str(source_id),
+                    len(names),
+                    num_suits,
+                    json.dumps(names),
+                    score,
+                    num_suits * MAX_RANK,
+                    strikes,
+                    turn,
+                    end_condition,
+                ),
+            ).lastrowid
+            self._db.executemany(
+                "INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (game_id, *row[:-1], json.dumps(row[-1], separators=(",", ":")))
+                    for row in action_rows
+                ),
+            )
+            self._db.executemany(
+                "INSERT INTO snapshots VALUES (?, ?, ?, ?)",
+                ((game_id, *row) for row in snapshot_rows),
+            )
+            self._db.executemany(
+                "INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((game_id, *row) for row in decision_rows),
+            )
+        return game_id
+
+    def add_self_play(self, play: SelfPlayGame, source="selfplay") -> int:
+        """Store a finished self-play game, with its decisions."""
+        record = {
+            "players": play.seats[0].player_names,
+            "numSuits": play.referee.num_suits,
+            "actions": play.referee.actions,
+        }
+        return self.add_game(record, source, play.result.seed, play.decisions)
+
+    @staticmethod
+    def _snapshots(names, num_suits, actions):
+        """(turn, player index, compressed snapshot) before every turn action."""
+        seats = [new_seat(len(names), i, num_suits) for i in range(len(names))]
+        for seat in seats:
+            seat.player_names = list(names)
+        turn = 0
+        for data in actions:
+            if _is_turn(data):
+                player_index = _action_row(data)[0]
+                snapshot = seats[player_index].decision_snapshot()
+                yield turn, player_index, zlib.compress(encode_snapshot(snapshot))
+                turn += 1
+            for player_index, seat in enumerate(seats):
+                action = parse_server_action(seat_view(data, player_index))
+                if action is not None:
+                    seat.replay([action])
+
+    # Querying.
+
+    def count_games(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def game(self, game_id) -> Optional[GameRow]:
+        games = self.find_games(ids=[game_id])
+        return games[0] if games else None
+
+    def find_games(
+        self,
+        *,
+        num_players=None,
+        min_score=None,
+        max_score=None,
+        source=None,
+        strike_before_turn=None,
+        ids=None,
+        limit=None,
+    ) -> list:
+        """The games matching all the given conditions, by ID."""
+        conditions = []
+        params = []
+        if num_players is not None:
+            conditions.append("num_players = ?")
+            params.append(num_players)
+        if min_score is not None:
+            conditions.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("score <= ?")
+            params.append(max_score)
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        if strike_before_turn is not None:
+            conditions.append(
+                "id IN (SELECT game_id FROM actions WHERE action_type = ? AND turn < ?)"
+            )
+            params += [ACTION_MISPLAY, strike_before_turn]
+        if ids is not None:
+            conditions.append(f"id IN ({', '.join('?' * len(ids))})")
+            params += list(ids)
+        sql = "SELECT * FROM games"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [GameRow(*row[:5], json.loads(row[5]), *row[6:]) for row in rows]
+
+    def actions(self, game_id) -> list:
+        """The action log of a game in the server format."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM actions WHERE game_id = ? ORDER BY position",
+                (game_id,),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def record(self, game_id) -> dict:
+        """A game as a record for src.review (and add_game)."""
+        game = self.game(game_id)
+        return {
+            "players": game.players,
+            "numSuits": game.num_suits,
+            "actions": self.actions(game_id),
+        }
+
+    def snapshot(self, game_id, turn) -> Optional[Snapshot]:
+        """The snapshot before a turn, from the view of the player to act."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM snapshots WHERE game_id = ? AND turn = ?",
+                (game_id, turn),
+            ).fetchone()
+        return None if row is None else decode_snapshot(zlib.decompress(row[0]))
+
+    def decisions(self, game_id) -> list:
+        """The recorded decisions of a game, as dicts in turn order."""
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT * FROM decisions WHERE game_id = ? ORDER BY turn", (game_id,)
+            )
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def find_positions(
+        self,
+        *,
+        action_type=None,
+        value=None,
+        min_turn=None,
+        max_turn=None,
+        num_players=None,
+        limit=None,
+    ) -> Iterator[Position]:
+        """The positions (turns) whose action matches all the given conditions.
+
+        "action_type" is one of ACTION (or ACTION_MISPLAY); "value" is the clue value
+        of a clue, or the rank of a played or discarded card. E.g. every position where
+        a 5 was clued: find_positions(action_type=ACTION.RANK_CLUE.value, value=5).
+        """
+        conditions = ["a.action_type != ?"]
+        params = [ACTION.DRAW.value]
+        if action_type is not None:
+            conditions.append("a.action_type = ?")
+            params.append(action_type)
+        if value is not None:
+            conditions.append("a.value = ?")
+            params.append(value)
+        if min_turn is not None:
+            conditions.append("a.turn >= ?")
+            params.append(min_turn)
+        if max_turn is not None:
+            conditions.append("a.turn <= ?")
+            params.append(max_turn)
+        if num_players is not None:
+            conditions.append("g.num_players = ?")
+            params.append(num_players)
+        sql = (
+            "SELECT a.game_id, a.turn, s.player_index, s.data, a.data"
+            " FROM actions a JOIN games g ON g.id = a.game_id"
+            " JOIN snapshots s ON s.game_id = a.game_id AND s.turn = a.turn"
+            " WHERE " + " AND ".join(conditions) + " ORDER BY a.game_id, a.turn"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        for game_id, turn, player_index, snapshot, data in rows:
+            yield Position(
+                game_id=game_id,
+                turn=turn,
+                player_index=player_index,
+                snapshot=decode_snapshot(zlib.decompress(snapshot)),
+                action=parse_server_action(json.loads(data)),
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("database")
+    parser.add_argument("--selfplay", type=int, default=0, help="games to play and add")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game")
+    parser.add_argument("--policy", choices=["bot", "fallback"], default="bot")
+    parser.add_argument("--exports", nargs="*", default=[], help="hanab.live exports")
+    args = parser.parse_args()
+
+    with GameDatabase(args.database) as db:
+        for seed in range(args.seed, args.seed + args.selfplay):
+            play = SelfPlayGame(args.players, seed, POLICIES[args.policy])
+            play.play()
+            db.add_self_play(play)
+        for path in args.exports:
+            for export in iter_exports(path):
+                try:
+                    actions = list(iter_server_actions(export))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning("skipping game %s: %s", export.get("id"), e)
+                    continue
+                variant = (export.get("options") or {}).get("variant", "No Variant")
+                record = {
+                    "players": export["players"],
+                    "numSuits": VARIANT_SUITS[variant],
+                    "actions": actions,
+                }
+                db.add_game(record, source="hanab.live", source_id=export.get("id"))
+        print(f"{db.count_games()} games in {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,26 +2,53 @@
 
 # Imports (standard library)
 import copy
-import json
+import functools
+import logging
+import os
 import time
 
 # Imports (3rd-party)
 import websocket
 
 # Imports (local application)
-from src.action import Action
-from src.card import Card
-from src.clue import Clue
-from src.constants import ACTION
-from src.game import Game
-from src.utils import printf, dump
+from src import metrics
+from src.action import Action, parse_server_action
+from src.codec import decode_payload, encode_message, split_message
+from src.decision_pool import DecisionPool
+from src.game import Game, fallback_action
+from src.profiling import DEFAULT_PROFILE_DIR, profile_call
+from src.review import export_game, save_game
+from src.session import DEFAULT_ACTION_DELAY, TableSession
+from src.utils import deep_sizeof, dump, percentile
 from src.constants import MAX_CLUE_NUM
 
+logger = logging.getLogger(__name__)
+
+# The backoff (in seconds) between reconnection attempts, doubling after each failure.
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+# Give up after this many failed reconnection attempts in a row.
+MAX_RECONNECT_ATTEMPTS = 10
+
 
 class HanabiClient:
     """The main implementation of a Hanabi client."""
 
-    def __init__(self, url, cookie, username="robot1", debug=None):
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        url,
+        cookie,
+        username="robot1",
+        debug=None,
+        *,
+        decision_pool=None,
+        ws_factory=None,
+        action_delay=None,
+        profile_dir=DEFAULT_PROFILE_DIR,
+        game_store=None,
+        review_dir=None,
+    ):
         # Initialize all class variables.
         self.command_handlers = {}
         self.tables = {}
@@ -29,8 +56,44 @@ class HanabiClient:
         self.username = ""
         self.ws = None
         self.games = {}
+        # Per-table sessions, keyed the same as "games".
+        self.sessions = {}
+        # Decisions are made off the WebSocket thread. The pool can be shared by clients.
+        self.decisions = decision_pool if decision_pool is not None else DecisionPool()
         self.debug = debug
         self.username = username
+        self.url = url
+        self.cookie = cookie
+        # Build the connection; e.g. "FakeHanabiServer.websocket_app" for offline games.
+        self.ws_factory = ws_factory if ws_factory is not None else websocket.WebSocketApp
+        # The humanizing delay of new tables; by default none in debug mode.
+        if action_delay is None:
+            action_delay = DEFAULT_ACTION_DELAY if debug is None else 0
+        self.action_delay = action_delay
+        # Where the profiles of tables with "/profile" on are written.
+        self.profile_dir = profile_dir
+        # Connection state: whether it is open (at least once) and how often it dropped.
+        self.connected = False
+        self.ever_connected = False
+        self.reconnects = 0
+        self.stopping = False
+        metrics.track_client(self)
+        # Where the finished games are saved for a review (see src.review), if anywhere.
+        self.review_dir = review_dir
+        # Checkpoints and journals of the games (see src.checkpoint), if any.
+        self.game_store = game_store
+        # The restored games whose tables the server has not listed yet.
+        self.restored = set()
+        if game_store is not None:
+            started = time.perf_counter()
+            self.games.update(game_store.load_all())
+            self.restored.update(self.games)
+            if self.games:
+                logger.info(
+                    "Restored %d game(s) in %.1f ms.",
+                    len(self.games),
+                    (time.perf_counter() - started) * 1000,
+                )
 
         # Initialize the website command handlers (for the lobby).
         self.command_handlers["welcome"] = self._welcome
@@ -49,23 +112,92 @@ class HanabiClient:
         self.command_handlers["databaseID"] = self._database_id
 
         # Start the WebSocket client.
-        printf('Connecting to "' + url + '".')
-
-        self.ws = websocket.WebSocketApp(
-            url,
-            on_message=self._websocket_message,
-            on_error=self._websocket_error,
-            on_open=self._websocket_open,
-            on_close=self._websocket_close,
-            cookie=cookie,
-        )
-        self.ws.run_forever()
+        self.run()
+
+    def run(self):
+        """Run the WebSocket client until it is closed by us.
+
+        When an established connection drops, reconnect with an exponential backoff.
+        The games are kept in memory and resynchronized once the connection is back.
+        """
+        delay = RECONNECT_MIN_DELAY
+        failures = 0
+        while True:
+            logger.info('Connecting to "%s".', self.url)
+            self.ws = self.ws_factory(
+                self.url,
+                on_message=self._websocket_message,
+                on_error=self._websocket_error,
+                on_open=self._websocket_open,
+                on_close=self._websocket_close,
+                cookie=self.cookie,
+            )
+            opened_before = self.reconnects
+            self.ws.run_forever()
+            self.connected = False
+
+            if self.stopping or not self.ever_connected:
+                return
+            if self.reconnects > opened_before:
+                # The connection was established before it dropped.
+                delay = RECONNECT_MIN_DELAY
+                failures = 0
+            else:
+                failures += 1
+                if failures >= MAX_RECONNECT_ATTEMPTS:
+                    logger.error("Giving up after %d reconnection attempts.", failures)
+                    return
+
+            logger.warning("Connection lost; reconnecting in %s second(s).", delay)
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def close(self):
+        """Close the connection for good."""
+        self.stopping = True
+        if self.ws is not None:
+            self.ws.close()
 
-    def _print_debug_info(self):
-        printf("==============DEBUG===============\n")
-        dump(self.tables)
-        dump(self.games[self.current_table_id])
-        printf("==============DEBUG===============\n")
+    def _print_debug_info(self, table_id=None):
+        if table_id is None:
+            table_id = self.current_table_id
+        game = self.games.get(table_id)
+        if game is None:
+            logger.info("no game at table %s to debug", table_id)
+            return
+        # The rendering is bounded, and the writing happens on a background thread.
+        with self._session(table_id).lock:
+            dump(
+                {
+                    "table": self.tables.get(table_id),
+                    "tables": list(self.tables),
+                    "game": game,
+                }
+            )
+
+    def _session(self, table_id) -> TableSession:
+        """Get the session of a table, creating it on first use."""
+        session = self.sessions.get(table_id)
+        if session is None:
+            session = TableSession(
+                table_id,
+                lambda command, data: self._send(command, data),
+                action_delay=self.action_delay,
+            )
+            self.sessions[table_id] = session
+        return session
+
+    def _close_session(self, table_id):
+        session = self.sessions.pop(table_id, None)
+        if session is not None:
+            session.cancel()
+
+    def _table_of(self, username):
+        """Find the game table where a user is, or the current table."""
+        for table_id, table in self.tables.items():
+            if table_id in self.games and username in table.get("players", []):
+                return table_id
+        return self.current_table_id
 
     # ------------------
     # WebSocket Handlers
@@ -78,39 +210,64 @@ class HanabiClient:
         # For more information, see:
         # https://github.com/Hanabi-Live/hanabi-live/blob/master/server/src/websocket_message.go
         """
-        result = message.split(" ", 1)  # Split it into two things
-        if len(result) != 1 and len(result) != 2:
-            printf("error: received an invalid WebSocket message:")
-            printf(message)
+        command, payload = split_message(message)  # Split it into two things
+
+        # Commands without a handler are not decoded at all.
+        handler = self.command_handlers.get(command)
+        if handler is None:
+            logger.debug('ignoring command "%s"', command)
             return
 
-        command = result[0]
         try:
-            data = json.loads(result[1])
-        except TypeError:
-            printf(
-                'error: the JSON data for the command of "' + command + '" was invalid'
-            )
+            data = decode_payload(command, payload)
+        except ValueError:
+            logger.error('the JSON data for the command of "%s" was invalid', command)
             return
 
-        if command in self.command_handlers:
-            printf('debug: got command "' + command + '"')
-            try:
-                self.command_handlers[command](data)
-            except Exception as e:
-                printf('error: command handler for "' + command + '" failed:', e, data)
-                return
-        else:
-            printf('debug: ignoring command "' + command + '"')
+        logger.debug('got command "%s"', command)
+        metrics.MESSAGES.inc(command)
+        try:
+            handler(data)
+        except Exception as e:
+            metrics.HANDLER_EXCEPTIONS.inc(command)
+            logger.exception('command handler for "%s" failed: %s %s', command, e, data)
+            return
 
     def _websocket_error(self, _, error):
-        printf("Encountered a WebSocket error:", error)
+        logger.error("Encountered a WebSocket error: %s", error)
 
-    def _websocket_close(self, _):
-        printf("WebSocket connection closed.")
+    def _websocket_close(self, _, *_args):
+        # Actions scheduled on the dropped connection cannot be sent any more.
+        # They will be decided again after the resynchronization.
+        self.connected = False
+        for session in self.sessions.values():
+            session.cancel()
+        logger.info("WebSocket connection closed.")
 
     def _websocket_open(self, _):
-        printf("Successfully established WebSocket connection.")
+        logger.info("Successfully established WebSocket connection.")
+        self.connected = True
+        if not self.ever_connected:
+            self.ever_connected = True
+            # Catch up with the games restored from the checkpoints, if any.
+            self._resync_games()
+            return
+
+        # This is a reconnection, so we might have missed some actions.
+        self.reconnects += 1
+        metrics.RECONNECTS.inc()
+        self._resync_games()
+
+    def _resync_games(self):
+        """Re-request the actions of all active tables to catch up with them."""
+        for table_id in list(self.games):
+            logger.info("Resynchronizing the game at table %s.", table_id)
+            self._send(
+                "getGameInfo2",
+                {
+                    "tableID": table_id,
+                },
+            )
 
     # --------------------------------
     # Website Command Handlers (Lobby)
@@ -125,11 +282,11 @@ class HanabiClient:
     def _error(self, data):
         # Either we have done something wrong, or something has gone wrong on
         # the server.
-        printf(data)
+        logger.error("%s", data)
 
     def _warning(self, data):
         # We have done something wrong.
-        printf(data)
+        logger.warning("%s", data)
 
     def _chat(self, data):
         # We only care about private messages.
@@ -148,12 +305,15 @@ class HanabiClient:
         if command == "join":
             self._chat_join(data)
         elif command == "please":
-            try:
-                self._decide_action(self.current_table_id)
-            except Exception as e:
-                printf("Error when deciding action: ", e)
+            self._request_decision(self._table_of(data["who"]))
         elif command == "debug":
-            self._print_debug_info()
+            self._print_debug_info(self._table_of(data["who"]))
+        elif command == "delay":
+            self._chat_delay(data, result)
+        elif command == "profile":
+            self._chat_profile(data, result)
+        elif command == "stats":
+            self._chat_stats(data)
         elif command == "create":
             self._chat_create()
         elif command == "terminate":
@@ -166,6 +326,80 @@ class HanabiClient:
             msg = "That is not a valid command."
             self._chat_reply(msg, data["who"])
 
+    def _chat_delay(self, data, result):
+        # Change the humanizing delay of the current table, e.g. "/delay 0.5".
+        try:
+            delay = float(result[1])
+        except (IndexError, ValueError):
+            self._chat_reply("Usage: /delay <seconds>", data["who"])
+            return
+        if delay < 0:
+            self._chat_reply("The delay cannot be negative.", data["who"])
+            return
+        self._session(self._table_of(data["who"])).action_delay = delay
+        self._chat_reply(f"The action delay is {delay} second(s) now.", data["who"])
+
+    def _chat_profile(self, data, result):
+        # Toggle profiling the decisions of the current table, e.g. "/profile on".
+        session = self._session(self._table_of(data["who"]))
+        switch = result[1].strip().lower() if len(result) > 1 else None
+        if switch not in (None, "on", "off"):
+            self._chat_reply("Usage: /profile [on|off]", data["who"])
+            return
+        session.profiling = not session.profiling if switch is None else switch == "on"
+        if session.profiling:
+            msg = f'Profiling each decision into "{self.profile_dir}".'
+        else:
+            msg = "Profiling is off."
+        self._chat_reply(msg, data["who"])
+
+    def _chat_stats(self, data):
+        # Reply with the recent decisions and the size of each table, one per line.
+        if not self.games:
+            self._chat_reply("No games in progress.", data["who"])
+            return
+        for table_id in list(self.games):
+            self._chat_reply(self._table_stats(table_id), data["who"])
+        pool = self.decisions.stats()
+        self._chat_reply(
+            f"Decision pool: {pool['queued']} queued, {pool['running']} running, "
+            f"{pool['failed']} failed, {pool['rejected']} rejected.",
+            data["who"],
+        )
+
+    def _table_stats(self, table_id) -> str:
+        """One line about the recent decisions and the size of the game of a table."""
+        session = self._session(table_id)
+        decisions = list(session.decisions)
+        line = f"Table {table_id}: "
+        if decisions:
+            times = sorted(elapsed for elapsed, _ in decisions)
+            line += (
+                f"last {len(times)} decisions p50 {percentile(times, 50) * 1000:.1f} ms, "
+                f"p95 {percentile(times, 95) * 1000:.1f} ms, "
+                f"max {times[-1] * 1000:.1f} ms"
+            )
+            searches = [stats for _, stats in decisions if stats is not None]
+            if searches:
+                nodes = sum(stats.nodes for stats in searches)
+                search_time = sum(stats.elapsed for stats in searches)
+                line += f"; {nodes / len(searches):.0f} nodes per decision"
+                if search_time > 0:
+                    line += f" ({nodes / search_time:.0f}/s)"
+        else:
+            line += "no decisions yet"
+
+        game = self.games.get(table_id)
+        if game is not None:
+            # The memory is measured by the decision workers, not on this thread.
+            if session.memory is not None:
+                line += f"; memory {session.memory / 1024:.0f} KiB"
+            line += (
+                f"; {len(game.event_log)} events, "
+                f"{len(game.snapshot_history)} checkpoints"
+            )
+        return line + "."
+
     def _chat_invite(self):
         for i in range(1, 5):
             name = "robot" + str(i)
@@ -244,8 +478,17 @@ class HanabiClient:
         for data in data_list:
             self._table(data)
 
+        # The server lists all tables once we are connected. The restored games whose
+        # tables are not there anymore ended while we were away.
+        for table_id in self.restored - set(self.tables):
+            logger.info("Dropping the restored game of the gone table %s.", table_id)
+            self._drop_game(table_id)
+        self.restored.clear()
+
     def _table_gone(self, data):
         del self.tables[data["tableID"]]
+        if data["tableID"] not in self.games:
+            self._close_session(data["tableID"])
 
     def _table_start(self, data):
         # The server has told us that a game that we are in is starting. So,
@@ -269,6 +512,21 @@ class HanabiClient:
         # data about the game, including the names and ordering of the players
         # at the table.
 
+        # After a reconnection, keep the game we already have and only catch up.
+        game = self.games.get(data["tableID"])
+        if (
+            game is not None
+            and game.player_names == data["playerNames"]
+            and game.our_player_index == data["ourPlayerIndex"]
+        ):
+            self._send(
+                "getGameInfo2",
+                {
+                    "tableID": data["tableID"],
+                },
+            )
+            return
+
         # Make a new game state and store it on the "games" dictionary.
         game = Game()
         self.games[data["tableID"]] = game
@@ -287,9 +545,14 @@ class HanabiClient:
         if data["options"]["variantName"] == "No Variant":
             game.num_suits = 5
         else:
-            printf("error: Variant not supported: " + data)
+            logger.error("Variant not supported: %s", data["options"]["variantName"])
             raise NotImplementedError("Variant not supported")
 
+        if self.game_store is not None:
+            # Start afresh, so that nothing of an old game at this table is reused.
+            self.game_store.remove(data["tableID"])
+            self.game_store.checkpoint(data["tableID"], game)
+
         # At this point, the JavaScript client would have enough information to
         # load and display the game UI. For our purposes, we do not need to
         # load a UI, so we can just jump directly to the next step. Now, we
@@ -306,15 +569,16 @@ class HanabiClient:
         game = self.games[data["tableID"]]
 
         # We just received a new action for an ongoing game.
-        pre_turn = len(game.action_history)
-        self.handle_action(data["action"], data["tableID"])
-        post_turn = len(game.action_history)
+        with self._session(data["tableID"]).lock:
+            pre_turn = len(game.action_history)
+            self.handle_action(data["action"], data["tableID"])
+            post_turn = len(game.action_history)
 
         if (
             post_turn != pre_turn
             and game.current_player_index() == game.our_player_index
         ):
-            self._decide_action(data["tableID"])
+            self._request_decision(data["tableID"])
 
     def _game_action_list(self, data):
         game = self.games[data["tableID"]]
@@ -322,8 +586,17 @@ class HanabiClient:
         # We just received a list of all of the actions that have occurred thus
         # far in the game.
         # When the game just starts, they are the drawing actions.
-        for action in data["list"]:
-            self.handle_action(action, data["tableID"])
+        # When we join or reconnect in the middle of a game, they are folded into
+        # the game in one pass.
+        # After a reconnection, only the actions not applied yet are fast-forwarded.
+        actions = [parse_server_action(action) for action in data["list"]]
+        actions = [action for action in actions if action is not None]
+        with self._session(data["tableID"]).lock:
+            actions = actions[len(game.action_history) :]
+            game.replay(actions)
+            if self.game_store is not None and actions:
+                self.game_store.checkpoint(data["tableID"], game)
+        logger.debug("replayed %d actions for table %s", len(actions), data["tableID"])
 
         # Let the server know that we have finished "loading the UI" (so that
         # our name does not appear as red / disconnected).
@@ -335,8 +608,12 @@ class HanabiClient:
         )
 
         # Start the game if we are the first player.
-        if game.current_player_index() == game.our_player_index:
-            self._decide_action(data["tableID"])
+        # (After a reconnection, the decision might be already on its way.)
+        if (
+            game.current_player_index() == game.our_player_index
+            and not self._session(data["tableID"]).has_pending_action()
+        ):
+            self._request_decision(data["tableID"])
 
     def _database_id(self, data):
         # Games are transformed into shared replays after they are completed.
@@ -349,70 +626,107 @@ class HanabiClient:
             },
         )
 
+        if self.review_dir is not None:
+            self._save_for_review(data)
+
         # Delete the game state for the game to free up memory.
-        del self.games[data["tableID"]]
+        self._drop_game(data["tableID"])
 
-    def handle_action(self, data, table_id):
-        printf(f"debug: 'gameAction' of '{data['type']}' for table {table_id}")
-        printf(f"debug: \t\t{data}")
-        if data["type"] not in ["clue", "play", "draw", "discard"]:
-            printf(f"skip unknown action type '{data['type']}'")
+    def _drop_game(self, table_id):
+        """Forget the game of a table, in memory and in the store."""
+        self.games.pop(table_id, None)
+        self._close_session(table_id)
+        if self.game_store is not None:
+            self.game_store.remove(table_id)
+
+    def _save_for_review(self, data):
+        game = self.games[data["tableID"]]
+        path = os.path.join(self.review_dir, f"{data['databaseID']}.json")
+        try:
+            os.makedirs(self.review_dir, exist_ok=True)
+            save_game(path, export_game(game))
+        except OSError as e:
+            logger.error("unable to save the game of table %s: %s", data["tableID"], e)
             return
+        logger.info("saved the game of table %s to %s", data["tableID"], path)
 
-        state = self.games[table_id]
-
-        if data["type"] == "clue":
-            clue_hint_type = ACTION.COLOR_CLUE.value
-            if data["clue"]["type"] % ACTION.COLOR_CLUE.value != 0:
-                clue_hint_type = ACTION.RANK_CLUE.value
-
-            state.handle_action(
-                Action(
-                    action_type=clue_hint_type,
-                    player_index=data["giver"],
-                    clue=Clue(
-                        hint_type=clue_hint_type,
-                        hint_value=data["clue"]["value"],
-                        giver_index=data["giver"],
-                        receiver_index=data["target"],
-                        turn=data["turn"],
-                        touched_orders=data["list"],
-                    ),
-                )
-            )
+    def handle_action(self, data, table_id):
+        logger.debug("'gameAction' of '%s' for table %s: %s", data["type"], table_id, data)
+        action = parse_server_action(data)
+        if action is None:
+            logger.debug("skip unknown action type '%s'", data["type"])
             return
 
-        action_type = None
-        boom = False
-        if data["type"] == "play":
-            action_type = ACTION.PLAY.value
-        elif data["type"] == "draw":
-            action_type = ACTION.DRAW.value
-        elif data["type"] == "discard":
-            if not data["failed"]:
-                action_type = ACTION.DISCARD.value
-            else:
-                boom = True
-                action_type = ACTION.PLAY.value
-
-        state.handle_action(
-            Action(
-                action_type=action_type,
-                boom=boom,
-                player_index=data["playerIndex"],
-                # A temporary Card object to pass information.
-                # The actual card object will be retrieved from the game snapshot's player_hands.
-                card=Card(
-                    order=data["order"], suit_index=data["suitIndex"], rank=data["rank"]
-                ),
-            )
+        game = self.games[table_id]
+        game.handle_action(action)
+        if self.game_store is not None:
+            self.game_store.record_action(table_id, game, data)
+
+    def _request_decision(self, table_id):
+        """Decide our action on a worker; a duplicate request joins the pending one.
+
+        If the decision is rejected (the pool is full) or fails, a fallback action is
+        sent instead, so that the game does not wait for us forever.
+        """
+        if table_id not in self.games:
+            logger.error("no game at table %s to decide an action for", table_id)
+            return None
+        # The pool may be shared by several accounts, even at the same table.
+        return self.decisions.submit(
+            (self.username, table_id),
+            self._decide_action,
+            table_id,
+            on_done=functools.partial(self._decision_done, table_id),
         )
 
+    def _decision_done(self, table_id, future):
+        error = future.exception()
+        if error is None or self.stopping:
+            return
+        logger.error(
+            "The decision for table %s failed (%s); sending a fallback action.",
+            table_id,
+            error,
+        )
+        session = self._session(table_id)
+        try:
+            with session.lock:
+                game = self.games.get(table_id)
+                if game is None or game.current_player_index() != game.our_player_index:
+                    return
+                action = fallback_action(game)
+            self.perform_action(action, table_id)
+        except Exception as e:
+            logger.error("Cannot send a fallback action to table %s: %s", table_id, e)
+
     def _decide_action(self, table_id=None):
         if table_id is None:
             table_id = self.current_table_id
 
-        self.perform_action(self.games[table_id].decide_action())
+        session = self._session(table_id)
+        with session.lock:
+            game = self.games.get(table_id)
+            if game is None:
+                # The game ended while the decision was waiting for a worker.
+                return
+            started = time.perf_counter()
+            if session.profiling:
+                action, _ = profile_call(
+                    game.decide_action,
+                    label=f"table{table_id}-turn{len(game.action_history)}",
+                    output_dir=self.profile_dir,
+                )
+            else:
+                action = game.decide_action()
+            elapsed = time.perf_counter() - started
+            metrics.record_decision(elapsed, action.stats)
+            session.record_decision(elapsed, action.stats)
+        self.perform_action(action, table_id)
+
+        # Measure the game for "/stats" now that the action is on its way.
+        if session.memory_due():
+            with session.lock:
+                session.memory = deep_sizeof(game)
 
     # -----------
     # Subroutines
@@ -430,67 +744,11 @@ class HanabiClient:
     def _send(self, command, data):
         if not isinstance(data, dict):
             data = {}
-        self.ws.send(command + " " + json.dumps(data))
-        printf(f'debug: sent command "{command}": {data}')
-
-    def _color_clue(self, target, color):
-        if self.debug is None:
-            time.sleep(2)
-        self._send(
-            "action",
-            {
-                "tableID": self.current_table_id,
-                "type": ACTION.COLOR_CLUE.value,
-                "target": target,
-                "value": color,
-            },
-        )
+        self.ws.send(encode_message(command, data))
+        logger.debug('sent command "%s": %s', command, data)
 
-    def _rank_clue(self, target, rank):
-        if self.debug is None:
-            time.sleep(2)
-        self._send(
-            "action",
-            {
-                "tableID": self.current_table_id,
-                "type": ACTION.RANK_CLUE.value,
-                "target": target,
-                "value": rank,
-            },
-        )
-
-    def _discard_card(self, card_order):
-        if self.debug is None:
-            time.sleep(2)
-        self._send(
-            "action",
-            {
-                "tableID": self.current_table_id,
-                "type": ACTION.DISCARD.value,
-                "target": card_order,
-            },
-        )
-
-    def _play_card(self, card_order):
-        if self.debug is None:
-            time.sleep(2)
-        self._send(
-            "action",
-            {
-                "tableID": self.current_table_id,
-                "type": ACTION.PLAY.value,
-                "target": card_order,
-            },
-        )
-
-    def perform_action(self, action: Action):
+    def perform_action(self, action: Action, table_id=None):
         """Send an action to server."""
-        if action.action_type == ACTION.PLAY.value:
-            self._play_card(action.card.order)
-        elif action.action_type == ACTION.DISCARD.value:
-            self._discard_card(action.card.order)
-        else:
-            if action.clue.hint_type == ACTION.COLOR_CLUE.value:
-                self._color_clue(action.clue.receiver_index, action.clue.hint_value)
-            else:
-                self._rank_clue(action.clue.receiver_index, action.clue.hint_value)
+        if table_id is None:
+            table_id = self.current_table_id
+        self._session(table_id).perform_action(action)
@@ -0,0 +1,103 @@
+"""Leveled logging with a background writer.
+
+Every module logs through its own logger, i.e. `logging.getLogger(__name__)`, with
+lazy %-style arguments, so that a disabled level costs a single level check.
+`setup_logging` then routes all records through a queue to one background thread,
+which does the actual (buffered) console I/O.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+LOG_FORMAT = "%(asctime)s %(levelname).1s %(threadName)s %(name)s: %(message)s"
+
+
+class DebugSampler(logging.Filter):
+    """Only let through one out of every N debug records; other levels always pass."""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG:
+            return True
+        if self.every == 0:
+            return False
+        with self._lock:
+            self._count += 1
+            return (self._count - 1) % self.every == 0
+
+
+def parse_module_levels(text: str) -> dict:
+    """Parse per-module levels, e.g. "src.game=DEBUG,src.snapshot=WARNING"."""
+    levels = {}
+    for item in (text or "").split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _BackgroundWriter:
+    """The queue listener which does the console I/O, stopped at exit."""
+
+    def __init__(self):
+        self._listener = None
+        self._lock = threading.Lock()
+        self._exit_hook = False
+
+    def start(self, log_queue, handler):
+        with self._lock:
+            self._listener = logging.handlers.QueueListener(
+                log_queue, handler, respect_handler_level=True
+            )
+            self._listener.start()
+            if not self._exit_hook:
+                atexit.register(self.stop)
+                self._exit_hook = True
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+
+_writer = _BackgroundWriter()
+
+
+def setup_logging(
+    level="INFO", module_levels=None, debug_sample_rate=1.0, stream=None
+):
+    """Configure leveled logging with a background writer. Safe to call again."""
+    stop_logging()
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Sample before the queue, so that the dropped records are never formatted.
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _writer.start(log_queue, handler)
+
+
+def stop_logging():
+    """Flush the pending records and stop the background writer."""
+    _writer.stop()
@@ -0,0 +1,275 @@
+"""Operational metrics of the bots, served in the Prometheus text format.
+
+Recording is lock-light: every thread counts into its own shard, so an increment is a
+plain dict update without any lock; only a scrape sums the shards of all threads.
+The HTTP endpoint is optional (see start_metrics_server); recording is always on.
+"""
+
+import bisect
+import logging
+import threading
+import weakref
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# The histogram buckets (upper bounds) of the decision latency, in seconds,
+DECISION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# and of the search speed of a decision, in nodes per second.
+NODES_PER_SECOND_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """The per-thread shards of one metric."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # The only lock of the recording side, once per thread and metric.
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self) -> list:
+        with self._lock:
+            shards = list(self._shards)
+        # Copying a dict does not let other threads in between.
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    """A monotonically increasing count, optionally per label values."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def values(self) -> dict:
+        """The totals over all threads, keyed by label values."""
+        totals = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def samples(self):
+        for key, value in sorted(self.values().items()):
+            yield self.name, _labels(self.labelnames, key), value
+
+
+class Histogram(_Sharded):
+    """Observations counted into buckets, with their sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.labelnames = tuple(labelnames)
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        # [count per bucket (not cumulative)..., sum]
+        state = shard.get(labelvalues)
+        if state is None:
+            state = shard[labelvalues] = [0] * len(self.buckets) + [0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def values(self) -> dict:
+        """Per label values: (cumulative bucket counts, sum, count)."""
+        totals = {}
+        for shard in self._snapshots():
+            for key, state in shard.items():
+                state = list(state)
+                total = totals.setdefault(key, [0] * len(state))
+                for i, value in enumerate(state):
+                    total[i] += value
+        result = {}
+        for key, total in totals.items():
+            cumulative = []
+            running = 0
+            for count in total[:-1]:
+                running += count
+                cumulative.append(running)
+            result[key] = (cumulative, total[-1], running)
+        return result
+
+    def samples(self):
+        for key, (cumulative, total, count) in sorted(self.values().items()):
+            for bound, value in zip(self.buckets, cumulative):
+                labels = _labels(self.labelnames, key, [f'le="{_number(bound)}"'])
+                yield self.name + "_bucket", labels, value
+            labels = _labels(self.labelnames, key)
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+
+class Gauge:
+    """A value read at scrape time from a callback, which returns {label values: value}."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        for key, value in sorted(self.callback().items()):
+            yield self.name, _labels(self.labelnames, key), value
+
+
+class MetricsRegistry:
+    """A set of metrics, rendered together."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# The clients in this process, for the gauges read from them.
+_clients = weakref.WeakSet()
+
+
+def track_client(client):
+    """Report the gauges of a HanabiClient (e.g. its active tables)."""
+    _clients.add(client)
+
+
+def _active_tables() -> dict:
+    return {(client.username,): len(client.games) for client in list(_clients)}
+
+
+MESSAGES = REGISTRY.register(
+    Counter(
+        "hanabi_messages_total",
+        "WebSocket messages handled, per command.",
+        ["command"],
+    )
+)
+HANDLER_EXCEPTIONS = REGISTRY.register(
+    Counter(
+        "hanabi_handler_exceptions_total",
+        "Command handlers which raised, per command.",
+        ["command"],
+    )
+)
+DECISION_SECONDS = REGISTRY.register(
+    Histogram(
+        "hanabi_decision_seconds",
+        "The time of each decision (Game.decide_action).",
+        DECISION_BUCKETS,
+    )
+)
+SEARCH_NODES = REGISTRY.register(
+    Counter("hanabi_search_nodes_total", "Snapshots expanded by the searches.")
+)
+SEARCH_NODES_PER_SECOND = REGISTRY.register(
+    Histogram(
+        "hanabi_search_nodes_per_second",
+        "The search speed of each decision.",
+        NODES_PER_SECOND_BUCKETS,
+    )
+)
+RECONNECTS = REGISTRY.register(
+    Counter("hanabi_reconnects_total", "WebSocket connections re-established.")
+)
+ACTIVE_TABLES = REGISTRY.register(
+    Gauge(
+        "hanabi_active_tables",
+        "Games in progress, per bot account.",
+        _active_tables,
+        ["username"],
+    )
+)
+
+
+def record_decision(elapsed, stats=None):
+    """Record one decision: its time (seconds) and its SearchStats, if any."""
+    DECISION_SECONDS.observe(elapsed)
+    if stats is not None:
+        SEARCH_NODES.inc(amount=stats.nodes)
+        if stats.elapsed > 0:
+            SEARCH_NODES_PER_SECOND.observe(stats.nodes_per_second)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logger.debug("metrics request: " + format, *args)
+
+
+def start_metrics_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve the metrics at http://host:port/metrics on a background thread.
+
+    Returns the server; call its shutdown() to stop it.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics", daemon=True
+    ).start()
+    logger.info("Serving metrics on http://%s:%d/metrics.", host, server.server_port)
+    return server
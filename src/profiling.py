@@ -0,0 +1,92 @@
+"""Opt-in profiling of single decisions.
+
+A profiled decision runs under cProfile. Its profile is written to a timestamped
+".prof" file (for e.g. `python -m pstats` or snakeviz), next to a ".txt" summary of
+the top functions by cumulative and by own time.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+
+from dataclasses import dataclass
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Where the profiles are written, unless given otherwise.
+DEFAULT_PROFILE_DIR = "profiles"
+# How many functions the summary lists per ordering.
+DEFAULT_TOP = 20
+
+# Only one cProfile can be active at a time (Python 3.12+ refuses a second one).
+_profiler_lock = threading.Lock()
+
+
+@dataclass
+class ProfileReport:
+    """Where the profile of one call went, and its summary."""
+
+    path: str
+    summary_path: str
+    summary: str
+    elapsed: float
+
+
+def summarize_profile(profiler: cProfile.Profile, top=DEFAULT_TOP) -> str:
+    """The top functions of a profile, by cumulative and by own time."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+    for order in (pstats.SortKey.CUMULATIVE, pstats.SortKey.TIME):
+        stats.sort_stats(order).print_stats(top)
+    return stream.getvalue()
+
+
+def profile_call(
+    fn, *args, label="decision", output_dir=DEFAULT_PROFILE_DIR, top=DEFAULT_TOP
+):
+    """Call fn(*args) under cProfile; returns (its result, a ProfileReport).
+
+    The report is None when another profile is running (the call is then not profiled),
+    or when the profile cannot be written. An exception of the call is raised after
+    its profile was written.
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        logger.warning("another profile is running; %s is not profiled", label)
+        return fn(*args), None
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            return_value = fn(*args)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            try:
+                report = _write_profile(profiler, label, output_dir, top, elapsed)
+            except OSError as e:
+                logger.warning("cannot write the profile of %s: %s", label, e)
+                report = None
+    finally:
+        _profiler_lock.release()
+    return return_value, report
+
+
+def _write_profile(profiler, label, output_dir, top, elapsed) -> ProfileReport:
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(output_dir, f"{label}-{stamp}")
+    profiler.dump_stats(base + ".prof")
+
+    summary = summarize_profile(profiler, top)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(f"{label}: {elapsed * 1000:.1f} ms\n")
+        f.write(summary)
+    logger.info("profiled %s in %.1f ms: %s.prof", label, elapsed * 1000, base)
+    return ProfileReport(base + ".prof", base + ".txt", summary, elapsed)
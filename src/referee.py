@@ -0,0 +1,270 @@
+"""The authoritative rules of a game, as the server runs them.
+
+The referee knows the whole deck and produces the actions in the server format
+(e.g. the "action" field of "gameAction"), so that they can be fed to clients.
+"""
+
+import random
+
+from dataclasses import dataclass, field
+
+from src.constants import (
+    ACTION,
+    MAX_BOOM_NUM,
+    MAX_CARDS_PER_PLAYER,
+    MAX_CARDS_PER_RANK,
+    MAX_CLUE_NUM,
+    MAX_RANK,
+)
+
+# The clue types in the server format.
+CLUE_TYPE_COLOR = 0
+CLUE_TYPE_RANK = 1
+
+# Why a game ended, matching the server side.
+END_CONDITION_NORMAL = 1
+END_CONDITION_STRIKEOUT = 2
+END_CONDITION_TERMINATED = 4
+
+
+def deal_deck(num_suits=5, seed=None) -> list:
+    """A shuffled deck as a list of (suit_index, rank). The same seed gives the same deck."""
+    deck = [
+        (suit, rank)
+        for suit in range(num_suits)
+        for rank in range(1, MAX_RANK + 1)
+        for _ in range(MAX_CARDS_PER_RANK[suit][rank])
+    ]
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def seat_view(action: dict, player_index: int) -> dict:
+    """A server action as one player sees it: their own drawn cards are hidden."""
+    if action["type"] == "draw" and action["playerIndex"] == player_index:
+        return {**action, "suitIndex": -1, "rank": -1}
+    return action
+
+
+@dataclass
+class DeckCard:
+    """A card with its true identity."""
+
+    order: int
+    suit_index: int
+    rank: int
+
+
+@dataclass
+class Referee:
+    """Run one game by the rules, starting from a given deck."""
+
+    num_players: int
+    deck: list
+    num_suits: int = 5
+
+    hands: list = field(default_factory=list)
+    stacks: list = field(default_factory=list)
+    clue_tokens: int = MAX_CLUE_NUM
+    strikes: int = 0
+    turn: int = 0
+    current_player_index: int = 0
+    next_order: int = 0
+    # The turns left once the deck runs out; None while there are cards to draw.
+    turns_left: int = None
+    end_condition: int = None
+
+    # All actions so far, in the server format and with nothing hidden.
+    actions: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.hands = [[] for _ in range(self.num_players)]
+        self.stacks = [0] * self.num_suits
+        for player_index in range(self.num_players):
+            for _ in range(MAX_CARDS_PER_PLAYER[self.num_players]):
+                self._draw(player_index)
+
+    @property
+    def score(self) -> int:
+        if self.end_condition in (END_CONDITION_STRIKEOUT, END_CONDITION_TERMINATED):
+            return 0
+        return sum(self.stacks)
+
+    @property
+    def max_score(self) -> int:
+        return self.num_suits * MAX_RANK
+
+    def is_over(self) -> bool:
+        return self.end_condition is not None
+
+    def view(self, action: dict, player_index: int) -> dict:
+        """An action as one player sees it (see seat_view)."""
+        return seat_view(action, player_index)
+
+    def terminate(self, player_index) -> list:
+        """End the game early on request of a player. Returns the resulting actions."""
+        if self.is_over():
+            raise ValueError("The game is over.")
+        self.end_condition = END_CONDITION_TERMINATED
+        self.actions.append(
+            {
+                "type": "gameOver",
+                "endCondition": self.end_condition,
+                "playerIndex": player_index,
+            }
+        )
+        return self.actions[-1:]
+
+    def perform(self, player_index, action_type, target, value=None) -> list:
+        """Take an action as sent by a client ("action" command).
+
+        Returns the resulting actions in the server format.
+        Raises ValueError if the action is not allowed.
+        """
+        if self.is_over():
+            raise ValueError("The game is over.")
+        if player_index != self.current_player_index:
+            raise ValueError("It is not your turn.")
+
+        start = len(self.actions)
+        if action_type in (ACTION.PLAY.value, ACTION.DISCARD.value):
+            card = self._remove_from_hand(player_index, target)
+            if action_type == ACTION.PLAY.value:
+                self._play(player_index, card)
+            else:
+                if self.clue_tokens >= MAX_CLUE_NUM:
+                    self.hands[player_index].append(card)
+                    self.hands[player_index].sort(key=lambda c: c.order)
+                    raise ValueError("You cannot discard while at the maximum clues.")
+                self.clue_tokens += 1
+                self._record_discard(player_index, card, failed=False)
+            if self.next_order < len(self.deck):
+                self._draw(player_index)
+        elif action_type in (ACTION.COLOR_CLUE.value, ACTION.RANK_CLUE.value):
+            self._clue(player_index, action_type, target, value)
+        else:
+            raise ValueError(f"Unknown action type {action_type}.")
+
+        self._end_turn()
+        return self.actions[start:]
+
+    def _remove_from_hand(self, player_index, order) -> DeckCard:
+        for i, card in enumerate(self.hands[player_index]):
+            if card.order == order:
+                return self.hands[player_index].pop(i)
+        raise ValueError(f"Card {order} is not in your hand.")
+
+    def _draw(self, player_index):
+        suit, rank = self.deck[self.next_order]
+        card = DeckCard(order=self.next_order, suit_index=suit, rank=rank)
+        self.next_order += 1
+        self.hands[player_index].append(card)
+        self.actions.append(
+            {
+                "type": "draw",
+                "playerIndex": player_index,
+                "order": card.order,
+                "suitIndex": card.suit_index,
+                "rank": card.rank,
+            }
+        )
+        if self.next_order == len(self.deck):
+            # Everyone gets one more turn, including this player.
+            self.turns_left = self.num_players + 1
+
+    def _play(self, player_index, card: DeckCard):
+        if self.stacks[card.suit_index] + 1 == card.rank:
+            self.stacks[card.suit_index] = card.rank
+            if card.rank == MAX_RANK and self.clue_tokens < MAX_CLUE_NUM:
+                self.clue_tokens += 1
+            self.actions.append(
+                {
+                    "type": "play",
+                    "playerIndex": player_index,
+                    "order": card.order,
+                    "suitIndex": card.suit_index,
+                    "rank": card.rank,
+                }
+            )
+            return
+
+        # A misplay is a discard (failed) with a strike.
+        self.strikes += 1
+        self._record_discard(player_index, card, failed=True)
+        self.actions.append(
+            {"type": "strike", "num": self.strikes, "turn": self.turn, "order": card.order}
+        )
+
+    def _record_discard(self, player_index, card: DeckCard, failed: bool):
+        self.actions.append(
+            {
+                "type": "discard",
+                "playerIndex": player_index,
+                "order": card.order,
+                "suitIndex": card.suit_index,
+                "rank": card.rank,
+                "failed": failed,
+            }
+        )
+
+    def _clue(self, player_index, action_type, target, value):
+        if self.clue_tokens <= 0:
+            raise ValueError("There are no clues left.")
+        if target == player_index or not 0 <= target < self.num_players:
+            raise ValueError(f"Player {target} cannot be clued.")
+        if action_type == ACTION.COLOR_CLUE.value:
+            clue_type = CLUE_TYPE_COLOR
+            touched = [c.order for c in self.hands[target] if c.suit_index == value]
+        else:
+            clue_type = CLUE_TYPE_RANK
+            touched = [c.order for c in self.hands[target] if c.rank == value]
+        if len(touched) == 0:
+            raise ValueError("A clue must touch at least one card.")
+
+        self.clue_tokens -= 1
+        self.actions.append(
+            {
+                "type": "clue",
+                "clue": {"type": clue_type, "value": value},
+                "giver": player_index,
+                "list": touched,
+                "target": target,
+                "turn": self.turn,
+            }
+        )
+
+    def _end_turn(self):
+        self.turn += 1
+        self.current_player_index = self.turn % self.num_players
+        if self.turns_left is not None:
+            self.turns_left -= 1
+
+        if self.strikes >= MAX_BOOM_NUM:
+            self.end_condition = END_CONDITION_STRIKEOUT
+        elif sum(self.stacks) == self.max_score or self.turns_left == 0:
+            self.end_condition = END_CONDITION_NORMAL
+
+        self.actions.append(
+            {
+                "type": "status",
+                "clues": self.clue_tokens,
+                "score": sum(self.stacks),
+                "maxScore": self.max_score,
+            }
+        )
+        if self.is_over():
+            self.actions.append(
+                {
+                    "type": "gameOver",
+                    "endCondition": self.end_condition,
+                    "playerIndex": self.current_player_index,
+                }
+            )
+            return
+        self.actions.append(
+            {
+                "type": "turn",
+                "num": self.turn,
+                "currentPlayerIndex": self.current_player_index,
+            }
+        )
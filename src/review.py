@@ -0,0 +1,279 @@
+"""Post-game review: what the bot would have done at every turn of a finished game.
+
+A finished game is its action log in the server format (as in "gameActionList"), with
+the player names. Every turn is rebuilt from the view of the player who acted (their
+own draws hidden), the search engine ranks the actions of that player, and the report
+compares its best action with the actual one: "bot would have done X, score delta Y",
+where the delta is the evaluation of X minus the evaluation of the actual action.
+The turns are independent, so they are reviewed in parallel across processes.
+
+Usage: python -m src.review GAME.json [GAME.json ...] [--processes K] [--json]
+                                                      [--disagreements]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from src.action import Action, parse_server_action
+from src.constants import ACTION
+from src.conventions import evaluate, evaluate_action
+from src.game import DECISION_SEARCH_LEVEL, Game
+from src.referee import CLUE_TYPE_COLOR, CLUE_TYPE_RANK, seat_view
+from src.simulator import new_seat
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TurnReview:
+    """The review of one turn. The scores are None if the engine could not evaluate."""
+
+    turn: int
+    player_index: int
+    actual: str
+    suggested: Optional[str] = None
+    actual_score: Optional[int] = None
+    suggested_score: Optional[int] = None
+    # Whether the bot would have done the same as the player.
+    agrees: bool = False
+
+    @property
+    def score_delta(self) -> Optional[int]:
+        if self.actual_score is None or self.suggested_score is None:
+            return None
+        return self.suggested_score - self.actual_score
+
+
+def export_game(game: Game) -> dict:
+    """A finished game as a record for review: the player names and its action log.
+
+    The cards which were drawn hidden but later played or discarded are revealed.
+    """
+    revealed = {}
+    for action in game.action_history:
+        if action.action_type in (ACTION.PLAY.value, ACTION.DISCARD.value):
+            revealed[action.card.order] = (action.card.suit_index, action.card.rank)
+
+    actions = []
+    for action in game.action_history:
+        if action.action_type in (ACTION.COLOR_CLUE.value, ACTION.RANK_CLUE.value):
+            clue = action.clue
+            actions.append(
+                {
+                    "type": "clue",
+                    "clue": {
+                        "type": (
+                            CLUE_TYPE_COLOR
+                            if clue.hint_type == ACTION.COLOR_CLUE.value
+                            else CLUE_TYPE_RANK
+                        ),
+                        "value": clue.hint_value,
+                    },
+                    "giver": action.player_index,
+                    "list": list(clue.touched_orders),
+                    "target": clue.receiver_index,
+                    "turn": clue.turn,
+                }
+            )
+            continue
+
+        card = action.card
+        suit_index, rank = revealed.get(card.order, (card.suit_index, card.rank))
+        data = {
+            "type": "draw",
+            "playerIndex": action.player_index,
+            "order": card.order,
+            "suitIndex": suit_index,
+            "rank": rank,
+        }
+        if action.action_type == ACTION.PLAY.value and not action.boom:
+            data["type"] = "play"
+        elif action.action_type in (ACTION.PLAY.value, ACTION.DISCARD.value):
+            data["type"] = "discard"
+            data["failed"] = action.boom
+        actions.append(data)
+
+    return {
+        "players": list(game.player_names),
+        "numSuits": game.num_suits,
+        "actions": actions,
+    }
+
+
+def save_game(path, record: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+
+def load_game(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def describe_action(action: Action, player_names) -> str:
+    """A short text of an action, e.g. "Alice plays #12 (s1 r3)"."""
+    name = player_names[action.player_index]
+    if action.action_type in (ACTION.COLOR_CLUE.value, ACTION.RANK_CLUE.value):
+        kind = "color" if action.action_type == ACTION.COLOR_CLUE.value else "rank"
+        receiver = player_names[action.clue.receiver_index]
+        return f"{name} clues {receiver} {kind} {action.clue.hint_value}"
+    verb = "discards"
+    if action.action_type == ACTION.PLAY.value:
+        verb = "misplays" if action.boom else "plays"
+    text = f"{name} {verb} #{action.card.order}"
+    if action.card.rank > 0:
+        text += f" (s{action.card.suit_index} r{action.card.rank})"
+    return text
+
+
+def _same_choice(a: Action, b: Action) -> bool:
+    if a.action_type != b.action_type or a.player_index != b.player_index:
+        return False
+    if a.action_type in (ACTION.COLOR_CLUE.value, ACTION.RANK_CLUE.value):
+        return (a.clue.receiver_index, a.clue.hint_value) == (
+            b.clue.receiver_index,
+            b.clue.hint_value,
+        )
+    return a.card.order == b.card.order
+
+
+def _turn_positions(actions) -> list:
+    """The positions in the log of the actions which take a turn."""
+    return [
+        position
+        for position, data in enumerate(actions)
+        if data["type"] in ("clue", "play", "discard")
+    ]
+
+
+def review_turn(record: dict, position: int, search_level=DECISION_SEARCH_LEVEL):
+    """Review the action at a position of the log (see review_game)."""
+    actions = record["actions"]
+    names = record["players"]
+    data = actions[position]
+    player_index = data["giver"] if data["type"] == "clue" else data["playerIndex"]
+    actual = parse_server_action(seat_view(data, player_index))
+    review = TurnReview(
+        turn=sum(a["type"] in ("clue", "play", "discard") for a in actions[:position]),
+        player_index=player_index,
+        actual=describe_action(actual, names),
+    )
+
+    game = new_seat(len(names), player_index, record.get("numSuits", 5))
+    game.player_names = list(names)
+    past = (parse_server_action(seat_view(a, player_index)) for a in actions[:position])
+    game.replay([action for action in past if action is not None])
+    snapshot = game.decision_snapshot()
+    try:
+        ranked = evaluate(snapshot, player_index, player_index, search_level)
+    except Exception as e:
+        logger.debug("turn %d: the search failed: %s", review.turn, e)
+        ranked = []
+    if ranked:
+        review.suggested = describe_action(ranked[0], names)
+        review.suggested_score = ranked[0].score
+        review.agrees = _same_choice(ranked[0], actual)
+
+    for action in ranked:
+        if _same_choice(action, actual):
+            review.actual_score = action.score
+            break
+    else:
+        # The conventions would not have considered it; evaluate it anyway.
+        try:
+            review.actual_score = evaluate_action(
+                snapshot, actual, player_index, search_level
+            )
+        except Exception as e:
+            logger.debug(
+                "turn %d: cannot evaluate the actual action: %s", review.turn, e
+            )
+    return review
+
+
+def _init_worker(log_level):
+    # The engine warns a lot about its own views; keep the workers quiet.
+    logging.basicConfig(level=log_level)
+    logging.getLogger().setLevel(log_level)
+
+
+def _review_job(job) -> TurnReview:
+    return review_turn(*job)
+
+
+def review_games(
+    records, processes=None, search_level=DECISION_SEARCH_LEVEL, log_level=logging.ERROR
+):
+    """Review every turn of the games on a process pool.
+
+    Yields (index of the game, TurnReview) in the order of the games and turns.
+    """
+    jobs = []
+    owners = []
+    for index, record in enumerate(records):
+        for position in _turn_positions(record["actions"]):
+            jobs.append((record, position, search_level))
+            owners.append(index)
+    if processes == 1:
+        _init_worker(log_level)
+        yield from zip(owners, map(_review_job, jobs))
+        return
+
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(log_level,)
+    ) as pool:
+        yield from zip(owners, pool.imap(_review_job, jobs, chunksize=4))
+
+
+def review_game(record: dict, processes=None, search_level=DECISION_SEARCH_LEVEL):
+    """The reviews of all turns of one game, in turn order."""
+    return [
+        review
+        for _, review in review_games([record], processes, search_level=search_level)
+    ]
+
+
+def format_review(review: TurnReview) -> str:
+    line = f"turn {review.turn + 1}: {review.actual}"
+    if review.suggested is None:
+        return line + "; the bot has no suggestion"
+    if review.agrees:
+        return line + "; the bot agrees"
+    delta = review.score_delta
+    delta = "unknown" if delta is None else f"{delta:+d}"
+    return line + f"; bot would have done: {review.suggested}, score delta {delta}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("games", nargs="+", help="game records (see export_game)")
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--level", type=int, default=DECISION_SEARCH_LEVEL)
+    parser.add_argument(
+        "--disagreements", action="store_true", help="only the turns the bot disagrees"
+    )
+    parser.add_argument("--json", action="store_true", help="one JSON line per turn")
+    args = parser.parse_args()
+
+    records = [load_game(path) for path in args.games]
+    current = None
+    for index, review in review_games(records, args.processes, args.level):
+        if args.disagreements and review.agrees:
+            continue
+        if args.json:
+            print(json.dumps({"game": args.games[index], **asdict(review)}))
+            continue
+        if index != current:
+            current = index
+            print(f"== {os.path.basename(args.games[index])}")
+        print(format_review(review))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""A compact, versioned binary encoding of Snapshot and Game.
+
+The encoding round-trips exactly, including which cards are the same object (e.g. the
+initial cards and the hands of a first snapshot). It is made of fixed-width records:
+
+    header    magic (b"HSNP" or b"HGAM"), version, and the amount of each record
+    cards     16 bytes each: order, rank, suit, owner, status code, the negative
+              suits and ranks (one nibble each, in order), and the amount of clues
+              and finesses which follow the card in their own tables
+    clues     8 bytes each: type, value, giver, receiver, turn, classification, and
+              the amount of touched orders
+    finesses  7 bytes each
+    extras    int16 each: touched orders, finesse receivers and actionable paths
+    ints      int16 each: the structure (token counts, lists of card indexes, actions)
+    strings   UTF-8 player names
+
+All numbers are little-endian. Everything is decoded in the order it was encoded.
+"""
+
+import struct
+import sys
+
+from array import array
+
+from src.action import Action
+from src.card import Card
+from src.clue import Clue
+from src.constants import Status
+from src.finesse import Finesse
+from src.game import Game
+from src.snapshot import Snapshot
+
+FORMAT_VERSION = 2
+SNAPSHOT_MAGIC = b"HSNP"
+GAME_MAGIC = b"HGAM"
+
+_HEADER = struct.Struct("<4sBIIIIII")
+_CARD = struct.Struct("<hbbbBIIBB")
+_CLUE = struct.Struct("<bbbbhbB")
+_FINESSE = struct.Struct("<bb?bBBB")
+_STATUSES = {status.value: status for status in Status}
+# The arrays are written little-endian whatever the machine.
+_SWAP = sys.byteorder == "big"
+
+
+def _pack_nibbles(values) -> int:
+    """Up to 8 small values (0 to 14), in order, one per nibble; 0 ends the list."""
+    if len(values) > 8:
+        raise ValueError(f"Cannot encode more than 8 negative values: {values}")
+    packed = 0
+    for i, value in enumerate(values):
+        if not 0 <= value < 15:
+            raise ValueError(f"Cannot encode the negative value {value}.")
+        packed |= (value + 1) << (4 * i)
+    return packed
+
+
+def _unpack_nibbles(packed) -> list:
+    values = []
+    while packed:
+        values.append((packed & 0xF) - 1)
+        packed >>= 4
+    return values
+
+
+class _Encoder:
+    def __init__(self):
+        self.ints = array("h")
+        self.cards = []
+        self.card_indexes = {}
+        # The clues of actions, encoded after the clues of the cards.
+        self.action_clues = []
+        self.names = []
+
+    # Structure.
+
+    def card_ref(self, card):
+        if card is None:
+            self.ints.append(-1)
+            return
+        index = self.card_indexes.get(id(card))
+        if index is None:
+            index = self.card_indexes[id(card)] = len(self.cards)
+            self.cards.append(card)
+        self.ints.append(index)
+
+    def card_list(self, cards):
+        self.ints.append(len(cards))
+        for card in cards:
+            self.card_ref(card)
+
+    def actions(self, actions):
+        ints = self.ints
+        ints.append(len(actions))
+        for action in actions:
+            ints.append(action.action_type)
+            ints.append(action.player_index)
+            self.card_ref(action.card)
+            ints.append(action.clue is not None)
+            if action.clue is not None:
+                self.action_clues.append(action.clue)
+            ints.append(action.boom)
+            ints.append(action.score)
+
+    def snapshot(self, s: Snapshot):
+        self.ints.extend(
+            (
+                s.clue_tokens,
+                s.boom_tokens,
+                s.num_suits,
+                s.num_remaining_cards,
+                s.post_draw_turns,
+                s.num_players,
+                s.start_player_index,
+            )
+        )
+        self.card_list(s.play_pile)
+        self.card_list(s.discard_pile)
+        self.ints.append(len(s.hands))
+        for hand in s.hands:
+            self.card_list(hand)
+        self.card_list(s.initial_cards)
+        self.actions(s.action_history)
+
+    def int_lists(self, mapping: dict):
+        self.ints.append(len(mapping))
+        for key, values in mapping.items():
+            self.ints.append(key)
+            self.ints.append(len(values))
+            self.ints.extend(values)
+
+    def game(self, g: Game):
+        self.ints.extend(
+            (
+                g.clue_tokens,
+                g.boom_tokens,
+                g.num_suits,
+                g.our_player_index,
+                g.checkpoint_interval,
+                len(g.player_names),
+            )
+        )
+        self.names = [name.encode("utf-8") for name in g.player_names]
+        self.ints.extend(len(name) for name in self.names)
+        self.card_list(g.play_pile)
+        self.card_list(g.discard_pile)
+        self.int_lists(g.clued_colors)
+        self.int_lists(g.clued_ranks)
+        self.ints.append(len(g.player_hands))
+        for hand in g.player_hands:
+            self.card_list(hand)
+        self.ints.append(len(g.snapshot_history))
+        for s in g.snapshot_history:
+            self.snapshot(s)
+        self.actions(g.action_history)
+        self.actions(g.event_log)
+
+    # Records.
+
+    def finish(self, magic) -> bytes:
+        card_records = []
+        clue_records = []
+        finesse_records = []
+        extras = array("h")
+
+        def add_clue(clue: Clue):
+            clue_records.append(
+                _CLUE.pack(
+                    clue.hint_type,
+                    clue.hint_value,
+                    clue.giver_index,
+                    clue.receiver_index,
+                    clue.turn,
+                    clue.classification,
+                    len(clue.touched_orders),
+                )
+            )
+            extras.extend(clue.touched_orders)
+
+        for card in self.cards:
+            card_records.append(
+                _CARD.pack(
+                    card.order,
+                    card.rank,
+                    card.suit_index,
+                    card.owner_index,
+                    card.status.value,
+                    _pack_nibbles(card.negative_colors),
+                    _pack_nibbles(card.negative_ranks),
+                    len(card.clues),
+                    len(card.finesses),
+                )
+            )
+            for clue in card.clues:
+                add_clue(clue)
+            for finesse in card.finesses:
+                finesse_records.append(
+                    _FINESSE.pack(
+                        finesse.rank,
+                        finesse.suit,
+                        finesse.urgent,
+                        finesse.giver,
+                        len(finesse.clues),
+                        len(finesse.actionable_paths),
+                        len(finesse.receivers),
+                    )
+                )
+                for clue in finesse.clues:
+                    add_clue(clue)
+                for path in finesse.actionable_paths:
+                    extras.append(len(path))
+                    extras.extend(path)
+                extras.extend(finesse.receivers)
+        for clue in self.action_clues:
+            add_clue(clue)
+
+        ints = self.ints
+        if _SWAP:
+            ints = array("h", ints)
+            ints.byteswap()
+            extras.byteswap()
+        strings = b"".join(self.names)
+        return b"".join(
+            [
+                _HEADER.pack(
+                    magic,
+                    FORMAT_VERSION,
+                    len(card_records),
+                    len(clue_records),
+                    len(finesse_records),
+                    len(extras),
+                    len(ints),
+                    len(strings),
+                ),
+                *card_records,
+                *clue_records,
+                *finesse_records,
+                extras.tobytes(),
+                ints.tobytes(),
+                strings,
+            ]
+        )
+
+
+class _Decoder:
+    def __init__(self, data: bytes, magic):
+        if len(data) < _HEADER.size:
+            raise ValueError("The data is too short for a header.")
+        (
+            found_magic,
+            version,
+            num_cards,
+            num_clues,
+            num_finesses,
+            num_extras,
+            num_ints,
+            strings_size,
+        ) = _HEADER.unpack_from(data)
+        if found_magic != magic:
+            raise ValueError(f"Expected {magic!r} data, got {found_magic!r}.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {version}.")
+
+        offset = _HEADER.size
+        sizes = [
+            num_cards * _CARD.size,
+            num_clues * _CLUE.size,
+            num_finesses * _FINESSE.size,
+            num_extras * 2,
+            num_ints * 2,
+            strings_size,
+        ]
+        if len(data) != offset + sum(sizes):
+            raise ValueError("The data does not match the sizes in its header.")
+        # The blocks, in the order of the sizes.
+        blocks = []
+        for size in sizes:
+            blocks.append(memoryview(data)[offset : offset + size])
+            offset += size
+
+        self.extras = array("h", blocks[3].tobytes())
+        ints = array("h", blocks[4].tobytes())
+        if _SWAP:
+            self.extras.byteswap()
+            ints.byteswap()
+        self.ints = ints.tolist()
+        self.extras = self.extras.tolist()
+        self.strings = bytes(blocks[5])
+        self.position = 0
+        self.extras_position = 0
+        self.clues = _CLUE.iter_unpack(blocks[1])
+        finesses = _FINESSE.iter_unpack(blocks[2])
+        self.cards = [
+            self._card(record, finesses) for record in _CARD.iter_unpack(blocks[0])
+        ]
+
+    # Records.
+
+    def _take_extras(self, n) -> list:
+        start = self.extras_position
+        self.extras_position += n
+        return self.extras[start : start + n]
+
+    def _clue(self) -> Clue:
+        hint_type, hint_value, giver, receiver, turn, classification, n = next(
+            self.clues
+        )
+        return Clue(
+            hint_type=hint_type,
+            hint_value=hint_value,
+            giver_index=giver,
+            receiver_index=receiver,
+            turn=turn,
+            classification=classification,
+            touched_orders=self._take_extras(n),
+        )
+
+    def _card(self, record, finesses) -> Card:
+        (
+            order,
+            rank,
+            suit_index,
+            owner_index,
+            status,
+            negative_colors,
+            negative_ranks,
+            num_clues,
+            num_finesses,
+        ) = record
+        card = Card(
+            order=order,
+            rank=rank,
+            suit_index=suit_index,
+            owner_index=owner_index,
+            negative_colors=_unpack_nibbles(negative_colors),
+            negative_ranks=_unpack_nibbles(negative_ranks),
+            status=_STATUSES[status],
+            clues=[self._clue() for _ in range(num_clues)],
+        )
+        for _ in range(num_finesses):
+            rank, suit, urgent, giver, num_clues, num_paths, num_receivers = next(
+                finesses
+            )
+            clues = [self._clue() for _ in range(num_clues)]
+            paths = [self._take_extras(self._take_extras(1)[0]) for _ in range(num_paths)]
+            card.finesses.append(
+                Finesse(
+                    rank=rank,
+                    suit=suit,
+                    urgent=urgent,
+                    clues=clues,
+                    actionable_paths=paths,
+                    giver=giver,
+                    receivers=self._take_extras(num_receivers),
+                )
+            )
+        return card
+
+    # Structure.
+
+    def take(self, n) -> list:
+        start = self.position
+        self.position += n
+        return self.ints[start : start + n]
+
+    def next(self) -> int:
+        self.position += 1
+        return self.ints[self.position - 1]
+
+    def card_ref(self):
+        index = self.next()
+        return None if index < 0 else self.cards[index]
+
+    def card_list(self) -> list:
+        cards = self.cards
+        return [cards[index] for index in self.take(self.next())]
+
+    def actions(self) -> list:
+        actions = []
+        for _ in range(self.next()):
+            action_type, player_index, card_index, has_clue = self.take(4)
+            card = None if card_index < 0 else self.cards[card_index]
+            clue = self._clue() if has_clue else None
+            boom, score = self.take(2)
+            actions.append(
+                Action(
+                    action_type=action_type,
+                    player_index=player_index,
+                    card=card,
+                    clue=clue,
+                    boom=bool(boom),
+                    score=score,
+                )
+            )
+        return actions
+
+    def snapshot(self) -> Snapshot:
+        (
+            clue_tokens,
+            boom_tokens,
+            num_suits,
+            num_remaining_cards,
+            post_draw_turns,
+            num_players,
+            start_player_index,
+        ) = self.take(7)
+        return Snapshot(
+            clue_tokens=clue_tokens,
+            boom_tokens=boom_tokens,
+            num_suits=num_suits,
+            num_remaining_cards=num_remaining_cards,
+            post_draw_turns=post_draw_turns,
+            num_players=num_players,
+            start_player_index=start_player_index,
+            play_pile=self.card_list(),
+            discard_pile=self.card_list(),
+            hands=[self.card_list() for _ in range(self.next())],
+            initial_cards=self.card_list(),
+            action_history=self.actions(),
+        )
+
+    def int_lists(self) -> dict:
+        mapping = {}
+        for _ in range(self.next()):
+            key = self.next()
+            mapping[key] = self.take(self.next())
+        return mapping
+
+    def game(self) -> Game:
+        (
+            clue_tokens,
+            boom_tokens,
+            num_suits,
+            our_player_index,
+            checkpoint_interval,
+            num_names,
+        ) = self.take(6)
+        names = []
+        offset = 0
+        for size in self.take(num_names):
+            names.append(self.strings[offset : offset + size].decode("utf-8"))
+            offset += size
+        return Game(
+            clue_tokens=clue_tokens,
+            boom_tokens=boom_tokens,
+            num_suits=num_suits,
+            player_names=names,
+            play_pile=self.card_list(),
+            discard_pile=self.card_list(),
+            clued_colors=self.int_lists(),
+            clued_ranks=self.int_lists(),
+            player_hands=[self.card_list() for _ in range(self.next())],
+            our_player_index=our_player_index,
+            snapshot_history=[self.snapshot() for _ in range(self.next())],
+            checkpoint_interval=checkpoint_interval,
+            action_history=self.actions(),
+            event_log=self.actions(),
+        )
+
+    def done(self, value):
+        if self.position != len(self.ints):
+            raise ValueError("The data has trailing structure.")
+        return value
+
+
+def _encode(magic, encode, obj) -> bytes:
+    encoder = _Encoder()
+    try:
+        encode(encoder, obj)
+        return encoder.finish(magic)
+    except (OverflowError, struct.error) as e:
+        raise ValueError(f"A value does not fit the encoding: {e}") from e
+
+
+def _decode(magic, decode, data):
+    try:
+        decoder = _Decoder(data, magic)
+        return decoder.done(decode(decoder))
+    except (StopIteration, IndexError, KeyError, TypeError, struct.error) as e:
+        # The structure refers to records or values which are not there.
+        raise ValueError(f"The data is corrupt: {e!r}") from e
+
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    """Encode a snapshot; see decode_snapshot. The stats of actions are not kept.
+
+    Raises ValueError for values which do not fit their fields (e.g. int16).
+    """
+    return _encode(SNAPSHOT_MAGIC, _Encoder.snapshot, snapshot)
+
+
+def decode_snapshot(data: bytes) -> Snapshot:
+    """Decode a snapshot from encode_snapshot(); raises ValueError on other data."""
+    return _decode(SNAPSHOT_MAGIC, _Decoder.snapshot, data)
+
+
+def encode_game(game: Game) -> bytes:
+    """Encode a game with its snapshot history; see decode_game."""
+    return _encode(GAME_MAGIC, _Encoder.game, game)
+
+
+def decode_game(data: bytes) -> Game:
+    """Decode a game from encode_game(); raises ValueError on other data."""
+    return _decode(GAME_MAGIC, _Decoder.game, data)
@@ -0,0 +1,81 @@
+"""The per-table session of one bot account."""
+
+import threading
+
+from collections import deque
+
+from src.action import Action, client_action_payload
+
+# The default humanizing delay (in seconds) before sending our action to a table.
+DEFAULT_ACTION_DELAY = 2
+# The amount of recent decisions kept per table for "/stats".
+DECISION_WINDOW = 20
+# Measure the memory of the game after every this many decisions of a table.
+MEMORY_SAMPLE_INTERVAL = 10
+
+
+class TableSession:
+    """Everything one bot account keeps per table besides the game itself.
+
+    A session owns the decisions and the outgoing actions of its table, so that one
+    account can play several tables at once without sending moves to the wrong game.
+    """
+
+    def __init__(self, table_id, send, action_delay=DEFAULT_ACTION_DELAY):
+        self.table_id = table_id
+        # The humanizing delay (in seconds) before sending an action.
+        self.action_delay = action_delay
+        # Whether each decision of this table is profiled (see src.profiling).
+        self.profiling = False
+        # The recent decisions of this table: (seconds, SearchStats or None).
+        self.decisions = deque(maxlen=DECISION_WINDOW)
+        self.num_decisions = 0
+        # The size of the game (bytes) as last measured by a decision worker, if ever.
+        self.memory = None
+        # Serializes the game updates and the decisions of this table.
+        self.lock = threading.RLock()
+        self._send = send
+        self._pending_action = None
+
+    def record_decision(self, elapsed, stats=None):
+        self.decisions.append((elapsed, stats))
+        self.num_decisions += 1
+
+    def memory_due(self) -> bool:
+        """Whether the game should be measured again (see MEMORY_SAMPLE_INTERVAL)."""
+        return self.memory is None or self.num_decisions % MEMORY_SAMPLE_INTERVAL == 0
+
+    def perform_action(self, action: Action):
+        """Send an action of our player to this table."""
+        self.send_action(client_action_payload(action))
+
+    def send_action(self, data):
+        """Send an action after the humanizing delay.
+
+        The delay is scheduled on a timer instead of sleeping, so that the WebSocket
+        thread keeps receiving messages in the meantime.
+        """
+        data = {"tableID": self.table_id, **data}
+        if self.action_delay <= 0:
+            self._send("action", data)
+            return
+
+        self.cancel()
+        timer = threading.Timer(self.action_delay, self._send_pending, args=(data,))
+        timer.daemon = True
+        self._pending_action = timer
+        timer.start()
+
+    def cancel(self):
+        """Cancel the pending action, if any."""
+        timer = self._pending_action
+        self._pending_action = None
+        if timer is not None:
+            timer.cancel()
+
+    def has_pending_action(self) -> bool:
+        return self._pending_action is not None
+
+    def _send_pending(self, data):
+        self._pending_action = None
+        self._send("action", data)
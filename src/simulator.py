@@ -0,0 +1,154 @@
+"""Headless self-play: bots play whole games against each other without any network.
+
+The Referee runs the game with the true deck, and every seat has its own Game which
+only gets what that player would see from the server (i.e. their own draws hidden).
+"""
+
+import logging
+import time
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.action import Action, client_action_payload, parse_server_action
+from src.clue import Clue
+from src.constants import ACTION, MAX_CLUE_NUM
+from src.game import Game, fallback_action
+from src.referee import Referee, deal_deck
+
+logger = logging.getLogger(__name__)
+
+# Stop a game which runs longer than this many turns (e.g. endless clues).
+MAX_TURNS = 200
+
+
+@dataclass
+class GameResult:
+    """The outcome of one self-play game."""
+
+    seed: int
+    num_players: int
+    score: int = 0
+    max_score: int = 0
+    strikes: int = 0
+    turns: int = 0
+    end_condition: int = None
+    # Decisions which raised or were illegal, replaced by a fallback action.
+    failed_decisions: int = 0
+    # The time (in seconds) of each decision, in turn order.
+    decision_times: list = field(default_factory=list)
+    # The snapshots expanded by the searches of all decisions (see SearchStats).
+    search_nodes: int = 0
+
+    @property
+    def perfect(self) -> bool:
+        return self.score == self.max_score
+
+
+def new_seat(num_players, player_index, num_suits=5) -> Game:
+    """The game of one seat, as HanabiClient sets it up on "init"."""
+    game = Game()
+    game.player_names = [f"player{i}" for i in range(num_players)]
+    game.our_player_index = player_index
+    game.player_hands = [[] for _ in range(num_players)]
+    game.num_suits = num_suits
+    return game
+
+
+class SelfPlayGame:
+    """One game with a bot in every seat.
+
+    "decide" chooses the action of a seat from its Game (Game.decide_action by default).
+    """
+
+    def __init__(
+        self,
+        num_players=2,
+        seed=None,
+        decide: Callable[[Game], Action] = None,
+        max_turns=MAX_TURNS,
+    ):
+        self.decide = decide if decide is not None else Game.decide_action
+        self.max_turns = max_turns
+        self.referee = Referee(num_players=num_players, deck=deal_deck(seed=seed))
+        self.seats = [
+            new_seat(num_players, i, self.referee.num_suits) for i in range(num_players)
+        ]
+        self.result = GameResult(seed=seed, num_players=num_players)
+        # The action decided at each turn (with its score and SearchStats), or None if
+        # the decision failed.
+        self.decisions = []
+        self._deliver(self.referee.actions, bulk=True)
+
+    def is_over(self) -> bool:
+        return self.referee.is_over() or self.referee.turn >= self.max_turns
+
+    def step(self):
+        """Let the current player decide and take their action."""
+        player_index = self.referee.current_player_index
+        game = self.seats[player_index]
+
+        started = time.perf_counter()
+        try:
+            action = self.decide(game)
+        except Exception as e:
+            logger.debug("decision of seat %d failed: %s", player_index, e)
+            action = None
+        self.result.decision_times.append(time.perf_counter() - started)
+        self.decisions.append(action)
+        if action is not None and action.stats is not None:
+            self.result.search_nodes += action.stats.nodes
+
+        new_actions = None
+        if action is not None:
+            try:
+                new_actions = self._perform(player_index, action)
+            except (ValueError, AttributeError, TypeError) as e:
+                logger.debug("illegal action of seat %d: %s", player_index, e)
+        if new_actions is None:
+            self.result.failed_decisions += 1
+            new_actions = self._perform(player_index, fallback_action(game))
+        self._deliver(new_actions)
+
+    def play(self) -> GameResult:
+        """Play until the game is over."""
+        while not self.is_over():
+            self.step()
+
+        referee = self.referee
+        self.result.score = referee.score
+        self.result.max_score = referee.max_score
+        self.result.strikes = referee.strikes
+        self.result.turns = referee.turn
+        self.result.end_condition = referee.end_condition
+        return self.result
+
+    def _perform(self, player_index, action: Action) -> list:
+        payload = client_action_payload(action)
+        return self.referee.perform(
+            player_index, payload["type"], payload["target"], payload.get("value")
+        )
+
+    def _deliver(self, server_actions, bulk=False):
+        """Feed server actions into every seat, each with its own view."""
+        for player_index, game in enumerate(self.seats):
+            actions = [
+                parse_server_action(self.referee.view(data, player_index))
+                for data in server_actions
+            ]
+            actions = [action for action in actions if action is not None]
+            if bulk:
+                game.replay(actions)
+            else:
+                for action in actions:
+                    game.handle_action(action)
+
+
+def play_game(
+    num_players=2,
+    seed=None,
+    decide: Callable[[Game], Action] = None,
+    max_turns=MAX_TURNS,
+) -> GameResult:
+    """Play one self-play game; see SelfPlayGame."""
+    return SelfPlayGame(num_players, seed, decide, max_turns).play()
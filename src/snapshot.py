@@ -1,6 +1,7 @@
 """The game snapshot of a moment."""
 
 import copy
+import logging
 
 from dataclasses import dataclass, field
 from typing import Optional
@@ -18,7 +19,9 @@ from src.constants import (
     Status,
 )
 from src.finesse import Finesse
-from src.utils import dump, printf
+from src.utils import dump
+
+logger = logging.getLogger(__name__)
 
 
 # This is just a reference. For a fully-fledged bot, the game state would need
@@ -71,20 +74,35 @@ class Snapshot:
         """Return the next snapshot after taking the action.
         The action is assumed to be game-valid.
         """
-        next_snapshot = Snapshot(
+        next_snapshot = self.copy()
+        next_snapshot.apply(action, viewer_index)
+        return next_snapshot
+
+    def copy(self):
+        """Return a deep copy of this snapshot."""
+        return Snapshot(
             clue_tokens=self.clue_tokens,
             boom_tokens=self.boom_tokens,
             num_suits=self.num_suits,
+            num_remaining_cards=self.num_remaining_cards,
+            post_draw_turns=self.post_draw_turns,
             num_players=self.num_players,
+            start_player_index=self.start_player_index,
             play_pile=copy.deepcopy(self.play_pile),
             discard_pile=copy.deepcopy(self.discard_pile),
             hands=[copy.deepcopy(hand) for hand in self.hands],
             initial_cards=copy.deepcopy(self.initial_cards),
             action_history=copy.deepcopy(self.action_history),
         )
-        next_snapshot._perform_action(action, viewer_index)
-        next_snapshot.action_history.append(action)
-        return next_snapshot
+
+    def apply(self, action: Action, viewer_index=None):
+        """Take the action on this snapshot in place.
+        The action is assumed to be game-valid. Draws are not recorded in the action
+        history, since they complete the turn of the previous action.
+        """
+        self._perform_action(action, viewer_index)
+        if action.action_type != ACTION.DRAW.value:
+            self.action_history.append(action)
 
     def get_valid_actions(self, viewer_index: int, player_index: int) -> list:
         """Get all game-valid actions for a player from a viewer's view.
@@ -527,9 +545,10 @@ class Snapshot:
         for i, card in enumerate(self.hands[player_index]):
             if card.order == order:
                 return i
-        printf(
-            "error: unable to find card with order " + str(order) + " in "
-            "the hand of player " + str(player_index)
+        logger.error(
+            "unable to find card with order %s in the hand of player %s",
+            order,
+            player_index,
         )
         return None
 
@@ -0,0 +1,217 @@
+"""Self-play tournaments: many seeded games spread across a pool of processes.
+
+Each finished game is appended to a results file as one JSON line, so a long run can
+be watched, interrupted and summarized at any time. The same seeds always give the
+same games.
+
+Usage: python -m src.tournament [--games N] [--players P] [--seed S] [--processes K]
+                                [--output results.jsonl] [--policy bot|fallback]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import random
+import time
+
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+
+from src.game import fallback_action
+from src.referee import END_CONDITION_STRIKEOUT
+from src.simulator import play_game
+from src.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+# The decision policies a tournament can run; None means Game.decide_action.
+POLICIES = {
+    "bot": None,
+    "fallback": fallback_action,
+}
+
+
+def _init_worker(log_level):
+    # The engine warns a lot about its own views; keep the workers quiet.
+    logging.basicConfig(level=log_level)
+    logging.getLogger().setLevel(log_level)
+
+
+def _play(job) -> dict:
+    seed, num_players, policy = job
+    # Anything random in the engine depends on the seed only.
+    random.seed(seed)
+    started = time.perf_counter()
+    result = play_game(num_players=num_players, seed=seed, decide=POLICIES[policy])
+    record = asdict(result)
+    record["policy"] = policy
+    record["wall_time"] = time.perf_counter() - started
+    return record
+
+
+def play_games(
+    seeds, num_players=2, policy="bot", processes=None, log_level=logging.ERROR
+):
+    """Play a game per seed on a process pool; yields the results in seed order."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy}; choose from {list(POLICIES)}.")
+    jobs = [(seed, num_players, policy) for seed in seeds]
+    if processes == 1:
+        _init_worker(log_level)
+        for job in jobs:
+            yield _play(job)
+        return
+
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(log_level,)
+    ) as pool:
+        yield from pool.imap(_play, jobs, chunksize=4)
+
+
+@dataclass
+class TournamentSummary:
+    """The aggregate of a tournament. Times are in seconds."""
+
+    games: int = 0
+    score_distribution: dict = field(default_factory=dict)
+    mean_score: float = 0
+    perfect_rate: float = 0
+    strikeout_rate: float = 0
+    failed_decisions: int = 0
+    decisions: int = 0
+    decision_mean: float = None
+    decision_p50: float = None
+    decision_p95: float = None
+    decision_p99: float = None
+    decision_max: float = None
+    search_nodes: int = 0
+    nodes_per_second: float = None
+
+
+def summarize(results) -> TournamentSummary:
+    """Aggregate game results, e.g. from play_games() or load_results()."""
+    summary = TournamentSummary()
+    scores = Counter()
+    perfect = strikeouts = 0
+    decision_times = []
+    for result in results:
+        summary.games += 1
+        scores[result["score"]] += 1
+        perfect += result["score"] == result["max_score"]
+        strikeouts += result["end_condition"] == END_CONDITION_STRIKEOUT
+        summary.failed_decisions += result["failed_decisions"]
+        decision_times.extend(result["decision_times"])
+        # Older results files have no search stats.
+        summary.search_nodes += result.get("search_nodes", 0)
+    if summary.games == 0:
+        return summary
+
+    summary.score_distribution = dict(sorted(scores.items()))
+    summary.mean_score = sum(s * n for s, n in scores.items()) / summary.games
+    summary.perfect_rate = perfect / summary.games
+    summary.strikeout_rate = strikeouts / summary.games
+    decision_times.sort()
+    summary.decisions = len(decision_times)
+    if decision_times:
+        summary.decision_mean = sum(decision_times) / len(decision_times)
+        summary.decision_p50 = percentile(decision_times, 50)
+        summary.decision_p95 = percentile(decision_times, 95)
+        summary.decision_p99 = percentile(decision_times, 99)
+        summary.decision_max = decision_times[-1]
+        total_time = sum(decision_times)
+        if total_time > 0:
+            summary.nodes_per_second = summary.search_nodes / total_time
+    return summary
+
+
+def load_results(path):
+    """Read the results back from an append-only results file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def run_tournament(
+    num_games,
+    *,
+    num_players=2,
+    seed=0,
+    policy="bot",
+    processes=None,
+    output=None,
+) -> TournamentSummary:
+    """Play games with the seeds seed, seed + 1, ...; append each result to "output"."""
+    seeds = range(seed, seed + num_games)
+    results = play_games(seeds, num_players, policy, processes)
+    if output is None:
+        return summarize(results)
+
+    def stream(f):
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            yield result
+
+    with open(output, "a", encoding="utf-8") as f:
+        return summarize(stream(f))
+
+
+def print_summary(summary: TournamentSummary, elapsed=None):
+    def ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.2f} ms"
+
+    line = f"{summary.games} games"
+    if elapsed:
+        line += f" in {elapsed:.1f} s ({summary.games / elapsed * 60:.0f} per minute)"
+    print(line)
+    print(
+        f"score      mean {summary.mean_score:.2f}, "
+        f"perfect {summary.perfect_rate:.1%}, strike-out {summary.strikeout_rate:.1%}"
+    )
+    print(
+        "scores     "
+        + ", ".join(f"{s}: {n}" for s, n in summary.score_distribution.items())
+    )
+    print(
+        f"decisions  {summary.decisions} ({summary.failed_decisions} failed), "
+        f"mean {ms(summary.decision_mean)}, p50 {ms(summary.decision_p50)}, "
+        f"p95 {ms(summary.decision_p95)}, p99 {ms(summary.decision_p99)}, "
+        f"max {ms(summary.decision_max)}"
+    )
+    if summary.nodes_per_second is not None:
+        print(
+            f"search     {summary.search_nodes} nodes, "
+            f"{summary.nodes_per_second:.0f} nodes per second of decisions"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game")
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--output", default=None, help="append the results (JSON lines)")
+    parser.add_argument("--policy", choices=list(POLICIES), default="bot")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = run_tournament(
+        args.games,
+        num_players=args.players,
+        seed=args.seed,
+        policy=args.policy,
+        processes=args.processes,
+        output=args.output,
+    )
+    if args.json:
+        print(json.dumps(asdict(summary), indent=2))
+    else:
+        print_summary(summary, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,278 @@
 """Utils functions."""
 
+import dataclasses
+import enum
 import json
-import jsonpickle
+import logging
+import queue
+import sys
+import threading
+import types
+
+from collections import deque
+
+from src.card import Card
+
+logger = logging.getLogger(__name__)
+
+# The default limits of dump(): how deep it goes into objects, how many items of a
+# container it shows (half from the start, half from the end), and its total length.
+DUMP_MAX_DEPTH = 6
+DUMP_MAX_ITEMS = 12
+DUMP_MAX_CHARS = 200_000
 
 
 def printf(*args):
-    """Print without delay."""
-    print(*args, flush=True)
+    """Log the arguments at the info level (kept for scripts; prefer module loggers)."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(" ".join(str(arg) for arg in args))
+
+
+def percentile(sorted_values, q):
+    """The q-th percentile (nearest rank) of sorted values, or None if there are none."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# Objects shared by everything, which deep_sizeof() does not count.
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, enum.Enum)
+
+
+def deep_sizeof(obj) -> int:
+    """The approximate memory (bytes) of an object and everything it refers to.
+
+    Each object is counted once; classes, functions and enum members are not counted.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+        for slot in getattr(type(item), "__slots__", ()):
+            if hasattr(item, slot):
+                stack.append(getattr(item, slot))
+    return total
+
+
+class _DumpFull(Exception):
+    pass
+
+
+_MISSING = object()
+# Per dataclass: [(field name, default value)], to leave out the fields at their default.
+_dataclass_defaults = {}
+
+
+def _defaults_of(cls) -> list:
+    defaults = _dataclass_defaults.get(cls)
+    if defaults is None:
+        defaults = []
+        for f in dataclasses.fields(cls):
+            if f.default is not dataclasses.MISSING:
+                defaults.append((f.name, f.default))
+            elif f.default_factory is not dataclasses.MISSING:
+                defaults.append((f.name, f.default_factory()))
+            else:
+                defaults.append((f.name, _MISSING))
+        _dataclass_defaults[cls] = defaults
+    return defaults
+
+
+def _card_text(card: Card) -> str:
+    """A card on one line, e.g. "#12 s2 r3 CLUED_SAVED clues=1 -r[4]"."""
+    text = f"#{card.order} s{card.suit_index} r{card.rank}"
+    if card.status.value != 0:
+        text += f" {card.status.name}"
+    if card.clues:
+        text += f" clues={len(card.clues)}"
+    if card.finesses:
+        text += f" finesses={len(card.finesses)}"
+    if card.negative_colors:
+        text += f" -s{card.negative_colors}"
+    if card.negative_ranks:
+        text += f" -r{card.negative_ranks}"
+    return text
+
+
+def _is_scalar(obj) -> bool:
+    return obj is None or isinstance(obj, (bool, int, float, str, enum.Enum, Card))
+
+
+class _DumpRenderer:
+    """Renders an object in one pass, within the limits of dump()."""
+
+    def __init__(self, max_depth, max_items, max_chars):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        # The objects being rendered, to cut cycles.
+        self.path = set()
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size > self.max_chars:
+            raise _DumpFull
+
+    def scalar(self, obj) -> str:
+        if isinstance(obj, Card):
+            return json.dumps(_card_text(obj))
+        if isinstance(obj, enum.Enum):
+            return obj.name
+        if isinstance(obj, (str, bool)) or obj is None:
+            return json.dumps(obj)
+        return repr(obj)
+
+    def elide(self, items: list):
+        """The items to show, with the amount left out in the middle."""
+        if len(items) <= self.max_items:
+            return items, 0
+        head = (self.max_items + 1) // 2
+        tail = self.max_items - head
+        return items[:head] + items[len(items) - tail :], len(items) - self.max_items
+
+    def render(self, obj, depth=0):
+        if _is_scalar(obj):
+            self.write(self.scalar(obj))
+            return
+        name = type(obj).__name__
+        if id(obj) in self.path:
+            self.write(f"<cycle {name}>")
+            return
+
+        if isinstance(obj, dict):
+            entries = list(obj.items())
+            opening, closing = "{", "}"
+        elif isinstance(obj, (list, tuple, deque, set, frozenset)):
+            entries = [(None, item) for item in obj]
+            opening, closing = "[", "]"
+        elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            entries = [
+                (field_name, value)
+                for field_name, default in _defaults_of(type(obj))
+                for value in (getattr(obj, field_name),)
+                if default is _MISSING or value != default
+            ]
+            opening, closing = name + " {", "}"
+        elif hasattr(obj, "__dict__"):
+            entries = list(vars(obj).items())
+            opening, closing = name + " {", "}"
+        else:
+            text = repr(obj)
+            self.write(json.dumps(text if len(text) <= 200 else text[:200] + "..."))
+            return
+
+        if not entries:
+            self.write(opening + closing)
+            return
+        if depth >= self.max_depth:
+            self.write(f"{opening}...{len(entries)} items{closing}")
+            return
+        entries, skipped = self.elide(entries)
+        if opening == "[" and all(_is_scalar(v) for _, v in entries):
+            # A list of scalars fits on one line.
+            items = [self.scalar(v) for _, v in entries]
+            if skipped:
+                items.insert((len(items) + 1) // 2, f"...{skipped} more...")
+            self.write("[" + ", ".join(items) + "]")
+            return
+
+        self.path.add(id(obj))
+        indent = "\n" + "  " * (depth + 1)
+        self.write(opening)
+        for i, (key, value) in enumerate(entries):
+            if skipped and i == (len(entries) + 1) // 2:
+                self.write(f"{indent}...{skipped} more...")
+            self.write(indent)
+            if key is not None:
+                self.write(f"{key if isinstance(key, str) else repr(key)}: ")
+            self.render(value, depth + 1)
+        self.write("\n" + "  " * depth + closing)
+        self.path.discard(id(obj))
+
+
+def render_dump(
+    obj,
+    max_depth=DUMP_MAX_DEPTH,
+    max_items=DUMP_MAX_ITEMS,
+    max_chars=DUMP_MAX_CHARS,
+) -> str:
+    """A compact, readable text of an object (e.g. a Game), within the given limits.
+
+    Dataclass fields at their default value are left out, cards take one line,
+    long containers show their first and last items, and deeper objects are elided.
+    """
+    renderer = _DumpRenderer(max_depth, max_items, max_chars)
+    try:
+        renderer.render(obj)
+    except _DumpFull:
+        renderer.parts.append(f"\n...truncated at {max_chars} characters")
+    return "".join(renderer.parts)
+
+
+class _DumpWriter:
+    """One background thread which logs or writes the rendered dumps."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text, path=None):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="dump-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((text, path))
+
+    def flush(self):
+        """Wait until all submitted dumps are written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            text, path = self._queue.get()
+            try:
+                if path is None:
+                    logger.info("%s", text)
+                else:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(text + "\n")
+            except Exception as e:
+                logger.error("could not write a dump to %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+
+_dump_writer = _DumpWriter()
+
+
+def dump(obj: object, path=None, **limits) -> str:
+    """Render an object now (see render_dump) and log it, or append it to "path",
+    on a background thread. Returns the rendered text.
+    """
+    text = render_dump(obj, **limits)
+    _dump_writer.submit(text, path)
+    return text
 
 
-def dump(obj: object):
-    serialized = jsonpickle.encode(obj)
-    printf(json.dumps(json.loads(serialized), indent=2))
+def flush_dumps():
+    """Wait until all dumps are written."""
+    _dump_writer.flush()
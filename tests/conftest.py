@@ -0,0 +1,225 @@
+"""Performance budgets for the test suite (opt-in).
+
+Tests marked `@pytest.mark.perf` are skipped unless pytest runs with `--perf`. They
+measure a scenario with the `perf_budget` fixture, which checks three metrics against
+the budgets in tests/perf_baseline.json:
+- time: the best wall time of a run, in units of a fixed calibration loop, so that the budget
+  holds on slower or faster machines (and under coverage),
+- nodes: the snapshots expanded (Snapshot.next_snapshot calls),
+- allocated_bytes: the peak memory allocated while running the scenario once.
+`--perf-update` records the current measurements as the new baseline instead.
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from unittest.mock import patch
+
+import pytest
+
+from src.snapshot import Snapshot
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "perf_baseline.json")
+# The budget of a new baseline is the measurement times this headroom.
+HEADROOM = {"time": 1.5, "nodes": 1.0, "allocated_bytes": 1.25}
+# The measured time is the best of this many batches of runs,
+TIME_REPEATS = 7
+# each of which lasts at least this long (seconds).
+MIN_BATCH_TIME = 0.02
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "performance budgets")
+    group.addoption(
+        "--perf", action="store_true", help="run the tests marked as perf"
+    )
+    group.addoption(
+        "--perf-update",
+        action="store_true",
+        help="run the perf tests and record their measurements as the new baseline",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "perf: a performance budget test, only run with --perf"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf") or config.getoption("--perf-update"):
+        return
+    skip = pytest.mark.skip(reason="performance budgets only run with --perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
+
+
+def untraced(fn):
+    """Run without the tracer of coverage (or a debugger), which skews all metrics."""
+
+    def wrapper(*args, **kwargs):
+        tracer = sys.gettrace()
+        sys.settrace(None)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sys.settrace(tracer)
+
+    return wrapper
+
+
+class _Node:
+    def __init__(self, value, children):
+        self.value = value
+        self.children = children
+
+    def total(self):
+        return self.value + sum(child.total() for child in self.children)
+
+
+def _calibration_loop():
+    # A fixed mix of what the engine does most: small objects, calls, lists and dicts.
+    table = {}
+    total = 0
+    for i in range(2000):
+        leaves = [_Node(i % 7, []), _Node(i % 5, [])]
+        node = _Node(i % 3, list(leaves))
+        table[i % 101] = node
+        total += node.total() + len(table)
+    return total
+
+
+@untraced
+def calibrate() -> float:
+    """The best time (seconds) of the calibration loop on this machine."""
+    best = float("inf")
+    for _ in range(TIME_REPEATS):
+        started = time.perf_counter()
+        _calibration_loop()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _time_batch(fn, setup, number) -> float:
+    """The average time (seconds) of one run in a batch of runs."""
+    batch = [setup() for _ in range(number)]
+    started = time.perf_counter()
+    for args in batch:
+        fn(*args)
+    return (time.perf_counter() - started) / number
+
+
+@untraced
+def measure(fn, setup=None) -> dict:
+    """Measure a scenario: normalized time, nodes expanded and peak allocated bytes.
+
+    "setup" makes the arguments of each run of "fn" (e.g. a fresh copy of a state which
+    the scenario changes); it is neither timed nor counted.
+    """
+    if setup is None:
+        setup = tuple
+    nodes = 0
+    next_snapshot = Snapshot.next_snapshot
+
+    def counting_next_snapshot(self, *args, **kwargs):
+        nonlocal nodes
+        nodes += 1
+        return next_snapshot(self, *args, **kwargs)
+
+    with patch.object(Snapshot, "next_snapshot", counting_next_snapshot):
+        args = setup()
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    # Like timeit, time batches of runs long enough for the clock, and keep the
+    # garbage collector from adding noise.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            sample = _time_batch(fn, setup, number)
+            if sample * number >= MIN_BATCH_TIME:
+                break
+            number *= 2
+        best = min([sample] + [_time_batch(fn, setup, number) for _ in range(TIME_REPEATS)])
+        # Calibrate right next to the scenario, so that both see the same machine load.
+        calibration = calibrate()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {"time": best / calibration, "nodes": nodes, "allocated_bytes": peak}
+
+
+def format_diff(name, measured, baseline, budget) -> str:
+    def fmt(value):
+        return "-" if value is None else f"{value:.6g}"
+
+    lines = [
+        f'Scenario "{name}" is over budget:',
+        f"  {'metric':<16}{'baseline':>14}{'budget':>14}{'measured':>14}{'change':>10}",
+    ]
+    for metric, value in measured.items():
+        base = baseline.get(metric)
+        limit = budget.get(metric)
+        change = f"{(value / base - 1):+.0%}" if base else "-"
+        flag = "  <-- over" if limit is not None and value > limit else ""
+        lines.append(
+            f"  {metric:<16}{fmt(base):>14}{fmt(limit):>14}{fmt(value):>14}"
+            f"{change:>10}{flag}"
+        )
+    return "\n".join(lines)
+
+
+class PerfBudget:
+    """Check scenarios against their budgets, or record them as the baseline."""
+
+    def __init__(self, records, update):
+        self.records = records
+        self.update = update
+        self.updated = False
+
+    def check(self, name, fn, setup=None):
+        """Measure fn(*setup()) and fail if it is over the budget of the scenario."""
+        measured = measure(fn, setup)
+        if self.update:
+            self.records[name] = {
+                "baseline": measured,
+                "budget": {m: v * HEADROOM[m] for m, v in measured.items()},
+            }
+            self.updated = True
+            return measured
+
+        record = self.records.get(name)
+        if record is None:
+            pytest.fail(
+                f'No baseline for the scenario "{name}"; record it with --perf-update.'
+            )
+        budget = record["budget"]
+        over = [m for m, value in measured.items() if value > budget.get(m, float("inf"))]
+        if over:
+            pytest.fail(format_diff(name, measured, record["baseline"], budget))
+        return measured
+
+
+@pytest.fixture(scope="session")
+def perf_budget(request):
+    records = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            records = json.load(f)
+    budget = PerfBudget(records, request.config.getoption("--perf-update"))
+    yield budget
+    if budget.updated:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, sort_keys=True)
+            f.write("\n")
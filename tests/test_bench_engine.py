@@ -0,0 +1,32 @@
+"""Unit Tests for the engine micro-benchmarks."""
+
+import unittest
+
+# Imports (local application)
+from benchmarks.bench_engine import compare, load_opening, run_benchmarks
+
+
+# Helper functions
+def get_results(**best_times):
+    return {"results": {name: {"min_us": t} for name, t in best_times.items()}}
+
+
+# Test class.
+class TestBenchEngine(unittest.TestCase):
+    """Class to test the benchmark fixtures and the baseline comparison."""
+
+    def test_opening_fixture(self):
+        snapshot = load_opening()
+        assert snapshot.num_players == 4
+        assert [len(hand) for hand in snapshot.hands] == [4, 4, 4, 4]
+        assert snapshot.hands[2][0].rank == 1  # a red 1
+
+    def test_run_one(self):
+        results = run_benchmarks(repeats=2, name_filter="is_trash")
+        assert list(results["results"]) == ["game.is_trash"]
+        assert results["results"]["game.is_trash"]["min_us"] > 0
+
+    def test_compare(self):
+        baseline = get_results(a=100, b=100, c=100)
+        current = get_results(a=105, b=150, c=50, d=10)
+        assert compare(current, baseline, threshold=0.2) == ["b"]
@@ -0,0 +1,221 @@
+"""Unit Tests for the checkpoints and journals of games in progress."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from unittest.mock import patch
+
+# Imports (local application)
+from src.action import parse_server_action
+from src.checkpoint import JOURNAL_SUFFIX, GameStore
+from src.decision_pool import DecisionPool
+from src.fake_server import FakeHanabiServer
+from src.hanabi_client import HanabiClient
+from src.simulator import SelfPlayGame, fallback_action, new_seat
+from tests.test_fake_server import start_bots, wait_for
+
+TABLE_ID = 7
+
+
+def play_and_record(store, turns):
+    """Play a seeded game and keep the game of seat 0 in the store, like the client.
+
+    Returns the live game of seat 0 and the amount of actions recorded.
+    """
+    play = SelfPlayGame(num_players=2, seed=5, decide=fallback_action)
+    game = new_seat(2, 0)
+    store.checkpoint(TABLE_ID, game)
+    views = [play.referee.view(data, 0) for data in play.referee.actions]
+    for _ in range(turns):
+        before = len(play.referee.actions)
+        play.step()
+        views += [play.referee.view(d, 0) for d in play.referee.actions[before:]]
+    recorded = 0
+    for data in views:
+        action = parse_server_action(data)
+        if action is not None:
+            game.handle_action(action)
+            store.record_action(TABLE_ID, game, data)
+            recorded += 1
+    return game, recorded
+
+
+# Test class.
+class TestGameStore(unittest.TestCase):
+    """Class to test saving and restoring games."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_restore_from_checkpoint_and_journal(self):
+        """The restored game equals the live one, inferences included."""
+
+        store = GameStore(self.directory, checkpoint_interval=7, fsync=False)
+        game, recorded = play_and_record(store, turns=12)
+        store.close()
+
+        # The journal only has the actions since the last checkpoint.
+        journal = os.path.join(self.directory, f"{TABLE_ID}{JOURNAL_SUFFIX}")
+        with open(journal, encoding="utf-8") as f:
+            assert len(f.readlines()) == recorded % 7
+
+        restored = GameStore(self.directory).load_all()
+        assert list(restored) == [TABLE_ID]
+        assert restored[TABLE_ID] == game
+
+    def test_torn_and_stale_journal_entries(self):
+        """A torn last line, and entries already in the checkpoint, are skipped."""
+
+        store = GameStore(self.directory, checkpoint_interval=1000, fsync=False)
+        game, _ = play_and_record(store, turns=6)
+        store.close()
+        journal = os.path.join(self.directory, f"{TABLE_ID}{JOURNAL_SUFFIX}")
+        with open(journal, encoding="utf-8") as f:
+            lines = f.readlines()
+        # A crash in the middle of appending, after a crash before truncating.
+        with open(journal, "w", encoding="utf-8") as f:
+            f.writelines(lines[:3] + lines + ['{"seq": 99, "act'])
+
+        assert GameStore(self.directory).load(TABLE_ID) == game
+
+    def test_corrupt_checkpoint_and_remove(self):
+        store = GameStore(self.directory, fsync=False)
+        play_and_record(store, turns=2)
+        with open(os.path.join(self.directory, f"{TABLE_ID}.ckpt"), "r+b") as f:
+            f.write(b"XXXX")
+        assert GameStore(self.directory).load(TABLE_ID) is None
+
+        store.remove(TABLE_ID)
+        assert not os.listdir(self.directory)
+
+    def test_files_are_written_in_the_background(self):
+        """A slow disk does not hold up the caller; the writes keep their order."""
+
+        store = GameStore(self.directory, checkpoint_interval=3, fsync=True)
+        release = threading.Event()
+        with patch("src.checkpoint.os.fsync", side_effect=lambda _: release.wait(5)):
+            started = time.perf_counter()
+            game, _ = play_and_record(store, turns=6)
+            assert time.perf_counter() - started < 4
+            release.set()
+            store.close()
+
+        assert GameStore(self.directory).load(TABLE_ID) == game
+
+    def test_unrestorable_tables_are_skipped_and_removed(self):
+        """A truncated checkpoint, or a journal which cannot be replayed, loses only
+        its own table."""
+
+        store = GameStore(self.directory, checkpoint_interval=1000, fsync=False)
+        game, _ = play_and_record(store, turns=4)
+        store.close()
+        with open(os.path.join(self.directory, f"{TABLE_ID}.ckpt"), "rb") as f:
+            data = f.read()
+        with open(os.path.join(self.directory, "8.ckpt"), "wb") as f:
+            f.write(data[:40])
+        with open(os.path.join(self.directory, "9.ckpt"), "wb") as f:
+            f.write(data)
+        with open(
+            os.path.join(self.directory, f"9{JOURNAL_SUFFIX}"), "w", encoding="utf-8"
+        ) as f:
+            f.write('{"seq": 1, "action": {"type": "draw"}}\n')
+
+        restored = GameStore(self.directory)
+        assert restored.load_all() == {TABLE_ID: game}
+        restored.flush()
+        assert sorted(os.listdir(self.directory)) == [
+            f"{TABLE_ID}.ckpt",
+            f"{TABLE_ID}{JOURNAL_SUFFIX}",
+        ]
+
+
+# Test class.
+class TestRestart(unittest.TestCase):
+    """Class to test a bot which restarts in the middle of a game."""
+
+    def test_bot_resumes_after_restart(self):
+        server = FakeHanabiServer(seed=2)
+        pool = DecisionPool()
+        with tempfile.TemporaryDirectory() as tmp:
+            clients = start_bots(server, ["robot2"], pool)
+            store = GameStore(tmp, checkpoint_interval=5, fsync=False)
+            clients.update(self._start(server, "robot1", pool, store))
+
+            table_id = server.create_table("robot1")
+            server.join_table(table_id, "robot2")
+            server.start_table(table_id)
+            referee = server.tables[table_id].referee
+            assert wait_for(lambda: referee.turn >= 4)
+
+            # Stop robot1 on its own turn, so that the game waits for it.
+            player = server.tables[table_id].players.index("robot1")
+            with server.lock:
+                clients["robot1"].close()
+            pool.join()
+            old_game = clients["robot1"].games[table_id]
+            store.close()
+            assert wait_for(lambda: "robot1" not in server.connections)
+
+            new_store = GameStore(tmp, checkpoint_interval=5, fsync=False)
+            assert new_store.load(table_id) == old_game
+            restarted = self._start(server, "robot1", pool, new_store)["robot1"]
+            # The restored game catches up and the bots go on playing.
+            turn = referee.turn
+            assert wait_for(lambda: referee.turn > turn + 2 or referee.is_over())
+            game = restarted.games[table_id]
+            assert game.our_player_index == player
+            assert len(game.action_history) > len(old_game.action_history)
+
+            server.terminate_table(table_id)
+            pool.join()
+            for client in [restarted, *clients.values()]:
+                client.close()
+            new_store.close()
+        pool.shutdown(wait=False)
+
+    def test_game_of_gone_table_is_dropped(self):
+        """A restored game whose table ended while the bot was away is forgotten."""
+
+        server = FakeHanabiServer(seed=2)
+        pool = DecisionPool()
+        with tempfile.TemporaryDirectory() as tmp:
+            store = GameStore(tmp, fsync=False)
+            store.checkpoint(TABLE_ID, new_seat(2, 0))
+            client = self._start(server, "robot1", pool, store)["robot1"]
+
+            assert wait_for(lambda: not client.games)
+            store.flush()
+            assert not os.listdir(tmp)
+            client.close()
+            store.close()
+        pool.shutdown(wait=False)
+
+    @staticmethod
+    def _start(server, name, pool, store):
+        clients = {}
+
+        def ws_factory(url, **kwargs):
+            clients[name] = kwargs["on_message"].__self__
+            return server.websocket_app(url, **kwargs)
+
+        threading.Thread(
+            target=HanabiClient,
+            args=("ws://fake", server.login(name)),
+            kwargs={
+                "username": name,
+                "decision_pool": pool,
+                "ws_factory": ws_factory,
+                "action_delay": 0,
+                "game_store": store,
+            },
+            daemon=True,
+        ).start()
+        assert wait_for(lambda: name in server.connections)
+        return clients
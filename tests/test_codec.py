@@ -0,0 +1,54 @@
+"""Unit Tests for the WebSocket message codec."""
+
+import unittest
+
+# Imports (local application)
+from src import codec
+
+
+# Test class.
+class TestCodec(unittest.TestCase):
+    """Class to test message splitting, decoding and encoding."""
+
+    def test_round_trip(self):
+        """An encoded message decodes back to the same command and data."""
+
+        data = {"tableID": 42, "type": 2, "target": 1, "value": 4}
+        command, payload = codec.split_message(codec.encode_message("action", data))
+
+        assert command == "action"
+        assert codec.decode_payload(command, payload) == data
+
+    def test_message_without_payload(self):
+        """Some commands have no data at all."""
+
+        assert codec.split_message("hello") == ("hello", "")
+        assert codec.decode_payload("hello", "") == {}
+
+    def test_invalid_payload(self):
+        """Invalid JSON is reported as a ValueError, whatever the backend is."""
+
+        with self.assertRaises(ValueError):
+            codec.decode_payload("chat", "{not json")
+
+    def test_high_volume_commands_are_projected(self):
+        """Only the fields the handlers need are kept."""
+
+        table = '{"id": 1, "running": false, "players": ["Alice"], "spectators": []}'
+        assert codec.decode_payload("table", table) == {
+            "id": 1,
+            "running": False,
+            "players": ["Alice"],
+        }
+        assert codec.decode_payload("tableList", "[" + table + "]") == [
+            {"id": 1, "running": False, "players": ["Alice"]}
+        ]
+        action = '{"tableID": 1, "action": {"type": "turn"}, "extra": 0}'
+        assert codec.decode_payload("gameAction", action) == {
+            "tableID": 1,
+            "action": {"type": "turn"},
+        }
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 
 from src.card import Card
 from src.constants import ACTION
-from src.conventions import evaluate
+from src.conventions import SearchStats, evaluate
 from src.snapshot import Snapshot
 
 
@@ -86,6 +86,30 @@ class TestConventions(unittest.TestCase):
 
         assert len(actions) == 14
 
+    def test_evaluate_counts_search_stats(self):
+        s = get_default_snapshot()
+        stats = SearchStats(search_level=2)
+
+        actions = evaluate(
+            s, viewer_index=0, player_index=0, remaining_search_level=2, stats=stats
+        )
+        plain = evaluate(
+            get_default_snapshot(), viewer_index=0, player_index=0, remaining_search_level=2
+        )
+
+        # Counting does not change the search.
+        assert [a.score for a in actions] == [a.score for a in plain]
+        assert stats.nodes >= len(actions)
+        assert stats.max_depth == 2
+        assert stats.actions_generated > stats.actions_filtered > 0
+        assert set(stats.phase_times) == {
+            "valid_actions",
+            "check_convention",
+            "next_snapshot",
+            "annotation_check",
+        }
+        assert "nodes to depth 2/2" in stats.summary()
+
     def test_evaluate_no_normal_applicable_actions(self):
         s = _get_2p_default_snapshot()
 
@@ -0,0 +1,150 @@
+"""Unit Tests for the cookie cache."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+# Imports (local application)
+import main
+from src.cookie_cache import DEFAULT_COOKIE_TTL, CookieCache, cookie_expiry
+from src.fake_server import FakeHanabiServer
+from tests.test_fake_server import wait_for
+
+URL = "https://hanab.live/login"
+
+
+# Test class.
+class TestCookieCache(unittest.TestCase):
+    """Class to test cookie expiry and the on-disk cache."""
+
+    def test_cookie_expiry(self):
+        """Max-Age wins over Expires, and a session cookie gets a default TTL."""
+
+        now = 1000.0
+        assert cookie_expiry("hanabi.sid=abc; Path=/; Max-Age=60", now) == 1060
+        assert (
+            cookie_expiry("hanabi.sid=abc; Expires=Thu, 01 Jan 1970 00:20:00 GMT", now)
+            == 1200
+        )
+        assert cookie_expiry("hanabi.sid=abc; HttpOnly", now) == now + DEFAULT_COOKIE_TTL
+
+    def test_cookies_survive_a_restart(self):
+        """A valid cookie is reused from disk, an expired one is not."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cookies.json")
+            cache = CookieCache(path)
+            cache.put(URL, "robot1", "hanabi.sid=abc; Max-Age=86400")
+            cache.put(URL, "robot2", "hanabi.sid=def; Max-Age=1")
+
+            restarted = CookieCache(path)
+            assert restarted.get(URL, "robot1") == "hanabi.sid=abc; Max-Age=86400"
+            assert restarted.get(URL, "robot2") is None
+            assert restarted.get(URL, "robot3") is None
+            assert restarted.get("http://localhost/login", "robot1") is None
+            assert time.time() < restarted._entries[URL + " robot1"]["expires"]
+
+            restarted.invalidate(URL, "robot1")
+            assert CookieCache(path).get(URL, "robot1") is None
+
+
+def login_response(url, data, timeout):
+    """A response of the login page; "wrong" passwords are refused."""
+    del url, timeout
+    response = MagicMock()
+    if data["password"] == "wrong":
+        response.status_code = 401
+        response.text = "Unauthorized"
+        response.headers = {}
+    else:
+        response.status_code = 200
+        response.headers = {"Set-Cookie": f"hanabi.sid={data['username']}"}
+    return response
+
+
+# Test class.
+class TestLogins(unittest.TestCase):
+    """Class to test logging in all accounts concurrently."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = CookieCache(os.path.join(self.tmp.name, "cookies.json"))
+        patcher = patch("main.requests.Session")
+        session_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = session_class.return_value.__enter__.return_value
+        self.session.post.side_effect = login_response
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def posted(self):
+        return sorted(c.args[1]["username"] for c in self.session.post.call_args_list)
+
+    def test_cookies_in_order_and_cached_accounts_skipped(self):
+        self.cache.put(URL, "robot2", "hanabi.sid=cached; Max-Age=86400")
+        accounts = [(f"robot{i}", f"robot{i}") for i in range(1, 5)]
+
+        cookies = main._get_all_cookies(URL, accounts, self.cache)
+
+        assert cookies == [
+            "hanabi.sid=robot1",
+            "hanabi.sid=cached; Max-Age=86400",
+            "hanabi.sid=robot3",
+            "hanabi.sid=robot4",
+        ]
+        assert self.posted() == ["robot1", "robot3", "robot4"]
+        assert self.cache.get(URL, "robot4") == "hanabi.sid=robot4"
+
+    def test_one_failure_keeps_the_other_cookies(self):
+        accounts = [("robot1", "robot1"), ("robot2", "wrong"), ("robot3", "robot3")]
+
+        with self.assertRaises(SystemExit):
+            main._get_all_cookies(URL, accounts, self.cache)
+
+        assert self.posted() == ["robot1", "robot2", "robot3"]
+        assert self.cache.get(URL, "robot1") == "hanabi.sid=robot1"
+        assert self.cache.get(URL, "robot2") is None
+        assert self.cache.get(URL, "robot3") == "hanabi.sid=robot3"
+
+
+# Test class.
+class TestRelogin(unittest.TestCase):
+    """Class to test logging in again when the server refuses a cached cookie."""
+
+    def test_refused_cookie_is_replaced(self):
+        server = FakeHanabiServer(seed=1)
+        clients = []
+
+        def ws_factory(url, **kwargs):
+            clients.append(kwargs["on_message"].__self__)
+            return server.websocket_app(url, **kwargs)
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CookieCache(os.path.join(directory, "cookies.json"))
+            cache.put(URL, "robot1", "hanabi.sid-expired=robot1; Max-Age=86400")
+            stale = cache.get(URL, "robot1")
+            fresh = server.login("robot1")
+            with patch.object(
+                main, "_get_cookies_by_password", return_value=fresh
+            ) as login:
+                threading.Thread(
+                    target=main._run_client,
+                    args=(URL, "ws://fake", ("robot1", "secret"), stale, cache),
+                    kwargs={"username": "robot1", "ws_factory": ws_factory},
+                    daemon=True,
+                ).start()
+                assert wait_for(lambda: "robot1" in server.connections)
+
+            login.assert_called_once_with(URL, "robot1", "secret")
+            assert cache.get(URL, "robot1") == fresh
+            assert len(clients) == 2 and clients[1].connected
+            clients[1].close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Unit Tests for DecisionPool."""
+
+import threading
+import unittest
+
+# Imports (local application)
+from src.decision_pool import DecisionPool
+
+
+# Test class.
+class TestDecisionPool(unittest.TestCase):
+    """Class to test the bounded single-flight worker pool."""
+
+    def test_duplicate_submit_joins_inflight_decision(self):
+        """A second request for the same table does not start another decision."""
+
+        pool = DecisionPool(max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def decide(table_id):
+            calls.append(table_id)
+            release.wait(5)
+            return table_id
+
+        first = pool.submit(42, decide, 42)
+        second = pool.submit(42, decide, 42)
+        other = pool.submit(43, decide, 43)
+        release.set()
+
+        assert first is second
+        assert first.result(5) == 42
+        assert other.result(5) == 43
+        assert sorted(calls) == [42, 43]
+        stats = pool.stats()
+        assert stats["submitted"] == 2
+        assert stats["joined"] == 1
+        assert not pool.is_inflight(42)
+        pool.shutdown()
+
+    def test_full_queue_rejects(self):
+        """New decisions are rejected when all workers are busy and the queue is full."""
+
+        pool = DecisionPool(max_workers=1, max_queued=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        pool.submit(1, block)
+        started.wait(5)
+        pool.submit(2, block)
+        rejected = pool.submit(3, block)
+
+        assert pool.queue_depth() == 1
+        with self.assertRaises(RuntimeError):
+            rejected.result(5)
+        release.set()
+        pool.join(5)
+        assert pool.stats()["rejected"] == 1
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
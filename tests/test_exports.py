@@ -0,0 +1,140 @@
+"""Unit Tests for the streaming ingestion of hanab.live game exports."""
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+# Imports (local application)
+from src.action import parse_server_action
+from src.constants import ACTION
+from src.exports import ingest_file, ingest_files, iter_exports, load_export
+from src.referee import CLUE_TYPE_COLOR, deal_deck
+from src.simulator import SelfPlayGame, fallback_action, new_seat
+
+
+def make_export(seed):
+    """A seeded self-play game as hanab.live exports it, and the game it played."""
+    play = SelfPlayGame(num_players=3, seed=seed, decide=fallback_action)
+    play.play()
+    actions = []
+    for data in play.referee.actions:
+        if data["type"] == "clue":
+            clue_type = ACTION.RANK_CLUE.value
+            if data["clue"]["type"] == CLUE_TYPE_COLOR:
+                clue_type = ACTION.COLOR_CLUE.value
+            value = data["clue"]["value"]
+            target = data["target"]
+            actions.append({"type": clue_type, "target": target, "value": value})
+        elif data["type"] == "play" or (data["type"] == "discard" and data["failed"]):
+            actions.append({"type": ACTION.PLAY.value, "target": data["order"]})
+        elif data["type"] == "discard":
+            actions.append({"type": ACTION.DISCARD.value, "target": data["order"]})
+    export = {
+        "id": seed,
+        "players": ["Alice", "Bob", "Cathy"],
+        "options": {"variant": "No Variant"},
+        "deck": [{"suitIndex": s, "rank": r} for s, r in deal_deck(seed=seed)],
+        "actions": actions,
+    }
+    return export, play
+
+
+def count_clues(_export, game):
+    return sum(a.clue is not None for a in game.action_history)
+
+
+# Test class.
+class TestExports(unittest.TestCase):
+    """Class to test reading exports and replaying them into games."""
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_export_replays_the_same_game(self):
+        """A seat replayed from the export sees the same game as it did live."""
+
+        export, play = make_export(seed=1)
+        game = load_export(export, player_index=1)
+
+        expected = new_seat(3, 1)
+        expected.player_names = ["Alice", "Bob", "Cathy"]
+        expected.replay(
+            [
+                action
+                for data in play.referee.actions
+                for action in [parse_server_action(play.referee.view(data, 1))]
+                if action is not None
+            ]
+        )
+        assert game == expected
+
+    def test_stream_array_and_lines(self):
+        """Arrays are read item by item, across chunks; lines may be gzipped."""
+
+        exports = [make_export(seed)[0] for seed in (1, 2, 3)]
+        path = os.path.join(self.tmp.name, "games.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(exports, f, indent=1)
+        assert list(iter_exports(path, chunk_size=7)) == exports
+
+        path = os.path.join(self.tmp.name, "games.jsonl.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for export in exports:
+                f.write(json.dumps(export) + "\n\n")
+        assert list(iter_exports(path)) == exports
+
+    def test_ingest_skips_unsupported_games(self):
+        """Games of unknown variants are skipped, the others are handled."""
+
+        export, _ = make_export(seed=2)
+        rainbow = {**export, "id": 3, "options": {"variant": "Rainbow (5 Suits)"}}
+        path = os.path.join(self.tmp.name, "games.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([export, rainbow], f)
+
+        result = ingest_file(path, handler=count_clues)
+        assert (result.games, result.skipped) == (1, 1)
+        assert result.actions == len(load_export(export).action_history)
+        assert result.results[0] > 0
+
+    def test_ingest_files_in_parallel(self):
+        """Files are ingested across processes, with the results in order."""
+
+        paths = []
+        for seed in (4, 5, 6):
+            path = os.path.join(self.tmp.name, f"{seed}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(make_export(seed)[0], f)
+            paths.append(path)
+
+        # A malformed file is reported, and does not stop the others.
+        broken = os.path.join(self.tmp.name, "broken.json")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write('[{"id": 1, "players": ')
+        paths.insert(1, broken)
+
+        serial = list(ingest_files(paths, handler=count_clues, processes=1))
+        parallel = list(ingest_files(paths, handler=count_clues, processes=2))
+        assert [r.path for r in parallel] == paths
+        assert [(r.games, r.actions, r.results) for r in parallel] == [
+            (r.games, r.actions, r.results) for r in serial
+        ]
+        assert [(r.games, r.skipped) for r in parallel] == [
+            (1, 0),
+            (0, 1),
+            (1, 0),
+            (1, 0),
+        ]
+        assert parallel[1].error.startswith("Invalid JSON")
+
+
+if __name__ == "__main__":
+    unittest.main()
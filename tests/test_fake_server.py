@@ -0,0 +1,165 @@
+"""Unit Tests for the Referee and the FakeHanabiServer."""
+
+import threading
+import time
+import unittest
+
+from unittest.mock import patch
+
+# Imports (local application)
+from src.constants import ACTION
+from src.decision_pool import DecisionPool
+from src.fake_server import FakeHanabiServer
+from src.game import Game
+from src.hanabi_client import HanabiClient
+from src.referee import END_CONDITION_NORMAL, Referee, deal_deck
+
+# Give up waiting for the bots after this many seconds.
+TIMEOUT = 10
+
+
+# Helper functions
+def wait_for(condition, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def start_bots(server, names, pool):
+    """Connect one client per name on its own thread; returns the clients."""
+    clients = {}
+
+    def ws_factory(url, **kwargs):
+        # The message handler is bound to the client being constructed.
+        client = kwargs["on_message"].__self__
+        clients[client.username] = client
+        return server.websocket_app(url, **kwargs)
+
+    for name in names:
+        threading.Thread(
+            target=HanabiClient,
+            args=("ws://fake", server.login(name)),
+            kwargs={
+                "username": name,
+                "decision_pool": pool,
+                "ws_factory": ws_factory,
+                "action_delay": 0,
+            },
+            daemon=True,
+        ).start()
+    assert wait_for(lambda: set(names) <= set(server.connections))
+    return clients
+
+
+# Test class.
+class TestReferee(unittest.TestCase):
+    """Class to test the rules of the Referee."""
+
+    def test_seeded_deal(self):
+        assert deal_deck(seed=7) == deal_deck(seed=7)
+        assert deal_deck(seed=7) != deal_deck(seed=8)
+        assert len(deal_deck()) == 50
+
+        referee = Referee(num_players=2, deck=deal_deck(seed=7))
+        assert [len(hand) for hand in referee.hands] == [5, 5]
+        draw = referee.actions[0]
+        assert referee.view(draw, 0)["rank"] == -1
+        assert referee.view(draw, 1) == draw
+
+    def test_illegal_actions(self):
+        referee = Referee(num_players=2, deck=deal_deck(seed=7))
+        with self.assertRaises(ValueError):
+            referee.perform(1, ACTION.PLAY.value, 5)  # not their turn
+        with self.assertRaises(ValueError):
+            referee.perform(0, ACTION.PLAY.value, 5)  # not their card
+        with self.assertRaises(ValueError):
+            referee.perform(0, ACTION.DISCARD.value, 0)  # at max clues
+        assert referee.turn == 0 and len(referee.hands[0]) == 5
+
+    def test_play_to_the_end(self):
+        # Play playable cards, else discard, else clue the other player.
+        referee = Referee(num_players=2, deck=deal_deck(seed=7))
+        last_draw_turn = None
+        while not referee.is_over():
+            player = referee.current_player_index
+            hand = referee.hands[player]
+            playable = [c for c in hand if referee.stacks[c.suit_index] + 1 == c.rank]
+            if playable:
+                referee.perform(player, ACTION.PLAY.value, playable[0].order)
+            elif referee.clue_tokens < 8:
+                referee.perform(player, ACTION.DISCARD.value, hand[0].order)
+            else:
+                other = 1 - player
+                rank = referee.hands[other][0].rank
+                referee.perform(player, ACTION.RANK_CLUE.value, other, rank)
+            if last_draw_turn is None and referee.next_order == len(referee.deck):
+                last_draw_turn = referee.turn
+
+        # After the last card is drawn, everyone gets one more turn.
+        assert referee.end_condition == END_CONDITION_NORMAL
+        assert referee.turn - last_draw_turn == 2
+        assert referee.actions[-1]["type"] == "gameOver"
+        assert referee.score == sum(referee.stacks) > 0
+
+
+# Test class.
+class TestFakeServer(unittest.TestCase):
+    """Class to test bots playing on the FakeHanabiServer."""
+
+    def setUp(self):
+        self.server = FakeHanabiServer(seed=1)
+        self.pool = DecisionPool()
+        self.clients = start_bots(self.server, ["robot1", "robot2"], self.pool)
+
+    def tearDown(self):
+        for client in self.clients.values():
+            client.close()
+        self.pool.shutdown(wait=False)
+
+    def test_bots_play_and_leave(self):
+        table_id = self.server.create_table("robot1")
+        self.server.join_table(table_id, "robot2")
+        self.server.start_table(table_id)
+
+        # Both bots get the game, and they take turns.
+        referee = self.server.tables[table_id].referee
+        assert wait_for(lambda: referee.turn >= 2)
+        for name, client in self.clients.items():
+            game = client.games[table_id]
+            assert game.our_player_index == self.server.tables[table_id].players.index(
+                name
+            )
+
+        # Once the game ends ("/terminate"), the bots drop it.
+        self.server.connections["robot1"].deliver(
+            "chat", {"msg": "/terminate", "who": "someone", "recipient": "robot1"}
+        )
+        assert wait_for(
+            lambda: all(not client.games for client in self.clients.values())
+        )
+        assert table_id not in self.server.tables
+
+    def test_failed_decisions_fall_back(self):
+        """When the bots cannot decide, they still take their turns."""
+
+        table_id = self.server.create_table("robot1")
+        self.server.join_table(table_id, "robot2")
+        with patch.object(Game, "decide_action", side_effect=IndexError):
+            self.server.start_table(table_id)
+            referee = self.server.tables[table_id].referee
+            assert wait_for(lambda: referee.turn >= 4)
+
+        assert self.pool.stats()["failed"] >= 4
+        assert not self.server.tables[table_id].referee.strikes
+
+    def test_chat_commands(self):
+        # "/create" from a user makes the bot open a table it owns.
+        self.server.connections["robot1"].deliver(
+            "chat", {"msg": "/create", "who": "someone", "recipient": "robot1"}
+        )
+        assert wait_for(lambda: len(self.server.tables) == 1)
+        table = next(iter(self.server.tables.values()))
+        assert table.owner == "robot1"
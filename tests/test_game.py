@@ -1,10 +1,12 @@
 """Unit Tests for HanabiClient."""
 
+import copy
 import unittest
 
 from unittest.mock import patch, MagicMock
 
 # Imports (local application)
+from src.action import parse_server_action
 from src.card import Card
 from src.clue import Clue
 from src.constants import ACTION
@@ -57,6 +59,74 @@ def get_default_game_state():
     return game
 
 
+def get_server_action_list(num_turns=22, discards=True):
+    """A 2-player game in the server format, from our (player 0) view."""
+    deck = [(suit, rank) for rank in range(1, 6) for suit in range(5)] * 2
+    hands = [[], []]
+    actions = []
+    next_order = 0
+
+    def draw(player):
+        nonlocal next_order
+        suit, rank = deck[next_order]
+        hands[player].append((next_order, suit, rank))
+        hidden = player == 0
+        actions.append(
+            {
+                "type": "draw",
+                "playerIndex": player,
+                "order": next_order,
+                "suitIndex": -1 if hidden else suit,
+                "rank": -1 if hidden else rank,
+            }
+        )
+        next_order += 1
+
+    for player in range(2):
+        for _ in range(5):
+            draw(player)
+
+    for turn in range(num_turns):
+        player = turn % 2
+        other = 1 - player
+        if turn % 4 == 0:
+            newest_rank = hands[other][-1][2]
+            actions.append(
+                {
+                    "type": "clue",
+                    "clue": {"type": 1, "value": newest_rank},
+                    "giver": player,
+                    "list": [c[0] for c in hands[other] if c[2] == newest_rank],
+                    "target": other,
+                    "turn": turn,
+                }
+            )
+            continue
+        play = turn % 4 == 1 or not discards
+        order, suit, rank = hands[player].pop(-1 if play else 0)
+        action = {
+            "type": "play" if play else "discard",
+            "playerIndex": player,
+            "order": order,
+            "suitIndex": suit,
+            "rank": rank,
+            "failed": False,
+        }
+        actions.append(action)
+        actions.append({"type": "turn", "num": turn + 1})
+        draw(player)
+    return actions
+
+
+def get_empty_2p_game():
+    game = Game()
+    game.our_player_index = 0
+    game.player_names = ["Alice", "Bob"]
+    game.player_hands = [[], []]
+    game.checkpoint_interval = 4
+    return game
+
+
 # Test class.
 class TestGame(unittest.TestCase):
     """Class to test action predications and handling."""
@@ -71,5 +141,116 @@ class TestGame(unittest.TestCase):
         assert len(actions) > 0
 
 
+# Test class.
+class TestReplay(unittest.TestCase):
+    """Class to test the bulk replay of past actions."""
+
+    def test_replay_is_equivalent_to_handling_one_by_one(self):
+        """The bulk replay ends up with the same game and the same latest snapshot."""
+
+        actions = get_server_action_list()
+        one_by_one = get_empty_2p_game()
+        for data in actions:
+            action = parse_server_action(data)
+            if action is not None:
+                one_by_one.handle_action(action)
+
+        bulk = get_empty_2p_game()
+        bulk.replay(
+            [parse_server_action(data) for data in actions if data["type"] != "turn"]
+        )
+
+        assert bulk.player_hands == one_by_one.player_hands
+        assert bulk.play_pile == one_by_one.play_pile
+        assert bulk.discard_pile == one_by_one.discard_pile
+        assert bulk.clue_tokens == one_by_one.clue_tokens
+        assert len(bulk.action_history) == len(one_by_one.action_history)
+        assert bulk.snapshot_history[-1] == one_by_one.snapshot_history[-1]
+        assert bulk.current_player_index() == one_by_one.current_player_index()
+
+    def test_replay_only_keeps_checkpoints(self):
+        """Only every 4th turn (and the latest one) is kept."""
+
+        game = get_empty_2p_game()
+        game.replay(
+            [
+                parse_server_action(data)
+                for data in get_server_action_list(num_turns=22, discards=False)
+                if data["type"] != "turn"
+            ]
+        )
+
+        turns = [len(s.action_history) for s in game.snapshot_history]
+        assert turns == [0, 4, 8, 12, 16, 20, 22]
+
+    def test_replay_continues_an_ongoing_game(self):
+        """Live actions after a replay build on the latest snapshot."""
+
+        actions = [
+            parse_server_action(data)
+            for data in get_server_action_list(num_turns=12)
+            if data["type"] != "turn"
+        ]
+        game = get_empty_2p_game()
+        game.replay(actions[:20])
+        for action in actions[20:]:
+            game.handle_action(action)
+
+        expected = get_empty_2p_game()
+        expected.replay(
+            [
+                parse_server_action(data)
+                for data in get_server_action_list(num_turns=12)
+                if data["type"] != "turn"
+            ]
+        )
+        assert game.snapshot_history[-1] == expected.snapshot_history[-1]
+
+
+# Test class.
+class TestSnapshotAt(unittest.TestCase):
+    """Class to test the random access to the snapshots of past turns."""
+
+    def test_snapshot_at_matches_every_turn(self):
+        """Each turn is rebuilt exactly as it was when it was the latest."""
+
+        game = get_empty_2p_game()
+        seen = {}
+        for data in get_server_action_list(num_turns=22):
+            action = parse_server_action(data)
+            if action is not None:
+                game.handle_action(action)
+            if game.snapshot_history:
+                seen[game.current_turn] = game.snapshot_history[-1].copy()
+
+        # (The snapshots skip the discards which they fail to apply.)
+        assert sorted(seen) == list(range(game.current_turn + 1))
+        for turn, snapshot in seen.items():
+            assert game.snapshot_at(turn) == snapshot
+        with self.assertRaises(IndexError):
+            game.snapshot_at(game.current_turn + 1)
+
+    def test_live_and_bulk_keep_the_same_checkpoints(self):
+        """Handling actions one by one keeps only the checkpoints, like a replay."""
+
+        actions = [
+            parse_server_action(data)
+            for data in get_server_action_list(num_turns=22, discards=False)
+            if data["type"] != "turn"
+        ]
+        live = get_empty_2p_game()
+        for action in copy.deepcopy(actions):
+            live.handle_action(action)
+        bulk = get_empty_2p_game()
+        bulk.replay(actions)
+
+        turns = [len(s.action_history) for s in live.snapshot_history]
+        assert turns == [0, 4, 8, 12, 16, 20, 22]
+        assert live.snapshot_history == bulk.snapshot_history
+        assert live.event_log == bulk.event_log
+        for turn in (3, 13, 22):
+            assert live.snapshot_at(turn) == bulk.snapshot_at(turn)
+
+
 if __name__ == "__main__":
     unittest.main()
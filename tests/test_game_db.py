@@ -0,0 +1,118 @@
+"""Unit Tests for the local database of finished games."""
+
+import logging
+import os
+import tempfile
+import unittest
+
+# Imports (local application)
+from src.constants import ACTION
+from src.conventions import evaluate
+from src.game_db import ACTION_MISPLAY, GameDatabase
+from src.referee import Referee, deal_deck
+from src.simulator import SelfPlayGame, fallback_action
+
+
+def misplay_and_clue_5_record():
+    """A short game: player 0 misplays at turn 0, then player 1 clues a 5."""
+    for seed in range(100):
+        referee = Referee(num_players=2, deck=deal_deck(seed=seed))
+        bad = [c for c in referee.hands[0] if c.rank > 1]
+        if bad and any(c.rank == 5 for c in referee.hands[0][1:]):
+            break
+    referee.perform(0, ACTION.PLAY.value, bad[0].order)
+    referee.perform(1, ACTION.RANK_CLUE.value, 0, 5)
+    return {"players": ["Alice", "Bob"], "numSuits": 5, "actions": referee.actions}
+
+
+# Test class.
+class TestGameDatabase(unittest.TestCase):
+    """Class to test storing games and querying them."""
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "games.db")
+        self.db = GameDatabase(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_self_play_game_is_stored(self):
+        """The game, its per-turn snapshots and its decisions are kept."""
+
+        play = SelfPlayGame(num_players=3, seed=1, max_turns=10)
+        play.play()
+        game_id = self.db.add_self_play(play)
+
+        [game] = self.db.find_games(num_players=3)
+        assert (game.id, game.source, game.turns) == (game_id, "selfplay", 10)
+        assert self.db.record(game_id)["actions"] == [
+            data
+            for data in play.referee.actions
+            if data["type"] in ("clue", "play", "discard", "draw")
+        ]
+        decisions = self.db.decisions(game_id)
+        assert [d["turn"] for d in decisions] == list(range(10))
+        assert all(d["nodes"] > 0 and d["chosen"] for d in decisions)
+
+        # Turn 0 is from the view of player 0: only their own cards are unknown.
+        snapshot = self.db.snapshot(game_id, 0)
+        assert [c.rank for c in snapshot.hands[0]] == [-1] * 5
+        assert all(c.rank > 0 for c in snapshot.hands[1] + snapshot.hands[2])
+        assert self.db.snapshot(game_id, 1).hands[0][0].rank > 0
+        assert self.db.snapshot(game_id, 10) is None
+
+    def test_find_games_and_positions(self):
+        """Strikes and 5 clues are found by turn, with their positions."""
+
+        strike_id = self.db.add_game(misplay_and_clue_5_record(), source="test")
+        play = SelfPlayGame(num_players=2, seed=3, decide=fallback_action, max_turns=6)
+        play.play()
+        other_id = self.db.add_self_play(play)
+
+        assert [g.id for g in self.db.find_games(strike_before_turn=10)] == [strike_id]
+        assert self.db.find_games(strike_before_turn=0) == []
+        assert [g.id for g in self.db.find_games(source="selfplay")] == [other_id]
+        assert self.db.game(strike_id).strikes == 1
+
+        positions = list(
+            self.db.find_positions(action_type=ACTION.RANK_CLUE.value, value=5)
+        )
+        assert [(p.game_id, p.turn) for p in positions[:1]] == [(strike_id, 1)]
+        position = positions[0]
+        assert position.player_index == 1
+        assert position.action.clue.hint_value == 5
+        assert evaluate(position.snapshot, 1, 1)
+
+        [misplay] = self.db.find_positions(action_type=ACTION_MISPLAY, max_turn=5)
+        assert misplay.action.boom
+
+    def test_indexes_and_reopening(self):
+        """The queries have their indexes, and the games outlive the connection."""
+
+        self.db.add_game(misplay_and_clue_5_record())
+        self.db.close()
+        self.db = GameDatabase(self.path)
+
+        assert self.db.count_games() == 1
+        with self.db._lock:
+            indexes = {
+                name
+                for (name,) in self.db._db.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+                if not name.startswith("sqlite_")
+            }
+        assert indexes == {
+            "games_by_players",
+            "games_by_score",
+            "actions_by_type",
+            "actions_by_turn",
+        }
+
+
+if __name__ == "__main__":
+    unittest.main()
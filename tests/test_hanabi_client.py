@@ -1,5 +1,8 @@
 """Unit Tests for HanabiClient."""
 
+import os
+import tempfile
+import threading
 import unittest
 
 from unittest.mock import patch, MagicMock
@@ -11,6 +14,7 @@ from src.clue import Clue
 from src.constants import ACTION, Color
 from src.game import Game
 from src.hanabi_client import HanabiClient
+from src.review import load_game
 from src.utils import dump
 
 # Fake helpful constants.
@@ -650,5 +654,270 @@ class TestDecideAction(unittest.TestCase):
     '''
 
 
+# Test class.
+class TestTableSession(unittest.TestCase):
+    """Class to test per-table sessions and the deferred sending of actions."""
+
+    # Setup: Create a MagicMock for the WebSocketApp instance.
+    mock_ws_instance = MagicMock()
+
+    @patch("threading.Timer")
+    @patch("websocket.WebSocketApp")
+    def test_action_is_deferred_by_table_delay(self, mock_websocketapp, mock_timer):
+        """The action is scheduled on a timer instead of blocking the socket thread."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        state = get_default_game_state()
+        state.clue_tokens = 0
+        client = get_default_client(state)
+        session = client._session(FAKE_TABLE_ID)
+        session.action_delay = 0.5
+
+        client._decide_action(FAKE_TABLE_ID)
+
+        client._send.assert_not_called()
+        mock_timer.assert_called_once()
+        assert mock_timer.call_args.args[0] == 0.5
+        mock_timer.return_value.start.assert_called_once()
+        assert session.has_pending_action()
+
+        # Fire the timer manually.
+        session._send_pending(*mock_timer.call_args.kwargs["args"])
+        client._send.assert_called_once_with(
+            "action",
+            {"tableID": FAKE_TABLE_ID, "type": ACTION.DISCARD.value, "target": 0},
+        )
+        assert not session.has_pending_action()
+
+    @patch("websocket.WebSocketApp")
+    def test_chat_delay(self, mock_websocketapp):
+        """The delay can be changed per table by a private message."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        client = get_default_client()
+
+        client._chat({"recipient": "robot1", "who": "Alice", "msg": "/delay 0.25"})
+
+        assert client._session(FAKE_TABLE_ID).action_delay == 0.25
+
+    @patch("websocket.WebSocketApp")
+    def test_chat_profile(self, mock_websocketapp):
+        """Profiling is toggled per table, and profiles each decision into a file."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        state = get_default_game_state()
+        state.clue_tokens = 0
+        client = get_default_client(state)
+        session = client._session(FAKE_TABLE_ID)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            client.profile_dir = tmp
+            client._chat({"recipient": "robot1", "who": "Alice", "msg": "/profile"})
+            assert session.profiling
+
+            session.action_delay = 0
+            client._decide_action(FAKE_TABLE_ID)
+            client._send.assert_called_with(
+                "action",
+                {"tableID": FAKE_TABLE_ID, "type": ACTION.DISCARD.value, "target": 0},
+            )
+            files = sorted(os.listdir(tmp))
+            assert [os.path.splitext(f)[1] for f in files] == [".prof", ".txt"]
+            assert files[0].startswith(f"table{FAKE_TABLE_ID}-turn")
+
+            client._chat({"recipient": "robot1", "who": "Alice", "msg": "/profile off"})
+            assert not session.profiling
+            client._decide_action(FAKE_TABLE_ID)
+            assert len(os.listdir(tmp)) == 2
+
+    @patch("websocket.WebSocketApp")
+    def test_chat_stats(self, mock_websocketapp):
+        """The recent decisions, memory and size of each table are sent back by PM."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        state = get_default_game_state()
+        state.clue_tokens = 0
+        client = get_default_client(state)
+        client._session(FAKE_TABLE_ID).action_delay = 0
+        client._decide_action(FAKE_TABLE_ID)
+        client._decide_action(FAKE_TABLE_ID)
+        client._send.reset_mock()
+
+        # The memory was measured by the decisions, not by the reply.
+        with patch("src.hanabi_client.deep_sizeof") as mock_sizeof:
+            client._chat({"recipient": "robot1", "who": "Alice", "msg": "/stats"})
+        mock_sizeof.assert_not_called()
+
+        replies = [c.args[1] for c in client._send.call_args_list]
+        assert all(r["recipient"] == "Alice" for r in replies)
+        assert len(replies) == 2
+        table_line = replies[0]["msg"]
+        assert table_line.startswith(f"Table {FAKE_TABLE_ID}: last 2 decisions p50 ")
+        assert "nodes per decision" in table_line
+        assert "; memory " in table_line and " KiB; " in table_line
+        assert table_line.endswith(" checkpoints.")
+        assert f"; {len(state.event_log)} events, " in table_line
+        assert replies[1]["msg"].startswith("Decision pool: ")
+
+    @patch("websocket.WebSocketApp")
+    def test_finished_game_is_saved_for_review(self, mock_websocketapp):
+        """With a review directory, the log of a finished game is saved there."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        client = get_default_client(get_default_game_state())
+        with tempfile.TemporaryDirectory() as tmp:
+            client.review_dir = os.path.join(tmp, "robot1")
+            client._database_id({"tableID": FAKE_TABLE_ID, "databaseID": 1234})
+
+            record = load_game(os.path.join(tmp, "robot1", "1234.json"))
+            assert record["players"] == ["Alice", "Bob"]
+            assert len(record["actions"]) == 10
+            assert record["actions"][5] == {
+                "type": "draw",
+                "playerIndex": 1,
+                "order": 5,
+                "suitIndex": Color.YELLOW.value,
+                "rank": 4,
+            }
+        assert FAKE_TABLE_ID not in client.games
+
+    @patch("websocket.WebSocketApp")
+    def test_actions_go_to_their_own_tables(self, mock_websocketapp):
+        """One account plays two tables at once."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        state = get_default_game_state()
+        state.clue_tokens = 0
+        client = get_default_client(state)
+        other_state = get_default_game_state()
+        other_state.clue_tokens = 0
+        client.games[FAKE_TABLE_ID + 1] = other_state
+        client.tables[FAKE_TABLE_ID + 1] = {"players": ["robot1", "Bob"]}
+
+        # Bob asks at his table, even though the current table is another one.
+        client._chat({"recipient": "robot1", "who": "Bob", "msg": "/please"})
+        client.decisions.join()
+
+        client._send.assert_called_once_with(
+            "action",
+            {"tableID": FAKE_TABLE_ID + 1, "type": ACTION.DISCARD.value, "target": 0},
+        )
+        assert client.sessions.keys() == {FAKE_TABLE_ID + 1}
+
+    @patch("websocket.WebSocketApp")
+    def test_failed_decision_sends_one_fallback(self, mock_websocketapp):
+        """Requests which join a failing decision do not send more actions."""
+
+        mock_websocketapp.return_value = self.mock_ws_instance
+        client = get_default_client(get_default_game_state())
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise IndexError("no action")
+
+        with patch.object(Game, "decide_action", side_effect=fail):
+            client._chat({"recipient": "robot1", "who": "Alice", "msg": "/please"})
+            client._chat({"recipient": "robot1", "who": "Alice", "msg": "/please"})
+            release.set()
+            client.decisions.join()
+            client.decisions.shutdown()
+
+        assert client.decisions.stats()["joined"] == 1
+        client._send.assert_called_once()
+        assert client._send.call_args.args[0] == "action"
+
+
+# Test class.
+class TestReconnect(unittest.TestCase):
+    """Class to test reconnection and the resynchronization of games."""
+
+    @patch("time.sleep")
+    @patch("websocket.WebSocketApp")
+    def test_reconnect_after_connection_drops(self, mock_websocketapp, mock_sleep):
+        """A dropped connection is re-established and the games are re-requested."""
+
+        mock_ws_instance = MagicMock()
+        mock_websocketapp.return_value = mock_ws_instance
+        runs = []
+
+        def run_forever():
+            client = mock_websocketapp.call_args.kwargs["on_open"].__self__
+            runs.append(client)
+            if len(runs) == 1:
+                client.games[FAKE_TABLE_ID] = get_default_game_state()
+            elif len(runs) == 3:
+                client.stopping = True
+            client._websocket_open(None)
+            client._websocket_close(None, 1006, "")
+
+        mock_ws_instance.run_forever.side_effect = run_forever
+        client = HanabiClient("some_uri", "some_cookie", debug="unittest")
+
+        assert len(runs) == 3
+        assert client.reconnects == 2
+        assert mock_sleep.call_args_list[0].args == (1,)
+        mock_ws_instance.send.assert_any_call(
+            'getGameInfo2 {"tableID":' + str(FAKE_TABLE_ID) + "}"
+        )
+
+    @patch("websocket.WebSocketApp")
+    def test_resync_only_fast_forwards_new_actions(self, mock_websocketapp):
+        """The actions which are already applied are skipped."""
+
+        mock_websocketapp.return_value = MagicMock()
+        state = get_default_game_state()
+        client = get_default_client(state)
+
+        draws = [
+            {
+                "type": "draw",
+                "playerIndex": card.order // 5,
+                "order": card.order,
+                "suitIndex": card.suit_index,
+                "rank": card.rank,
+            }
+            for hand in state.player_hands
+            for card in hand
+        ]
+        clue = {
+            "type": "clue",
+            "clue": {"type": 1, "value": 4},
+            "giver": 0,
+            "list": [5, 8],
+            "target": 1,
+            "turn": 0,
+        }
+        status = {"type": "status", "clues": 7, "score": 0, "maxScore": 25}
+        client._game_action_list(
+            {"tableID": FAKE_TABLE_ID, "list": draws + [clue, status]}
+        )
+
+        assert len(state.action_history) == 11
+        assert [len(hand) for hand in state.player_hands] == [5, 5]
+        assert state.clue_tokens == 7
+        client._send.assert_called_once_with("loaded", {"tableID": FAKE_TABLE_ID})
+
+    @patch("websocket.WebSocketApp")
+    def test_init_keeps_the_existing_game(self, mock_websocketapp):
+        """After a reconnection, "init" does not throw our inferences away."""
+
+        mock_websocketapp.return_value = MagicMock()
+        state = get_default_game_state()
+        client = get_default_client(state)
+
+        client._init(
+            {
+                "tableID": FAKE_TABLE_ID,
+                "playerNames": ["Alice", "Bob"],
+                "ourPlayerIndex": 0,
+                "options": {"variantName": "No Variant"},
+            }
+        )
+
+        assert client.games[FAKE_TABLE_ID] is state
+        client._send.assert_called_once_with("getGameInfo2", {"tableID": FAKE_TABLE_ID})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,28 @@
+"""Unit Tests for the load-test harness."""
+
+import unittest
+
+import pytest
+
+# Imports (local application)
+from benchmarks.load_test import run_load_test
+
+
+# Test class.
+class TestLoadTest(unittest.TestCase):
+    """Class to test the load-test report."""
+
+    def test_uneven_tables_are_rejected(self):
+        with self.assertRaises(ValueError):
+            run_load_test(num_bots=2, players_per_table=3)
+
+    @pytest.mark.perf
+    def test_short_run(self):
+        report = run_load_test(num_bots=2, num_tables=1, duration=6, stall_timeout=1)
+        assert report["decisions"] > 0
+        assert report["games_finished"] > 0
+        assert 0 <= report["failed_decisions"] <= report["decisions"]
+        assert report["latency_p50"] <= report["latency_p95"]
+        assert report["latency_p95"] <= report["latency_p99"]
+        assert report["latency_p99"] <= report["latency_max"]
+        assert report["cpu_percent"] > 0
@@ -0,0 +1,76 @@
+"""Unit Tests for leveled logging."""
+
+import io
+import logging
+import unittest
+
+from unittest.mock import patch
+
+# Imports (local application)
+from src.log import DebugSampler, parse_module_levels, setup_logging, stop_logging
+
+
+# Test class.
+class TestLog(unittest.TestCase):
+    """Class to test the background writer, levels and sampling."""
+
+    def tearDown(self):
+        stop_logging()
+        logging.getLogger().handlers.clear()
+        logging.getLogger("tests.quiet").setLevel(logging.NOTSET)
+
+    def test_background_writer_with_module_levels(self):
+        """Records go through the background writer and respect per-module levels."""
+
+        stream = io.StringIO()
+        setup_logging(
+            level="DEBUG", module_levels={"tests.quiet": "WARNING"}, stream=stream
+        )
+        logging.getLogger("tests.loud").debug("hello %s", "world")
+        logging.getLogger("tests.quiet").info("hidden")
+        logging.getLogger("tests.quiet").warning("shown")
+        stop_logging()
+
+        output = stream.getvalue()
+        assert "hello world" in output
+        assert "hidden" not in output
+        assert "shown" in output
+
+    def test_sampling_before_the_queue(self):
+        """Debug records are sampled before they are queued; setting up again does
+        not add another exit hook."""
+
+        stream = io.StringIO()
+        with patch("src.log.atexit.register") as register:
+            for _ in range(3):
+                setup_logging(level="DEBUG", debug_sample_rate=0.5, stream=stream)
+        assert register.call_count <= 1
+        [queue_handler] = logging.getLogger().handlers
+        assert any(isinstance(f, DebugSampler) for f in queue_handler.filters)
+
+        for i in range(4):
+            logging.getLogger("tests.loud").debug("sampled %d", i)
+        stop_logging()
+        assert stream.getvalue().count("sampled") == 2
+
+    def test_debug_sampler(self):
+        """Only one out of N debug records is kept, other levels are kept."""
+
+        sampler = DebugSampler(0.25)
+        debug = logging.LogRecord("x", logging.DEBUG, "", 0, "", None, None)
+        info = logging.LogRecord("x", logging.INFO, "", 0, "", None, None)
+
+        assert [sampler.filter(debug) for _ in range(8)].count(True) == 2
+        assert sampler.filter(info)
+        assert not DebugSampler(0).filter(debug)
+
+    def test_parse_module_levels(self):
+        assert parse_module_levels("src.game=debug, src.snapshot=WARNING") == {
+            "src.game": "DEBUG",
+            "src.snapshot": "WARNING",
+        }
+        assert not parse_module_levels(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
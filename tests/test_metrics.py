@@ -0,0 +1,114 @@
+"""Unit Tests for the metrics and their endpoint."""
+
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from unittest.mock import patch
+
+# Imports (local application)
+from src import metrics
+from src.conventions import SearchStats
+from src.metrics import Counter, Gauge, Histogram, MetricsRegistry, start_metrics_server
+from tests.test_hanabi_client import get_default_client
+
+
+# Test class.
+class TestMetrics(unittest.TestCase):
+    """Class to test the lock-light metrics and their text format."""
+
+    def test_counter_sums_the_shards_of_all_threads(self):
+        """Every thread counts into its own shard; nothing is lost."""
+
+        counter = Counter("c_total", "A counter.", ["command"])
+
+        def work():
+            for _ in range(1000):
+                counter.inc("action")
+            counter.inc("chat", amount=5)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.values() == {("action",): 4000, ("chat",): 20}
+
+    def test_render(self):
+        """Counters, histograms and gauges in the Prometheus text format."""
+
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("msgs_total", "Messages.", ["command"]))
+        histogram = registry.register(Histogram("latency_seconds", "Latency.", (0.1, 1)))
+        registry.register(
+            Gauge("tables", "Tables.", lambda: {('robot"1',): 2}, ["username"])
+        )
+        counter.inc("init")
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3)
+
+        assert registry.render().splitlines() == [
+            "# HELP msgs_total Messages.",
+            "# TYPE msgs_total counter",
+            'msgs_total{command="init"} 1',
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            "latency_seconds_sum 3.55",
+            "latency_seconds_count 3",
+            "# HELP tables Tables.",
+            "# TYPE tables gauge",
+            'tables{username="robot\\"1"} 2',
+        ]
+
+    def test_endpoint(self):
+        """The metrics are served at /metrics only."""
+
+        registry = MetricsRegistry()
+        registry.register(Counter("up_total", "Up.")).inc()
+        server = start_metrics_server(0, registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+                assert response.status == 200
+                assert "up_total 1" in response.read().decode("utf-8")
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + "/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_client_records_messages_and_decisions(self):
+        """The client counts its messages, handler failures and decisions."""
+
+        with patch("websocket.WebSocketApp"):
+            client = get_default_client()
+        client.username = "metrics-robot"
+        client._session(42).action_delay = 0
+        messages = metrics.MESSAGES.values()
+        failures = metrics.HANDLER_EXCEPTIONS.values()
+        decisions = metrics.DECISION_SECONDS.values().get((), ([], 0, 0))[2]
+
+        client._websocket_message(None, 'table {"id": 7}')
+        # "tableGone" of an unknown table fails in its handler.
+        client._websocket_message(None, 'tableGone {"tableID": 8}')
+        client.games[42].clue_tokens = 0
+        client._decide_action(42)
+
+        after = metrics.MESSAGES.values()
+        assert after[("table",)] == messages.get(("table",), 0) + 1
+        assert metrics.HANDLER_EXCEPTIONS.values()[("tableGone",)] == (
+            failures.get(("tableGone",), 0) + 1
+        )
+        assert metrics.DECISION_SECONDS.values()[()][2] == decisions + 1
+        assert metrics.ACTIVE_TABLES.callback()[("metrics-robot",)] == 1
+
+    def test_record_decision_with_search_stats(self):
+        nodes = metrics.SEARCH_NODES.values().get((), 0)
+        metrics.record_decision(0.01, SearchStats(nodes=30, elapsed=0.01))
+        assert metrics.SEARCH_NODES.values()[()] == nodes + 30
@@ -0,0 +1,59 @@
+"""Performance budgets of the engine hot paths (run with --perf)."""
+
+import copy
+
+import pytest
+
+# Imports (local application)
+from benchmarks.bench_engine import load_midgame, load_opening
+from src.conventions import evaluate
+from src.game import Game
+
+
+# Test class.
+@pytest.mark.perf
+class TestPerfBudgets:
+    """Class to keep key scenarios within their time, node and memory budgets."""
+
+    @pytest.fixture(autouse=True)
+    def _fixtures(self):
+        self.opening = load_opening()
+        self.midgame = load_midgame()
+
+    def test_next_snapshot(self, perf_budget):
+        snapshot = self.midgame.snapshot_history[-1]
+        actions = snapshot.get_valid_actions(
+            viewer_index=self.midgame.our_player_index,
+            player_index=self.midgame.our_player_index,
+        )
+
+        def scenario():
+            for action in actions:
+                snapshot.next_snapshot(action)
+
+        perf_budget.check("snapshot.next_snapshot", scenario)
+
+    @pytest.mark.parametrize("depth", [1, 2, 3])
+    def test_evaluate(self, perf_budget, depth):
+        player = self.midgame.our_player_index
+        snapshot = self.midgame.decision_snapshot()
+        perf_budget.check(
+            f"conventions.evaluate[depth={depth}]",
+            lambda s: evaluate(s, player, player, depth),
+            setup=lambda: (snapshot.copy(),),
+        )
+
+    def test_evaluate_opening(self, perf_budget):
+        perf_budget.check(
+            "conventions.evaluate[opening]",
+            lambda s: evaluate(s, 0, 0, 2),
+            setup=lambda: (self.opening.copy(),),
+        )
+
+    def test_decide_action(self, perf_budget):
+        # The search annotates the cards of the game, so each run gets a fresh copy.
+        perf_budget.check(
+            "game.decide_action",
+            Game.decide_action,
+            setup=lambda: (copy.deepcopy(self.midgame),),
+        )
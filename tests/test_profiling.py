@@ -0,0 +1,71 @@
+"""Unit Tests for the profiling of single decisions."""
+
+import os
+import pstats
+import tempfile
+import unittest
+
+# Imports (local application)
+from src import profiling
+from src.profiling import profile_call
+
+
+def _work(n):
+    return sum(i * i for i in range(n))
+
+
+# Test class.
+class TestProfileCall(unittest.TestCase):
+    """Class to test profiles and their summaries."""
+
+    def test_profile_is_written_with_a_summary(self):
+        """The call returns as usual; its profile and summary are in timestamped files."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            result, report = profile_call(_work, 1000, label="work", output_dir=tmp)
+
+            assert result == _work(1000)
+            assert os.path.basename(report.path).startswith("work-")
+            assert sorted(os.listdir(tmp)) == sorted(
+                [os.path.basename(report.path), os.path.basename(report.summary_path)]
+            )
+            # The profile can be loaded by pstats and has our function in it.
+            stats = pstats.Stats(report.path)
+            assert any(func[2] == "_work" for func in stats.stats)
+            with open(report.summary_path, encoding="utf-8") as f:
+                summary = f.read()
+            assert summary.startswith("work: ")
+            assert "_work" in summary and "cumulative" in summary
+
+    def test_exception_is_raised_after_the_profile_is_written(self):
+        """A failing decision is profiled too."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(ZeroDivisionError):
+                profile_call(lambda: 1 / 0, output_dir=tmp)
+            assert len(os.listdir(tmp)) == 2
+
+    def test_unwritable_output_dir(self):
+        """A profile which cannot be written does not lose the result of the call."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # A directory cannot be made inside a regular file.
+            blocker = os.path.join(tmp, "file")
+            with open(blocker, "w", encoding="utf-8"):
+                pass
+            with self.assertLogs(profiling.logger, "WARNING"):
+                result, report = profile_call(
+                    _work, 10, output_dir=os.path.join(blocker, "profiles")
+                )
+            assert result == _work(10)
+            assert report is None
+
+    def test_only_one_profile_at_a_time(self):
+        """A call while another profile runs is not profiled."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with profiling._profiler_lock:
+                result, report = profile_call(_work, 10, output_dir=tmp)
+            assert result == _work(10)
+            assert report is None
+            assert not os.listdir(tmp)
@@ -0,0 +1,86 @@
+"""Unit Tests for the post-game review."""
+
+import logging
+import unittest
+
+# Imports (local application)
+from src.review import export_game, format_review, review_game, review_games
+from src.simulator import SelfPlayGame, fallback_action
+
+
+def play_record(seed, decide=None, max_turns=12):
+    """A seeded self-play game and its record with every card known."""
+    play = SelfPlayGame(num_players=2, seed=seed, decide=decide, max_turns=max_turns)
+    play.play()
+    record = {"players": play.seats[0].player_names, "actions": play.referee.actions}
+    return play, record
+
+
+# Test class.
+class TestReview(unittest.TestCase):
+    """Class to test the turn-by-turn review of finished games."""
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_bot_agrees_with_its_own_game(self):
+        """Every turn played by the bot is the one it would choose again."""
+
+        play, record = play_record(seed=4)
+        reviews = review_game(record, processes=1)
+
+        assert [r.turn for r in reviews] == list(range(play.referee.turn))
+        assert [r.player_index for r in reviews[:4]] == [0, 1, 0, 1]
+        assert all(r.agrees and r.score_delta == 0 for r in reviews)
+        assert format_review(reviews[0]).endswith("; the bot agrees")
+
+    def test_disagreements_report_the_bot_action_and_delta(self):
+        """The turns of another policy are compared with what the bot would do."""
+
+        _, record = play_record(seed=4, decide=fallback_action)
+        reviews = review_game(record, processes=1)
+
+        disagreements = [r for r in reviews if not r.agrees]
+        assert disagreements
+        review = disagreements[0]
+        assert review.suggested is not None
+        assert "; bot would have done: " in format_review(review)
+        assert ", score delta " in format_review(review)
+
+    def test_parallel_review_matches_serial(self):
+        """The process pool gives the same reviews, in the order of games and turns."""
+
+        records = [play_record(seed=1)[1], play_record(seed=2, max_turns=6)[1]]
+        serial = list(review_games(records, processes=1))
+        parallel = list(review_games(records, processes=2))
+
+        assert parallel == serial
+        assert [index for index, _ in serial] == [0] * 12 + [1] * 6
+
+    def test_export_reveals_played_cards(self):
+        """A seat's own draws are exported with the values known at the end."""
+
+        play, record = play_record(seed=3, decide=fallback_action)
+        exported = export_game(play.seats[0])
+
+        assert exported["players"] == record["players"]
+        turns = [
+            a for a in record["actions"] if a["type"] in ("clue", "play", "discard")
+        ]
+        assert [a for a in exported["actions"] if a["type"] != "draw"] == turns
+        played = {a["order"] for a in turns if a["type"] in ("play", "discard")}
+        for data, original in zip(
+            (a for a in exported["actions"] if a["type"] == "draw"),
+            (a for a in record["actions"] if a["type"] == "draw"),
+        ):
+            if data["playerIndex"] != 0 or data["order"] in played:
+                assert data == original
+            else:
+                assert data["rank"] == -1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Unit Tests for the binary encoding of snapshots and games."""
+
+import unittest
+
+import jsonpickle
+
+# Imports (local application)
+from src.card import Card
+from src.clue import Clue
+from src.constants import Status
+from src.finesse import Finesse
+from src.serialization import (
+    FORMAT_VERSION,
+    decode_game,
+    decode_snapshot,
+    encode_game,
+    encode_snapshot,
+)
+from src.simulator import SelfPlayGame, fallback_action
+from src.snapshot import Snapshot
+
+
+def get_midgame():
+    game = SelfPlayGame(num_players=3, seed=2, decide=fallback_action)
+    for _ in range(30):
+        game.step()
+    return game.seats[0]
+
+
+# Test class.
+class TestSerialization(unittest.TestCase):
+    """Class to test round trips, sizes and invalid data."""
+
+    def test_game_round_trip(self):
+        game = get_midgame()
+
+        decoded = decode_game(encode_game(game))
+
+        assert decoded == game
+        # Shared cards stay shared, e.g. the hands and the initial cards.
+        first = decoded.snapshot_history[0]
+        assert first.hands[0][0] is first.initial_cards[0]
+
+    def test_snapshot_round_trip_with_every_field(self):
+        card = Card(
+            order=7,
+            rank=3,
+            suit_index=4,
+            owner_index=1,
+            negative_colors=[2, 0],
+            negative_ranks=[5, 1],
+            status=Status.DIRECT_FINESSED,
+            clues=[Clue(3, 3, 0, 1, turn=300, classification=1, touched_orders=[7])],
+            finesses=[
+                Finesse(
+                    rank=3,
+                    suit=4,
+                    urgent=True,
+                    clues=[Clue(2, 4, touched_orders=[7, 9])],
+                    actionable_paths=[[7, 9], []],
+                    giver=0,
+                    receivers=[1, 2],
+                )
+            ],
+        )
+        snapshot = get_midgame().snapshot_history[-1]
+        snapshot.hands[1].append(card)
+
+        assert decode_snapshot(encode_snapshot(snapshot)) == snapshot
+
+    def test_much_smaller_than_jsonpickle(self):
+        game = get_midgame()
+        assert len(encode_game(game)) * 10 < len(jsonpickle.encode(game))
+        snapshot = game.snapshot_history[-1]
+        assert len(encode_snapshot(snapshot)) * 10 < len(jsonpickle.encode(snapshot))
+
+    def test_invalid_data(self):
+        data = encode_snapshot(get_midgame().snapshot_history[-1])
+        with self.assertRaises(ValueError):
+            decode_game(data)  # A snapshot is not a game.
+        with self.assertRaises(ValueError):
+            decode_snapshot(data[:-1])
+        with self.assertRaises(ValueError):
+            decode_snapshot(data[:4] + bytes([FORMAT_VERSION + 1]) + data[5:])
+        with self.assertRaises(ValueError):
+            encode_snapshot(Snapshot(clue_tokens=1 << 20))
+
+    def test_corrupt_data_raises_value_error(self):
+        """Overwritten bytes decode into something, or raise ValueError only."""
+
+        data = encode_game(get_midgame())
+        for position in range(8, len(data), 7):
+            corrupt = data[:position] + b"\xff\x7f" + data[position + 2 :]
+            try:
+                decode_game(corrupt)
+            except ValueError:
+                pass
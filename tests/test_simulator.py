@@ -0,0 +1,45 @@
+"""Unit Tests for the headless self-play simulator."""
+
+import unittest
+
+# Imports (local application)
+from src.referee import END_CONDITION_NORMAL
+from src.simulator import SelfPlayGame, fallback_action, play_game
+
+
+# Test class.
+class TestSelfPlay(unittest.TestCase):
+    """Class to test self-play games."""
+
+    def test_seats_follow_the_referee(self):
+        game = SelfPlayGame(num_players=3, seed=5, decide=fallback_action)
+        for _ in range(20):
+            game.step()
+
+        referee = game.referee
+        for player_index, seat in enumerate(game.seats):
+            assert seat.clue_tokens == referee.clue_tokens
+            assert seat.current_player_index() == referee.current_player_index
+            for hand, true_hand in zip(seat.player_hands, referee.hands):
+                assert [c.order for c in hand] == [c.order for c in true_hand]
+            # Only our own cards are hidden.
+            other = (player_index + 1) % 3
+            assert [c.rank for c in seat.player_hands[other]] == [
+                c.rank for c in referee.hands[other]
+            ]
+
+    def test_full_game(self):
+        result = play_game(num_players=2, seed=3)
+        assert result.end_condition == END_CONDITION_NORMAL
+        assert result.turns == len(result.decision_times)
+        assert result.search_nodes > 0
+        assert 0 <= result.score <= result.max_score == 25
+
+    def test_reproducible(self):
+        first = play_game(num_players=2, seed=11, decide=fallback_action)
+        second = play_game(num_players=2, seed=11, decide=fallback_action)
+        assert (first.score, first.turns, first.strikes) == (
+            second.score,
+            second.turns,
+            second.strikes,
+        )
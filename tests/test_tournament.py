@@ -0,0 +1,63 @@
+"""Unit Tests for the self-play tournament runner."""
+
+import os
+import tempfile
+import unittest
+
+# Imports (local application)
+from src.referee import END_CONDITION_NORMAL, END_CONDITION_STRIKEOUT
+from src.tournament import load_results, run_tournament, summarize
+
+
+# Helper functions
+def get_result(score, end_condition=END_CONDITION_NORMAL, decision_times=None):
+    return {
+        "score": score,
+        "max_score": 25,
+        "end_condition": end_condition,
+        "failed_decisions": 0,
+        "decision_times": decision_times or [],
+    }
+
+
+# Test class.
+class TestTournament(unittest.TestCase):
+    """Class to test tournaments and their summary."""
+
+    def test_summarize(self):
+        summary = summarize(
+            [
+                get_result(25, decision_times=[0.01, 0.03]),
+                get_result(20, decision_times=[0.02]),
+                get_result(0, END_CONDITION_STRIKEOUT),
+                get_result(25),
+            ]
+        )
+        assert summary.games == 4
+        assert summary.score_distribution == {0: 1, 20: 1, 25: 2}
+        assert summary.mean_score == 17.5
+        assert summary.perfect_rate == 0.5
+        assert summary.strikeout_rate == 0.25
+        assert summary.decisions == 3
+        assert summary.decision_p50 == 0.02
+        assert summary.decision_max == 0.03
+        assert summarize([]).games == 0
+
+    def test_reproducible_and_append_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.jsonl")
+            first = run_tournament(4, seed=10, policy="fallback", processes=2, output=path)
+            second = run_tournament(4, seed=10, policy="fallback", processes=1, output=path)
+
+            results = list(load_results(path))
+        assert len(results) == 8
+        assert [r["seed"] for r in results] == [10, 11, 12, 13] * 2
+        for a, b in zip(results[:4], results[4:]):
+            assert (a["score"], a["turns"], a["strikes"]) == (
+                b["score"],
+                b["turns"],
+                b["strikes"],
+            )
+        assert first.score_distribution == second.score_distribution
+        with self.assertRaises(ValueError):
+            run_tournament(1, policy="nope")
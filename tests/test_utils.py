@@ -0,0 +1,83 @@
+"""Unit Tests for the utils functions."""
+
+import os
+import tempfile
+import unittest
+
+# Imports (local application)
+from src.card import Card
+from src.clue import Clue
+from src.constants import Status
+from src.game import Game
+from src.utils import deep_sizeof, dump, flush_dumps, percentile, render_dump
+
+
+# Test class.
+class TestDump(unittest.TestCase):
+    """Class to test the bounded debug dump."""
+
+    def test_compact_rendering(self):
+        """Default fields are left out and cards take one line."""
+
+        game = Game()
+        game.player_names = ["Alice", "Bob"]
+        game.player_hands = [
+            [Card(order=0, status=Status.CLUED_SAVED, clues=[Clue()])],
+            [Card(order=5, rank=4, suit_index=1, negative_ranks=[1, 2])],
+        ]
+
+        assert render_dump(game) == "\n".join(
+            [
+                "Game {",
+                '  player_names: ["Alice", "Bob"]',
+                "  player_hands: [",
+                '    ["#0 s-1 r-1 CLUED_SAVED clues=1"]',
+                '    ["#5 s1 r4 -r[1, 2]"]',
+                "  ]",
+                "}",
+            ]
+        )
+
+    def test_limits(self):
+        """Depth, items and total length are all bounded."""
+
+        assert render_dump({"a": {"b": {"c": 1}}}, max_depth=1) == (
+            "{\n  a: {...1 items}\n}"
+        )
+        assert render_dump(list(range(100)), max_items=4) == "[0, 1, ...96 more..., 98, 99]"
+        text = render_dump([[i] for i in range(10_000)], max_items=10_000, max_chars=1000)
+        assert len(text) < 1100
+        assert text.endswith("...truncated at 1000 characters")
+
+    def test_cycles(self):
+        """An object referring to itself is cut."""
+
+        cycle = {"name": "loop"}
+        cycle["self"] = cycle
+        assert render_dump(cycle) == '{\n  name: "loop"\n  self: <cycle dict>\n}'
+
+    def test_dump_is_written_off_thread(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dump.txt")
+            text = dump({"turn": 3}, path=path)
+            flush_dumps()
+            with open(path, encoding="utf-8") as f:
+                assert f.read() == text + "\n"
+
+
+# Test class.
+class TestUtils(unittest.TestCase):
+    """Class to test the other helpers."""
+
+    def test_percentile(self):
+        assert percentile([], 50) is None
+        assert percentile([1, 2, 3, 4], 50) == 2
+        assert percentile([1, 2, 3, 4], 99) == 4
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([3], 95) == 3
+
+    def test_deep_sizeof_counts_shared_objects_once(self):
+        card = Card(order=1)
+        assert deep_sizeof([card, card]) < deep_sizeof([card, Card(order=2)])